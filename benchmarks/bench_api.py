@@ -0,0 +1,125 @@
+"""End-to-end benchmarks of the in-memory Flask API through its test client
+
+    python benchmarks/bench_api.py 1000 100000 > api.json
+
+For each scale the app is reloaded and filled with a synthetic inventory.
+/search and /expiring_medicines are then timed with the response cache
+bypassed (bumped before every request) and, for the same URLs, with the
+cache in use. /search/batch is timed against the same names sent one
+request each. Results are written to stdout as JSON,
+in the same shape as native_bench, so runs can be compared with compare.py.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_api'))
+
+# Requests timed per endpoint benchmark
+REQUEST_COUNT = 2000
+
+# Queries per /search/batch request, about one prescription
+BATCH_SIZE = 10
+
+# Syllables combined into drug-like names, as in native_bench.cpp
+HEADS = ('a ab ac al am an ar at az be bu ca ce cl co da de di do e en er es fe fl flu ga gli hy i '
+         'ib im in ke la le li lo me mi mo na ne ni no o ol om pa pe pi pra pro que ra re ri ro '
+         'sa se si so su ta te ti to tra va ve vo za ze zo').split()
+MIDDLES = [''] + ('ba ce da fe ga la li lo ma mi na ne no pa pi pri ra re ri ro sa so ta te ti tri va '
+                  'xi zo').split()
+STEMS = ('cillin cycline mycin floxacin azole conazole prazole tidine statin pril sartan olol '
+         'dipine semide thiazide formin gliptin glitazone mab nib vir vudine profen coxib done '
+         'pam lam triptan setron lukast terol sone olone parin xaban gatran tadine zine pine ine').split()
+
+def drug_names(count, rng):
+    """Deterministic pseudo drug names; repeats are possible, as in real catalogues"""
+    return [rng.choice(HEADS) + rng.choice(MIDDLES) + rng.choice(MIDDLES) + rng.choice(STEMS)
+            for _ in range(count)]
+
+def inventory_rows(names, rng):
+    """(name, brand, quantity, expiryDate) rows with expiry dates spread over 2024-2030"""
+    return [(name.capitalize(), 'Generic', rng.randrange(501),
+             f'{rng.randint(2024, 2030):04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}')
+            for name in names]
+
+def timed(results, name, scale, ops, body):
+    start = time.perf_counter()
+    body()
+    seconds = time.perf_counter() - start
+    results.append({
+        "name": name,
+        "scale": scale,
+        "ops": ops,
+        "seconds": seconds,
+        "ns_per_op": seconds * 1e9 / ops,
+        "ops_per_second": ops / seconds
+    })
+    print(f"{name} @{scale}: {ops / seconds:.0f} ops/s", file=sys.stderr)
+
+def bench_scale(results, scale, seed):
+    rng = random.Random(seed)
+    app = importlib.import_module('app')
+    app = importlib.reload(app)  # fresh Trie, MinHeap, store and cache per scale
+    client = app.app.test_client()
+    names = drug_names(scale, rng)
+    rows = inventory_rows(names, rng)
+
+    timed(results, "api.load.add_medicine_batch", scale, len(rows), lambda: app.add_medicine_batch(rows))
+
+    def requests(urls, use_cache):
+        def body():
+            for url in urls:
+                if not use_cache:
+                    app.response_cache.bump()
+                response = client.get(url)
+                assert response.status_code == 200, (url, response.status_code)
+        return body
+
+    for length in (1, 3, 5):
+        urls = [f'/search?query={rng.choice(names)[:length]}&limit=20' for _ in range(REQUEST_COUNT)]
+        timed(results, f"api.search.len{length}.nocache", scale, len(urls), requests(urls, use_cache=False))
+        timed(results, f"api.search.len{length}.cache", scale, len(urls), requests(urls, use_cache=True))
+
+    # A prescription's worth of names per request, against the same names one request each
+    batches = [[rng.choice(names)[:5] for _ in range(BATCH_SIZE)] for _ in range(REQUEST_COUNT // BATCH_SIZE)]
+
+    def batch_requests():
+        for queries in batches:
+            response = client.post('/search/batch', json={"queries": queries, "limit": 20})
+            assert response.status_code == 200, (queries, response.status_code)
+
+    urls = [f'/search?query={query}&limit=20' for queries in batches for query in queries]
+    timed(results, f"api.search.single{BATCH_SIZE}.nocache", scale, len(urls), requests(urls, use_cache=False))
+    timed(results, f"api.search.batch{BATCH_SIZE}", scale, len(urls), batch_requests)
+
+    urls = [f'/search?query={rng.choice(names)[:3]}&limit=20&rank=popular' for _ in range(REQUEST_COUNT)]
+    timed(results, "api.search.popular.nocache", scale, len(urls), requests(urls, use_cache=False))
+
+    urls = ['/expiring_medicines?limit=100'] * REQUEST_COUNT
+    timed(results, "api.expiring.limit100.nocache", scale, len(urls), requests(urls, use_cache=False))
+    timed(results, "api.expiring.limit100.cache", scale, len(urls), requests(urls, use_cache=True))
+
+    urls = [f'/expiring_medicines?before=2026-{rng.randint(1, 12):02d}-01&limit=100&cursor={rng.randrange(0, 1000, 100)}'
+            for _ in range(REQUEST_COUNT)]
+    timed(results, "api.expiring.before.nocache", scale, len(urls), requests(urls, use_cache=False))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scales', nargs='*', type=int, default=[1000, 100000],
+                        help='Inventory sizes to benchmark (default: 1000 100000)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        bench_scale(results, scale, args.seed)
+
+    json.dump({"suite": "api", "seed": args.seed, "results": results}, sys.stdout, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
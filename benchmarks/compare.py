@@ -0,0 +1,43 @@
+"""Compare two benchmark JSON files written by native_bench or bench_api.py
+
+    python benchmarks/compare.py baseline.json candidate.json --threshold 0.10
+
+Prints the per-operation time of every benchmark present in both runs and
+the relative change. Exits with status 1 if any benchmark got slower by more
+than the threshold, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return {(r['name'], r['scale']): r['ns_per_op'] for r in json.load(f)['results']}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    regressions = 0
+    print(f"{'benchmark':<44} {'scale':>8} {'base ns/op':>12} {'new ns/op':>12} {'change':>8}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{key[0]:<44} {key[1]:>8} {before:>12.1f} {after:>12.1f} {change:>+8.1%}{flag}")
+
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{key[0]:<44} {key[1]:>8}  only in {'baseline' if key in baseline else 'candidate'}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+// Benchmarks for the native Trie and MinHeap on synthetic drug names and inventory.
+//
+// Usage: native_bench [scale ...] [--seed N]
+// Scales default to 1000 100000 1000000. Results are written to stdout as JSON.
+
+#include <chrono>
+#include <cstdio>
+#include <functional>
+#include <iostream>
+#include <random>
+#include <sstream>
+#include <string>
+#include <vector>
+#include "../include/Trie.h"
+#include "../include/MinHeap.h"
+
+namespace {
+
+// Lookups timed per query benchmark
+const size_t QUERY_COUNT = 20000;
+
+// Query benchmarks run this many times and keep the fastest, to damp noise
+const int QUERY_REPEATS = 3;
+
+// Syllables combined into drug-like names, e.g. "cefalotriprazole"
+const char* const HEADS[] = {
+    "a", "ab", "ac", "al", "am", "an", "ar", "at", "az", "be", "bu", "ca", "ce", "cl", "co",
+    "da", "de", "di", "do", "e", "en", "er", "es", "fe", "fl", "flu", "ga", "gli", "hy", "i",
+    "ib", "im", "in", "ke", "la", "le", "li", "lo", "me", "mi", "mo", "na", "ne", "ni", "no",
+    "o", "ol", "om", "pa", "pe", "pi", "pra", "pro", "que", "ra", "re", "ri", "ro", "sa", "se",
+    "si", "so", "su", "ta", "te", "ti", "to", "tra", "va", "ve", "vo", "za", "ze", "zo"
+};
+const char* const MIDDLES[] = {
+    "", "ba", "ce", "da", "fe", "ga", "la", "li", "lo", "ma", "mi", "na", "ne", "no", "pa",
+    "pi", "pri", "ra", "re", "ri", "ro", "sa", "so", "ta", "te", "ti", "tri", "va", "xi", "zo"
+};
+const char* const STEMS[] = {
+    "cillin", "cycline", "mycin", "floxacin", "azole", "conazole", "prazole", "tidine", "statin",
+    "pril", "sartan", "olol", "dipine", "semide", "thiazide", "formin", "gliptin", "glitazone",
+    "mab", "nib", "vir", "vudine", "profen", "coxib", "done", "pam", "lam", "triptan", "setron",
+    "lukast", "terol", "sone", "olone", "parin", "xaban", "gatran", "tadine", "zine", "pine", "ine"
+};
+
+template <size_t N>
+const char* pick(const char* const (&options)[N], std::mt19937& rng) {
+    return options[std::uniform_int_distribution<size_t>(0, N - 1)(rng)];
+}
+
+// Deterministic pseudo drug names; repeats are possible, as in real catalogues
+std::vector<std::string> drugNames(size_t count, unsigned seed) {
+    std::mt19937 rng(seed);
+    std::vector<std::string> names;
+    names.reserve(count);
+    for (size_t i = 0; i < count; i++) {
+        std::string name = pick(HEADS, rng);
+        name += pick(MIDDLES, rng);
+        name += pick(MIDDLES, rng);
+        name += pick(STEMS, rng);
+        names.push_back(std::move(name));
+    }
+    return names;
+}
+
+// Inventory rows with expiry dates spread over 2024-2030
+std::vector<MedicineItem> inventory(const std::vector<std::string>& names, unsigned seed) {
+    std::mt19937 rng(seed);
+    std::uniform_int_distribution<int> year(2024, 2030), month(1, 12), day(1, 28), quantity(0, 500);
+    std::vector<MedicineItem> items;
+    items.reserve(names.size());
+    char date[16];
+    for (size_t i = 0; i < names.size(); i++) {
+        std::snprintf(date, sizeof(date), "%04d-%02d-%02d", year(rng), month(rng), day(rng));
+        items.push_back(MedicineItem{static_cast<int>(i + 1), names[i], "Generic", quantity(rng), date});
+    }
+    return items;
+}
+
+struct Result {
+    std::string name;
+    size_t scale;
+    size_t ops;
+    double seconds;
+};
+
+class Bench {
+public:
+    std::vector<Result> results;
+
+    // Time `body`, which performs `ops` operations, keeping the fastest of `repeats` runs
+    void run(const std::string& name, size_t scale, size_t ops, const std::function<void()>& body,
+             int repeats = 1) {
+        double best = 0;
+        for (int i = 0; i < repeats; i++) {
+            auto start = std::chrono::steady_clock::now();
+            body();
+            std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+            if (i == 0 || elapsed.count() < best) {
+                best = elapsed.count();
+            }
+        }
+        results.push_back({name, scale, ops, best});
+        std::cerr << name << " @" << scale << ": " << best * 1e9 / ops << " ns/op" << std::endl;
+    }
+};
+
+// Keeps results alive so the optimiser cannot drop the measured calls
+size_t sink = 0;
+
+void benchTrie(Bench& bench, size_t scale, const std::vector<std::string>& names, unsigned seed) {
+    {
+        Trie trie;
+        bench.run("trie.insert", scale, names.size(), [&] {
+            for (size_t i = 0; i < names.size(); i++) {
+                trie.insert(names[i], static_cast<int>(i % 1000));
+            }
+        });
+    }
+
+    Trie trie;
+    std::vector<int> weights(names.size());
+    for (size_t i = 0; i < names.size(); i++) {
+        weights[i] = static_cast<int>(i % 1000);
+    }
+    bench.run("trie.insertMany", scale, names.size(), [&] { trie.insertMany(names, weights); });
+
+    std::mt19937 rng(seed + 1);
+    std::uniform_int_distribution<size_t> index(0, names.size() - 1);
+    std::vector<std::string> hits(QUERY_COUNT), misses(QUERY_COUNT);
+    for (size_t i = 0; i < QUERY_COUNT; i++) {
+        hits[i] = names[index(rng)];
+        misses[i] = names[index(rng)] + "x";
+    }
+
+    bench.run("trie.search.hit", scale, QUERY_COUNT, [&] {
+        for (const auto& word : hits) sink += trie.search(word);
+    }, QUERY_REPEATS);
+    bench.run("trie.search.miss", scale, QUERY_COUNT, [&] {
+        for (const auto& word : misses) sink += trie.search(word);
+    }, QUERY_REPEATS);
+
+    // Short prefixes match large subtrees; the page limit keeps the work bounded
+    for (size_t length : {1, 2, 3, 5, 8}) {
+        std::vector<std::string> prefixes(QUERY_COUNT);
+        for (size_t i = 0; i < QUERY_COUNT; i++) {
+            prefixes[i] = hits[i].substr(0, length);
+        }
+        bench.run("trie.startsWith.len" + std::to_string(length) + ".limit20", scale, QUERY_COUNT, [&] {
+            for (const auto& prefix : prefixes) sink += trie.startsWith(prefix, 20).size();
+        }, QUERY_REPEATS);
+        bench.run("trie.topK.len" + std::to_string(length) + ".k10", scale, QUERY_COUNT, [&] {
+            for (const auto& prefix : prefixes) sink += trie.topK(prefix, 10).size();
+        }, QUERY_REPEATS);
+    }
+
+    size_t fuzzyCount = QUERY_COUNT / 20;
+    bench.run("trie.fuzzySearch.d1", scale, fuzzyCount, [&] {
+        for (size_t i = 0; i < fuzzyCount; i++) sink += trie.fuzzySearch(misses[i], 1, 10).size();
+    }, QUERY_REPEATS);
+}
+
+void benchHeap(Bench& bench, size_t scale, const std::vector<MedicineItem>& items) {
+    {
+        MinHeap heap;
+        bench.run("heap.insert", scale, items.size(), [&] {
+            for (const auto& item : items) heap.insert(item);
+        });
+    }
+
+    MinHeap heap;
+    bench.run("heap.insertMany", scale, items.size(), [&] { heap.insertMany(items); });
+    bench.run("heap.peekN.100", scale, QUERY_COUNT / 10, [&] {
+        for (size_t i = 0; i < QUERY_COUNT / 10; i++) sink += heap.peekN(100).size();
+    }, QUERY_REPEATS);
+    bench.run("heap.expiringBefore.limit100", scale, QUERY_COUNT / 10, [&] {
+        for (size_t i = 0; i < QUERY_COUNT / 10; i++) sink += heap.expiringBefore("2027-06-30", 100).size();
+    }, QUERY_REPEATS);
+    bench.run("heap.getSortedItems", scale, 1, [&] { sink += heap.getSortedItems().size(); }, QUERY_REPEATS);
+    bench.run("heap.update", scale, items.size(), [&] {
+        for (const auto& item : items) heap.update(item.id, item.quantity + 1, "2029-01-01");
+    });
+    bench.run("heap.extractMin", scale, items.size(), [&] {
+        while (!heap.isEmpty()) sink += heap.extractMin().id;
+    });
+}
+
+} // namespace
+
+int main(int argc, char** argv) {
+    std::vector<size_t> scales;
+    unsigned seed = 42;
+    for (int i = 1; i < argc; i++) {
+        std::string arg = argv[i];
+        if (arg == "--seed" && i + 1 < argc) {
+            seed = static_cast<unsigned>(std::stoul(argv[++i]));
+        } else {
+            scales.push_back(std::stoul(arg));
+        }
+    }
+    if (scales.empty()) {
+        scales = {1000, 100000, 1000000};
+    }
+
+    Bench bench;
+    for (size_t scale : scales) {
+        std::vector<std::string> names = drugNames(scale, seed);
+        benchTrie(bench, scale, names, seed);
+        benchHeap(bench, scale, inventory(names, seed));
+    }
+
+    std::ostringstream out;
+    out << "{\n  \"suite\": \"native\",\n  \"seed\": " << seed << ",\n  \"results\": [\n";
+    for (size_t i = 0; i < bench.results.size(); i++) {
+        const Result& r = bench.results[i];
+        out << "    {\"name\": \"" << r.name << "\", \"scale\": " << r.scale << ", \"ops\": " << r.ops
+            << ", \"seconds\": " << r.seconds << ", \"ns_per_op\": " << r.seconds * 1e9 / r.ops << "}"
+            << (i + 1 < bench.results.size() ? ",\n" : "\n");
+    }
+    out << "  ],\n  \"checksum\": " << sink << "\n}\n";
+    std::cout << out.str();
+    return 0;
+}
@@ -5,8 +5,13 @@
 #include <string>
 #include <algorithm>
 #include <functional>
-#include <ctime>
+#include <cstdio>
 #include <stdexcept>
+#include <unordered_map>
+#include <queue>
+#include <limits>
+#include <mutex>
+#include <shared_mutex>
 
 /**
  * @brief A medicine item with expiry information.
@@ -17,85 +22,332 @@ struct MedicineItem {
     std::string brand;      ///< Brand name
     int quantity;           ///< Available quantity
     std::string expiryDate; ///< Expiry date in format YYYY-MM-DD
+    int expiryDay = 0;      ///< Expiry date as days since 1970-01-01, set by MinHeap on insert
     
-    // Convert expiry date string to time_t for comparison
-    time_t getExpiryTime() const {
-        struct tm tm = {0};
-        // Parse YYYY-MM-DD format
-        sscanf(expiryDate.c_str(), "%d-%d-%d", &tm.tm_year, &tm.tm_mon, &tm.tm_mday);
-        tm.tm_year -= 1900;  // Years since 1900
-        tm.tm_mon -= 1;      // Months are 0-based
-        return mktime(&tm);
+    /**
+     * @brief Convert a YYYY-MM-DD date to days since 1970-01-01.
+     *
+     * Pure calendar arithmetic, so it never touches timezone state.
+     * @param date Date string in format YYYY-MM-DD.
+     * @return Day number (negative before 1970).
+     */
+    static int parseExpiryDay(const std::string& date) {
+        int year, month, day;
+        char trailing;
+        if (sscanf(date.c_str(), "%d-%d-%d%c", &year, &month, &day, &trailing) != 3 ||
+            month < 1 || month > 12 || day < 1 || day > 31) {
+            throw std::invalid_argument("Invalid expiry date '" + date + "'. Use YYYY-MM-DD");
+        }
+        // Days-from-civil: count from a March-based year so leap days fall at the end
+        year -= month <= 2;
+        int era = (year >= 0 ? year : year - 399) / 400;
+        int yearOfEra = year - era * 400;
+        int dayOfYear = (153 * (month + (month > 2 ? -3 : 9)) + 2) / 5 + day - 1;
+        int dayOfEra = yearOfEra * 365 + yearOfEra / 4 - yearOfEra / 100 + dayOfYear;
+        return era * 146097 + dayOfEra - 719468;
     }
 };
 
 /**
- * @brief MinHeap implementation for medicine items ordered by expiry date.
+ * @brief A page of medicine items encoded as a JSON array.
+ *
+ * Each item is an object with the keys brand, expiryDate, id, name and
+ * quantity, in that order, so Python can send it without building dicts.
+ */
+struct JsonPage {
+    std::string json;   ///< JSON array of the items on the page
+    size_t count = 0;   ///< Number of items on the page
+    bool more = false;  ///< True if further items follow this page
+};
+
+/**
+ * @brief Indexed MinHeap for medicine items ordered by expiry date.
+ *
+ * Each item's expiry date is parsed once on insert, and the heap keeps an
+ * id -> position index so items can be updated or removed in O(log n).
+ * Thread-safe: queries share a reader-writer lock, and changes take it
+ * exclusively.
  */
 class MinHeap {
 private:
     std::vector<MedicineItem> heap;
+    std::unordered_map<int, size_t> positions;  ///< Item id -> index in heap
+    
+    /// Shared by readers, exclusive for writers. Every public method takes it,
+    /// so private helpers must not call public ones.
+    mutable std::shared_mutex mutex;
+    
+    // Expiry order, with the id as a tie-breaker so results are deterministic
+    static bool earlier(const MedicineItem& a, const MedicineItem& b) {
+        if (a.expiryDay != b.expiryDay) {
+            return a.expiryDay < b.expiryDay;
+        }
+        return a.id < b.id;
+    }
+    
+    // Swap two slots and keep the position index in step
+    void swapNodes(size_t a, size_t b) {
+        std::swap(heap[a], heap[b]);
+        positions[heap[a].id] = a;
+        positions[heap[b].id] = b;
+    }
     
     // Helper method to maintain heap property after insertion
-    void heapifyUp(int index) {
-        int parent = (index - 1) / 2;
-        
-        // If current node is smaller than its parent, swap and continue upward
-        if (index > 0 && heap[index].getExpiryTime() < heap[parent].getExpiryTime()) {
-            std::swap(heap[index], heap[parent]);
-            heapifyUp(parent);
+    void heapifyUp(size_t index) {
+        // While current node is smaller than its parent, swap and continue upward
+        while (index > 0) {
+            size_t parent = (index - 1) / 2;
+            if (!earlier(heap[index], heap[parent])) {
+                break;
+            }
+            swapNodes(index, parent);
+            index = parent;
         }
     }
     
     // Helper method to maintain heap property after removal
-    void heapifyDown(int index) {
-        int smallest = index;
-        int left = 2 * index + 1;
-        int right = 2 * index + 2;
-        
-        // Find smallest among current, left and right children
-        if (left < heap.size() && heap[left].getExpiryTime() < heap[smallest].getExpiryTime()) {
-            smallest = left;
+    void heapifyDown(size_t index) {
+        while (true) {
+            size_t smallest = index;
+            size_t left = 2 * index + 1;
+            size_t right = 2 * index + 2;
+            
+            // Find smallest among current, left and right children
+            if (left < heap.size() && earlier(heap[left], heap[smallest])) {
+                smallest = left;
+            }
+            
+            if (right < heap.size() && earlier(heap[right], heap[smallest])) {
+                smallest = right;
+            }
+            
+            // If smallest is the current node, the heap property holds
+            if (smallest == index) {
+                break;
+            }
+            swapNodes(index, smallest);
+            index = smallest;
+        }
+    }
+    
+    // Restore heap order around a slot whose key changed in either direction
+    void reposition(size_t index) {
+        if (index > 0 && earlier(heap[index], heap[(index - 1) / 2])) {
+            heapifyUp(index);
+        } else {
+            heapifyDown(index);
+        }
+    }
+    
+    // Walk the heap in expiry order without modifying it, touching only the items
+    // visited (plus their children): a frontier of slots ordered like the heap.
+    // Calls visit(item) for up to `limit` items after skipping `offset`.
+    template <typename Visit>
+    void walk(int lastDay, size_t limit, size_t offset, Visit visit) const {
+        if (heap.empty() || limit == 0) {
+            return;
         }
         
-        if (right < heap.size() && heap[right].getExpiryTime() < heap[smallest].getExpiryTime()) {
-            smallest = right;
+        auto later = [this](size_t a, size_t b) { return earlier(heap[b], heap[a]); };
+        std::priority_queue<size_t, std::vector<size_t>, decltype(later)> frontier(later);
+        frontier.push(0);
+        
+        size_t visited = 0;
+        while (!frontier.empty() && visited < limit) {
+            size_t index = frontier.top();
+            frontier.pop();
+            
+            // Everything still in the frontier expires no earlier than this item
+            if (heap[index].expiryDay > lastDay) {
+                break;
+            }
+            if (offset > 0) {
+                offset--;
+            } else {
+                visit(heap[index]);
+                visited++;
+            }
+            
+            size_t left = 2 * index + 1;
+            if (left < heap.size()) frontier.push(left);
+            if (left + 1 < heap.size()) frontier.push(left + 1);
+        }
+    }
+    
+    // Copies of the items a walk visits
+    std::vector<MedicineItem> collect(int lastDay, size_t limit, size_t offset) const {
+        std::vector<MedicineItem> results;
+        walk(lastDay, limit, offset, [&results](const MedicineItem& item) { results.push_back(item); });
+        return results;
+    }
+    
+    // Append a string as a JSON string literal; UTF-8 passes through unchanged
+    static void appendJsonString(std::string& out, const std::string& value) {
+        static const char hex[] = "0123456789abcdef";
+        out += '"';
+        for (char ch : value) {
+            unsigned char c = static_cast<unsigned char>(ch);
+            switch (c) {
+                case '"': out += "\\\""; break;
+                case '\\': out += "\\\\"; break;
+                case '\n': out += "\\n"; break;
+                case '\r': out += "\\r"; break;
+                case '\t': out += "\\t"; break;
+                default:
+                    if (c < 0x20) {
+                        out += "\\u00";
+                        out += hex[c >> 4];
+                        out += hex[c & 0xf];
+                    } else {
+                        out += ch;
+                    }
+            }
+        }
+        out += '"';
+    }
+    
+    // Encode up to `limit` walked items as a JSON array, looking one item ahead for `more`
+    JsonPage encodePage(int lastDay, size_t limit, size_t offset) const {
+        JsonPage page;
+        page.json = "[";
+        size_t lookahead = limit < std::numeric_limits<size_t>::max() ? limit + 1 : limit;
+        walk(lastDay, lookahead, offset, [&page, limit](const MedicineItem& item) {
+            if (page.count == limit) {
+                page.more = true;
+                return;
+            }
+            if (page.count++ > 0) page.json += ',';
+            page.json += "{\"brand\":";
+            appendJsonString(page.json, item.brand);
+            page.json += ",\"expiryDate\":";
+            appendJsonString(page.json, item.expiryDate);
+            page.json += ",\"id\":";
+            page.json += std::to_string(item.id);
+            page.json += ",\"name\":";
+            appendJsonString(page.json, item.name);
+            page.json += ",\"quantity\":";
+            page.json += std::to_string(item.quantity);
+            page.json += '}';
+        });
+        page.json += ']';
+        return page;
+    }
+    
+    // Remove the item at the given slot
+    void removeAt(size_t index) {
+        positions.erase(heap[index].id);
+        size_t last = heap.size() - 1;
+        if (index != last) {
+            heap[index] = std::move(heap[last]);
+            positions[heap[index].id] = index;
         }
+        heap.pop_back();
         
-        // If smallest is not the current node, swap and continue downward
-        if (smallest != index) {
-            std::swap(heap[index], heap[smallest]);
-            heapifyDown(smallest);
+        if (index < heap.size()) {
+            reposition(index);
         }
     }
     
 public:
     /**
      * @brief Add a medicine item to the heap.
+     *
+     * Inserting an id that is already present replaces that item.
      * @param item The medicine item to add.
+     * @throws std::invalid_argument if the expiry date is not YYYY-MM-DD.
      */
     void insert(const MedicineItem& item) {
-        heap.push_back(item);
+        MedicineItem stored = item;
+        stored.expiryDay = MedicineItem::parseExpiryDay(item.expiryDate);
+        
+        std::unique_lock<std::shared_mutex> lock(mutex);
+        auto existing = positions.find(item.id);
+        if (existing != positions.end()) {
+            size_t index = existing->second;
+            heap[index] = std::move(stored);
+            reposition(index);
+            return;
+        }
+        
+        heap.push_back(std::move(stored));
+        positions[item.id] = heap.size() - 1;
         heapifyUp(heap.size() - 1);
     }
     
+    /**
+     * @brief Add a batch of medicine items to the heap.
+     *
+     * New items are appended and the heap is then either rebuilt bottom-up in
+     * O(n) or sifted item by item, whichever is cheaper for the batch size.
+     * Items whose id is already present replace the stored item, as with insert().
+     * @param items The medicine items to add.
+     * @throws std::invalid_argument if any expiry date is not YYYY-MM-DD; no
+     *         item is added in that case.
+     */
+    void insertMany(const std::vector<MedicineItem>& items) {
+        // Parse every date first so a bad row leaves the heap untouched
+        std::vector<int> expiryDays;
+        expiryDays.reserve(items.size());
+        for (const auto& item : items) {
+            expiryDays.push_back(MedicineItem::parseExpiryDay(item.expiryDate));
+        }
+        
+        std::unique_lock<std::shared_mutex> lock(mutex);
+        // Replace items that are already in the heap while it is still a valid heap
+        size_t firstNew = heap.size();
+        for (size_t i = 0; i < items.size(); i++) {
+            auto existing = positions.find(items[i].id);
+            if (existing != positions.end()) {
+                size_t index = existing->second;
+                heap[index] = items[i];
+                heap[index].expiryDay = expiryDays[i];
+                reposition(index);
+            }
+        }
+        
+        // Append the rest; a later duplicate within the batch overwrites an earlier one
+        heap.reserve(heap.size() + items.size());
+        for (size_t i = 0; i < items.size(); i++) {
+            auto existing = positions.find(items[i].id);
+            if (existing != positions.end()) {
+                if (existing->second >= firstNew) {
+                    heap[existing->second] = items[i];
+                    heap[existing->second].expiryDay = expiryDays[i];
+                }
+                continue;
+            }
+            positions[items[i].id] = heap.size();
+            heap.push_back(items[i]);
+            heap.back().expiryDay = expiryDays[i];
+        }
+        
+        // Sifting k new items costs about k log n; a full rebuild costs about n
+        size_t added = heap.size() - firstNew;
+        size_t depth = 1;
+        while ((size_t(1) << depth) < heap.size()) depth++;
+        if (added * depth > heap.size()) {
+            for (size_t i = heap.size() / 2; i-- > 0;) {
+                heapifyDown(i);
+            }
+        } else {
+            for (size_t i = firstNew; i < heap.size(); i++) {
+                heapifyUp(i);
+            }
+        }
+    }
+    
     /**
      * @brief Extract the medicine with the earliest expiry date.
      * @return The medicine item with the earliest expiry date.
      */
     MedicineItem extractMin() {
+        std::unique_lock<std::shared_mutex> lock(mutex);
         if (heap.empty()) {
             throw std::runtime_error("Heap is empty");
         }
         
         MedicineItem minItem = heap[0];
-        heap[0] = heap.back();
-        heap.pop_back();
-        
-        if (!heap.empty()) {
-            heapifyDown(0);
-        }
-        
+        removeAt(0);
         return minItem;
     }
     
@@ -104,24 +356,154 @@ public:
      * @return The medicine item with the earliest expiry date.
      */
     MedicineItem peek() const {
+        std::shared_lock<std::shared_mutex> lock(mutex);
         if (heap.empty()) {
             throw std::runtime_error("Heap is empty");
         }
         return heap[0];
     }
     
+    /**
+     * @brief Change the quantity and expiry date of an item in O(log n).
+     * @param id The item's id.
+     * @param quantity New quantity.
+     * @param expiryDate New expiry date in format YYYY-MM-DD.
+     * @return False if no item has this id.
+     * @throws std::invalid_argument if the expiry date is not YYYY-MM-DD.
+     */
+    bool update(int id, int quantity, const std::string& expiryDate) {
+        std::unique_lock<std::shared_mutex> lock(mutex);
+        auto found = positions.find(id);
+        if (found == positions.end()) {
+            return false;
+        }
+        int expiryDay = MedicineItem::parseExpiryDay(expiryDate);
+        
+        size_t index = found->second;
+        heap[index].quantity = quantity;
+        heap[index].expiryDate = expiryDate;
+        heap[index].expiryDay = expiryDay;
+        reposition(index);
+        return true;
+    }
+    
+    /**
+     * @brief Move an item's expiry date earlier in O(log n).
+     * @param id The item's id.
+     * @param expiryDate New expiry date, no later than the current one.
+     * @return False if no item has this id.
+     * @throws std::invalid_argument if the date is malformed or later than the current one.
+     */
+    bool decreaseKey(int id, const std::string& expiryDate) {
+        std::unique_lock<std::shared_mutex> lock(mutex);
+        auto found = positions.find(id);
+        if (found == positions.end()) {
+            return false;
+        }
+        int expiryDay = MedicineItem::parseExpiryDay(expiryDate);
+        
+        size_t index = found->second;
+        if (expiryDay > heap[index].expiryDay) {
+            throw std::invalid_argument("decreaseKey cannot move an expiry date later");
+        }
+        heap[index].expiryDate = expiryDate;
+        heap[index].expiryDay = expiryDay;
+        heapifyUp(index);
+        return true;
+    }
+    
+    /**
+     * @brief Remove an item by id in O(log n).
+     * @param id The item's id.
+     * @return False if no item has this id.
+     */
+    bool remove(int id) {
+        std::unique_lock<std::shared_mutex> lock(mutex);
+        auto found = positions.find(id);
+        if (found == positions.end()) {
+            return false;
+        }
+        removeAt(found->second);
+        return true;
+    }
+    
+    /**
+     * @brief Check whether an item with the given id is in the heap.
+     * @param id The item's id.
+     * @return True if present, false otherwise.
+     */
+    bool contains(int id) const {
+        std::shared_lock<std::shared_mutex> lock(mutex);
+        return positions.count(id) > 0;
+    }
+    
+    /**
+     * @brief Get the n earliest-expiring medicines without removing them.
+     *
+     * Costs O(n log n) regardless of heap size.
+     * @param n Number of items to return.
+     * @param offset Number of earliest items to skip first.
+     * @return Up to n medicine items sorted by expiry date.
+     */
+    std::vector<MedicineItem> peekN(size_t n, size_t offset = 0) const {
+        std::shared_lock<std::shared_mutex> lock(mutex);
+        return collect(std::numeric_limits<int>::max(), n, offset);
+    }
+    
+    /**
+     * @brief peekN() encoded as JSON, without copying the items.
+     * @param n Number of items to encode.
+     * @param offset Number of earliest items to skip first.
+     * @return Up to n items as a JSON array, and whether more items follow.
+     */
+    JsonPage peekNJson(size_t n, size_t offset = 0) const {
+        std::shared_lock<std::shared_mutex> lock(mutex);
+        return encodePage(std::numeric_limits<int>::max(), n, offset);
+    }
+    
+    /**
+     * @brief Get medicines expiring on or before a date, earliest first.
+     *
+     * Costs O((offset + limit) log(offset + limit)) regardless of heap size.
+     * @param date Last expiry date to include, in format YYYY-MM-DD.
+     * @param limit Maximum number of items to return.
+     * @param offset Number of earliest matching items to skip first.
+     * @return Matching medicine items sorted by expiry date.
+     * @throws std::invalid_argument if the date is not YYYY-MM-DD.
+     */
+    std::vector<MedicineItem> expiringBefore(const std::string& date, size_t limit, size_t offset = 0) const {
+        int lastDay = MedicineItem::parseExpiryDay(date);
+        std::shared_lock<std::shared_mutex> lock(mutex);
+        return collect(lastDay, limit, offset);
+    }
+    
+    /**
+     * @brief expiringBefore() encoded as JSON, without copying the items.
+     * @param date Last expiry date to include, in format YYYY-MM-DD.
+     * @param limit Maximum number of items to encode.
+     * @param offset Number of earliest matching items to skip first.
+     * @return Up to limit items as a JSON array, and whether more matching items follow.
+     * @throws std::invalid_argument if the date is not YYYY-MM-DD.
+     */
+    JsonPage expiringBeforeJson(const std::string& date, size_t limit, size_t offset = 0) const {
+        int lastDay = MedicineItem::parseExpiryDay(date);
+        std::shared_lock<std::shared_mutex> lock(mutex);
+        return encodePage(lastDay, limit, offset);
+    }
+    
     /**
      * @brief Get all medicines in the heap, sorted by expiry date (earliest first).
      * @return Vector of medicine items sorted by expiry date.
      */
     std::vector<MedicineItem> getSortedItems() const {
-        std::vector<MedicineItem> sortedItems = heap;
+        std::vector<MedicineItem> sortedItems;
+        {
+            std::shared_lock<std::shared_mutex> lock(mutex);
+            sortedItems = heap;
+        }
         
-        // Sort by expiry date
-        std::sort(sortedItems.begin(), sortedItems.end(), 
-            [](const MedicineItem& a, const MedicineItem& b) {
-                return a.getExpiryTime() < b.getExpiryTime();
-            });
+        // Sort the copy by the precomputed expiry day, outside the lock
+        std::sort(sortedItems.begin(), sortedItems.end(), earlier);
             
         return sortedItems;
     }
@@ -131,6 +513,7 @@ public:
      * @return True if empty, false otherwise.
      */
     bool isEmpty() const {
+        std::shared_lock<std::shared_mutex> lock(mutex);
         return heap.empty();
     }
     
@@ -139,6 +522,7 @@ public:
      * @return Size of the heap.
      */
     size_t size() const {
+        std::shared_lock<std::shared_mutex> lock(mutex);
         return heap.size();
     }
     
@@ -146,8 +530,10 @@ public:
      * @brief Clear all items from the heap.
      */
     void clear() {
+        std::unique_lock<std::shared_mutex> lock(mutex);
         heap.clear();
+        positions.clear();
     }
 };
 
-#endif // MINHEAP_H 
\ No newline at end of file
+#endif // MINHEAP_H
@@ -1,48 +1,177 @@
 #ifndef TRIE_H
 #define TRIE_H
 
+#include <cstdint>
+#include <shared_mutex>
 #include <string>
 #include <vector>
-#include <map>
 
 /**
- * @brief Node structure for Trie (prefix tree).
+ * @brief Node of the radix tree, stored by value in the Trie's node arena.
+ *
+ * Each node owns the compressed edge leading into it as a slice of the
+ * Trie's shared label pool. Children form a singly linked sibling list
+ * (sorted by first label character) through arena indices, so no node
+ * needs its own heap allocation.
  */
 class TrieNode {
 public:
-    /// Indicates whether this node marks the end of a word.
-    bool isEndOfWord;
-    /// Children nodes stored in sorted order by character.
-    std::map<char, TrieNode*> children;
+    uint32_t labelOffset;  ///< Start of the incoming edge label in the label pool.
+    uint32_t labelLength;  ///< Length of the incoming edge label.
+    uint32_t firstChild;   ///< Arena index of the first child (0 = none).
+    uint32_t nextSibling;  ///< Arena index of the next sibling (0 = none).
+    int32_t weight;        ///< Ranking weight of the word ending here (e.g. popularity or stock count).
+    int32_t maxWeight;     ///< Highest word weight anywhere in this subtree, used to prune top-k search.
+    uint32_t wordCount;    ///< Number of words in this subtree, used to skip whole branches on offset.
+    char firstChar;        ///< First label character, kept inline for sibling scans.
+    bool isEndOfWord;      ///< Indicates whether this node marks the end of a word.
 
     TrieNode();
 };
 
+/// How a TrieQuery is matched.
+enum class SearchMode {
+    Auto,     ///< Exact word if present, else a prefix page, else fuzzy for longer queries.
+    Exact,    ///< The word itself, if present.
+    Prefix,   ///< A page of words starting with the text, in sorted order.
+    Popular,  ///< The highest-weighted words starting with the text.
+    Fuzzy     ///< Words within maxDistance edits of the text.
+};
+
+/**
+ * @brief One lookup in a Trie::searchMany batch.
+ */
+struct TrieQuery {
+    std::string text;            ///< Word, prefix or misspelled query.
+    SearchMode mode = SearchMode::Auto;
+    size_t limit = 0;            ///< Maximum number of words (0 = no limit).
+    size_t offset = 0;           ///< Words to skip, for Prefix pages.
+    size_t maxDistance = 1;      ///< Edit distance bound for Fuzzy (and the Auto fallback).
+};
+
+/**
+ * @brief Result of one TrieQuery.
+ */
+struct TrieQueryResult {
+    std::vector<std::string> words;        ///< Matching words.
+    SearchMode type = SearchMode::Prefix;  ///< How the words were found (never Auto).
+    bool more = false;                     ///< True if a Prefix page has more words after it.
+};
+
 /**
- * @brief Trie (prefix tree) for efficient string insertion and prefix search.
+ * @brief Trie (compressed radix tree) for efficient string insertion and prefix search.
+ *
+ * Thread-safe: lookups share a reader-writer lock, and inserts and load()
+ * take it exclusively.
  */
 class Trie {
 private:
-    TrieNode* root;  ///< Root node of the Trie.
+    /// Arena index used for "no node"; the root lives at index 0 and is never a child.
+    static const uint32_t NO_NODE = 0;
+
+    std::vector<TrieNode> nodes;  ///< Owned node arena; nodes[0] is the root.
+    std::vector<char> labels;     ///< Owned pool holding every edge label.
+
+    /// Read view of the arena and label pool: either the owned vectors above
+    /// or a read-only memory-mapped snapshot loaded with load().
+    const TrieNode* nodeData;
+    const char* labelData;
+
+    void* mappedData;    ///< Start of the mapped snapshot file (nullptr if not mapped).
+    size_t mappedSize;   ///< Length of the mapped snapshot file.
+
+    /// Lets any number of readers run together, or one writer alone. Every
+    /// public method takes it, so private helpers must not call public ones.
+    mutable std::shared_mutex mutex;
 
-    /// Recursively deletes all nodes in the given subtree.
-    void deleteSubtree(TrieNode* node);
+    /// Points the read view back at the owned vectors after they change.
+    void syncView();
 
-    /// Recursively collects all words under the given node.
-    void dfs(TrieNode* node, const std::string& prefix, std::vector<std::string>& results) const;
+    /// Copies a mapped snapshot into owned storage so it can be modified.
+    void detach();
+
+    /// Releases the mapped snapshot, if any.
+    void unmap();
+
+    /// Walks or extends the tree along an already-lowercased word and returns its
+    /// node. If `path` is given, every node visited is appended to it.
+    uint32_t insertNode(const std::string& lowerWord, std::vector<uint32_t>* path);
+
+    /// Recomputes word counts and weight bounds for every node in one pass.
+    void rebuildAggregates();
+
+    /// A word found by fuzzySearch, with the data used to rank it.
+    struct FuzzyMatch {
+        uint32_t distance;
+        int32_t weight;
+        std::string word;
+    };
+
+    /// Recursively walks the children of `node`, extending one edit-distance row
+    /// per label character in `rows` and pruning once every entry exceeds the bound.
+    void fuzzyDfs(uint32_t node, std::string& prefix, const std::string& query,
+                  uint32_t maxDistance, std::vector<uint32_t>& rows,
+                  std::vector<FuzzyMatch>& matches) const;
+
+    /// Finds the child of `node` whose edge starts with `c`, or NO_NODE.
+    uint32_t findChild(uint32_t node, char c) const;
+
+    /// Creates a leaf under `parent` labelled with `suffix`, keeping siblings sorted.
+    uint32_t addChild(uint32_t parent, const char* suffix, size_t length);
+
+    /// Splits the edge into `node` after `at` characters, moving its contents to a new child.
+    void splitEdge(uint32_t node, uint32_t at);
+
+    /// Finds the node whose subtree holds every word starting with an already-lowercased
+    /// prefix, or NO_NODE. `path` receives the full string spelled out to that node.
+    uint32_t findPrefixNode(const std::string& lowerPrefix, std::string& path) const;
+
+    /// Lookups on already-lowercased text, shared by the public methods and
+    /// searchMany. Callers must hold the lock.
+    /// containsWord appends the nodes from the root to the word to `path`, if given.
+    bool containsWord(const std::string& lowerWord, std::vector<uint32_t>* path = nullptr) const;
+    std::vector<std::string> collectPrefix(const std::string& lowerPrefix, size_t limit, size_t offset) const;
+    std::vector<std::string> collectTopK(const std::string& lowerPrefix, size_t k) const;
+    std::vector<std::string> collectFuzzy(const std::string& lowerQuery, size_t maxDistance, size_t limit) const;
+
+    /// Recursively collects words under the given node, skipping the first
+    /// `offset` matches and stopping once `limit` words are collected (0 = no limit).
+    void dfs(uint32_t node, std::string& prefix, std::vector<std::string>& results,
+             size_t limit, size_t& offset) const;
 
 public:
     /// Constructor: initializes the root node.
     Trie();
 
-    /// Destructor: frees all allocated nodes.
+    /// Destructor: releases any mapped snapshot.
     ~Trie();
 
+    Trie(const Trie&) = delete;
+    Trie& operator=(const Trie&) = delete;
+
     /**
      * @brief Insert a word into the Trie (stored in lowercase).
      * @param word The string to insert.
+     * @param weight Ranking weight used by topK; re-inserting a word replaces it.
+     */
+    void insert(const std::string& word, int weight = 0);
+
+    /**
+     * @brief Insert many words at once (stored in lowercase).
+     *
+     * Words are sorted before insertion and subtree counts and weight bounds
+     * are rebuilt once at the end, instead of after every word.
+     * @param words The strings to insert.
+     * @param weights Ranking weight per word; empty means weight 0 for all.
      */
-    void insert(const std::string& word);
+    void insertMany(const std::vector<std::string>& words, const std::vector<int>& weights = {});
+
+    /**
+     * @brief Remove a word from the Trie, so lookups and rankings no longer return it.
+     * @param word The word to remove (case-insensitive).
+     * @return True if the word was present, false otherwise.
+     */
+    bool remove(const std::string& word);
 
     /**
      * @brief Search for an exact word in the Trie.
@@ -52,11 +181,86 @@ public:
     bool search(const std::string& word) const;
 
     /**
-     * @brief Find all words in the Trie that start with the given prefix.
+     * @brief Find words in the Trie that start with the given prefix, in sorted order.
      * @param prefix The prefix string to search for.
+     * @param limit Maximum number of words to return (0 = no limit).
+     * @param offset Number of matching words to skip before collecting.
      * @return Vector of matching words (empty if none found).
      */
-    std::vector<std::string> startsWith(const std::string& prefix) const;
+    std::vector<std::string> startsWith(const std::string& prefix, size_t limit = 0,
+                                        size_t offset = 0) const;
+
+    /**
+     * @brief Find the k highest-weighted words that start with the given prefix.
+     *
+     * Best-first search over subtree weight bounds, so only the branches that
+     * can still contribute to the result are expanded. Ties are broken
+     * alphabetically.
+     * @param prefix The prefix string to search for.
+     * @param k Maximum number of words to return.
+     * @return Vector of matching words, highest weight first.
+     */
+    std::vector<std::string> topK(const std::string& prefix, size_t k) const;
+
+    /**
+     * @brief Find words within a bounded edit distance of the query.
+     *
+     * Walks the tree once, keeping an incremental edit-distance row per
+     * character of the current path and skipping any subtree whose row is
+     * already past `maxDistance`. Insertions, deletions, substitutions and
+     * swaps of adjacent characters each cost 1.
+     * @param query The (possibly misspelled) word to match.
+     * @param maxDistance Largest edit distance to accept.
+     * @param limit Maximum number of words to return (0 = no limit).
+     * @return Matching words, closest first, then by weight, then alphabetically.
+     */
+    std::vector<std::string> fuzzySearch(const std::string& query, size_t maxDistance,
+                                         size_t limit = 0) const;
+
+    /**
+     * @brief Run many lookups in one call, under a single acquisition of the lock.
+     *
+     * Lets a caller resolve a whole prescription at once instead of paying the
+     * per-call overhead for every drug. Auto mode behaves like /search.
+     * @param queries The lookups to run.
+     * @return One result per query, in the same order.
+     */
+    std::vector<TrieQueryResult> searchMany(const std::vector<TrieQuery>& queries) const;
+
+    /**
+     * @brief Get the number of distinct words stored in the Trie.
+     * @return Word count.
+     */
+    size_t size() const;
+
+    /**
+     * @brief Get the approximate heap memory held by the node arena and label pool.
+     * @return Size in bytes.
+     */
+    size_t memoryUsage() const;
+
+    /**
+     * @brief Write the Trie to a flat binary snapshot file.
+     *
+     * The file holds a small header followed by the raw node arena and label
+     * pool in native byte order, so it can be mapped back without parsing.
+     * It is written to a temporary file that is then renamed over `path`, so
+     * tries that have the old snapshot loaded keep reading it unchanged.
+     * @param path Destination file path.
+     */
+    void save(const std::string& path) const;
+
+    /**
+     * @brief Replace the Trie's contents with a snapshot written by save().
+     *
+     * The file is memory-mapped read-only, so processes loading the same
+     * snapshot share one copy in the page cache. The first insert after a
+     * load copies the data into private memory. Every node's child, sibling
+     * and label ranges are checked against the file before it is used.
+     * @param path Snapshot file path.
+     * @throws std::runtime_error if the file is missing, truncated or corrupt.
+     */
+    void load(const std::string& path);
 };
 
-#endif // TRIE_H 
\ No newline at end of file
+#endif // TRIE_H
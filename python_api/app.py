@@ -1,10 +1,22 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import medilocate
+from inventory_store import InventoryStore
+from response_cache import ResponseCache
+from json_provider import FastJSONProvider, RawJSON, dumps_bytes
+from change_feed import ChangeFeed
+try:
+    # The same module the blueprint and query_stats use, so they all share one REGISTRY
+    from python_api.metrics import REGISTRY, TimedProxy, install_metrics
+except ImportError:
+    # Started from python_api/ without the project root on the path
+    from metrics import REGISTRY, TimedProxy, install_metrics
+import codecs
 import csv
-import io
 import os
 import sys
+import threading
+import time
 from datetime import datetime
 import json
 
@@ -18,17 +30,86 @@ except ImportError:
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed; the heap's pages are spliced in pre-encoded
 CORS(app)  # Enable CORS for all routes
+install_metrics(app)  # Request latency histograms and the ?profile=1 hook
 
-# Create and initialize the Trie with medicine names
-medicine_trie = medilocate.Trie()
+# Create and initialize the Trie with medicine names; every call is timed for /metrics
+medicine_trie = TimedProxy(medilocate.Trie(), 'trie')
 
 # Create a MinHeap for expiry tracking if available
-expiry_tracker = expiry_heap.MinHeap() if has_expiry_tracking else None
+expiry_tracker = TimedProxy(expiry_heap.MinHeap(), 'heap') if has_expiry_tracking else None
+
+# Cached GET responses; every write route bumps the cache generation
+response_cache = ResponseCache()
 
 # Define the low stock threshold
 LOW_STOCK_THRESHOLD = 30
 
+# /dashboard expiry windows (days ahead) and number of lowest-stock items listed
+DASHBOARD_EXPIRY_DAYS = (7, 30, 90)
+DASHBOARD_LOWEST_STOCK = 10
+
+# Default and maximum number of names returned by a single /search call
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+# Largest edit distance a fuzzy /search may ask for; cost grows quickly beyond this
+MAX_FUZZY_DISTANCE = 3
+
+# Most lookups in one /search/batch request (a prescription lists 5-20 drugs)
+MAX_BATCH_QUERIES = 50
+
+# /search/batch modes, and the search_type reported for each kind of native result
+BATCH_SEARCH_MODES = {
+    'auto': medilocate.SearchMode.Auto,
+    'exact': medilocate.SearchMode.Exact,
+    'prefix': medilocate.SearchMode.Prefix,
+    'popular': medilocate.SearchMode.Popular,
+    'fuzzy': medilocate.SearchMode.Fuzzy
+}
+SEARCH_TYPES = {
+    medilocate.SearchMode.Exact: 'exact',
+    medilocate.SearchMode.Prefix: 'prefix',
+    medilocate.SearchMode.Popular: 'prefix',
+    medilocate.SearchMode.Fuzzy: 'fuzzy'
+}
+
+# Rows added to the indexes per batch during /upload_medicines, and errors echoed back
+UPLOAD_CHUNK_SIZE = 1000
+MAX_UPLOAD_ERRORS = 20
+
+# Default and maximum number of items returned by a single /expiring_medicines call
+DEFAULT_EXPIRING_LIMIT = 100
+MAX_EXPIRING_LIMIT = 1000
+
+# Default and maximum page size of /medicines and /search_medicine; format=jsonl
+# streams every item, STREAM_BATCH_SIZE items at a time
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000
+STREAM_BATCH_SIZE = 1000
+
+# Optional prebuilt Trie snapshot (written with Trie.save). It is memory-mapped
+# read-only, so every worker process shares one page-cached copy of the index.
+TRIE_SNAPSHOT_PATH = os.getenv('MEDILOCATE_TRIE_SNAPSHOT')
+
+# Optional change log (an SQLite file) shared by every worker process. When set,
+# writes are published there and each worker applies them all to its own indexes.
+CHANGE_LOG_PATH = os.getenv('MEDILOCATE_CHANGE_LOG')
+
+# Optional SQLAlchemy URI of the database holding the real catalogue (the medicines
+# table of models.py). When set, the indexes are loaded from it instead of the
+# examples, then refreshed with the rows changed every CATALOG_REFRESH_SECONDS.
+CATALOG_DATABASE_URI = os.getenv('MEDILOCATE_CATALOG_DB')
+CATALOG_REFRESH_SECONDS = float(os.getenv('MEDILOCATE_CATALOG_REFRESH', 30))
+# Rows deleted from the table leave no trace for the refresh to see; every
+# CATALOG_RECONCILE_SECONDS the loaded ids are checked against the table's
+CATALOG_RECONCILE_SECONDS = float(os.getenv('MEDILOCATE_CATALOG_RECONCILE', 600))
+
+# With a catalogue, items added through this app get ids from here up, so they never
+# share an id with a catalogue row; catalogue rows with ids this high are skipped
+CATALOG_LOCAL_ID_START = 1_000_000_000
+
 # Add some example medicine names
 example_medicines = [
     "aspirin", "acetaminophen", "amoxicillin", "atorvastatin", "azithromycin",
@@ -54,35 +135,230 @@ example_medicines = [
     "zolpidem"
 ]
 
-# Track total number of inserted medicines
-inserted_medicines = set()
-
-# Initialize the Trie with example medicines
-for medicine in example_medicines:
-    medicine = medicine.lower()
-    medicine_trie.insert(medicine)
-    inserted_medicines.add(medicine)
-
-# Simple in-memory medicine storage for demo
-medicines = [
-    {"id": 1, "name": "Aspirin", "brand": "Bayer", "quantity": 120, "expiryDate": "2024-12-31"},
-    {"id": 2, "name": "Ibuprofen", "brand": "Advil", "quantity": 85, "expiryDate": "2024-06-30"},
-    {"id": 3, "name": "Paracetamol", "brand": "Tylenol", "quantity": 50, "expiryDate": "2023-11-15"},
-    {"id": 4, "name": "Amoxicillin", "brand": "Amoxil", "quantity": 30, "expiryDate": "2023-12-10"},
-    {"id": 5, "name": "Cetirizine", "brand": "Zyrtec", "quantity": 10, "expiryDate": "2025-01-20"},
-    {"id": 6, "name": "Loratadine", "brand": "Claritin", "quantity": 25, "expiryDate": "2024-08-15"}
-]
+# Initialize the Trie from the snapshot if there is one, else bulk-build it from the examples
+if TRIE_SNAPSHOT_PATH and os.path.exists(TRIE_SNAPSHOT_PATH):
+    medicine_trie.load(TRIE_SNAPSHOT_PATH)
+elif not CATALOG_DATABASE_URI:
+    medicine_trie.insertMany(example_medicines)
+
+# Indexed in-memory medicine storage; demo items unless the catalogue database is used
+inventory = InventoryStore(first_id=CATALOG_LOCAL_ID_START if CATALOG_DATABASE_URI else 1)
+if not CATALOG_DATABASE_URI:
+    for name, brand, quantity, expiry_date in [
+        ("Aspirin", "Bayer", 120, "2024-12-31"),
+        ("Ibuprofen", "Advil", 85, "2024-06-30"),
+        ("Paracetamol", "Tylenol", 50, "2023-11-15"),
+        ("Amoxicillin", "Amoxil", 30, "2023-12-10"),
+        ("Cetirizine", "Zyrtec", 10, "2025-01-20"),
+        ("Loratadine", "Claritin", 25, "2024-08-15")
+    ]:
+        inventory.add(name, brand, quantity, expiry_date)
+
+def to_expiry_item(med):
+    """Build the C++ MedicineItem for an inventory record"""
+    item = expiry_heap.MedicineItem()
+    item.id = med.id
+    item.name = med.name
+    item.brand = med.brand
+    item.quantity = med.quantity
+    item.expiryDate = med.expiryDate
+    return item
+
+def parse_medicine_fields(data):
+    """Validate and normalise the name/brand/quantity/expiryDate of a new item"""
+    expiry_date = data['expiryDate'].strip()
+    datetime.strptime(expiry_date, '%Y-%m-%d')
+    return data['name'].strip(), data['brand'].strip(), int(data['quantity']), expiry_date
 
 # Initialize the MinHeap with example medicines if available
 if has_expiry_tracking:
-    for med in medicines:
-        item = expiry_heap.MedicineItem()
-        item.id = med["id"]
-        item.name = med["name"]
-        item.brand = med["brand"]
-        item.quantity = med["quantity"]
-        item.expiryDate = med["expiryDate"]
-        expiry_tracker.insert(item)
+    for med in inventory:
+        expiry_tracker.insert(to_expiry_item(med))
+
+def apply_add_name(name, weight):
+    """Add a searchable name to the Trie"""
+    medicine_trie.insert(name, weight)
+
+def rank_names(names):
+    """Weight each name in the Trie by the store's total stock for it, dropping names with no items left"""
+    ranked = []
+    for name in names:
+        units = inventory.name_units(name)
+        if units is None:
+            medicine_trie.remove(name)
+        else:
+            ranked.append((name, units))
+    if ranked:
+        medicine_trie.insertMany(ranked)
+
+def apply_add_items(first_id, rows):
+    """Add (name, brand, quantity, expiryDate) rows, with ids from first_id, to the store, MinHeap and Trie"""
+    records = inventory.add_many(rows, first_id)
+    if has_expiry_tracking:
+        expiry_tracker.insertMany([to_expiry_item(record) for record in records])
+    
+    # Names go into the Trie in one bulk call, ranked by stock count
+    rank_names({record.name_lower for record in records})
+
+def apply_update_item(item_id, quantity, expiryDate=None):
+    """Re-key an item in place instead of rebuilding the indexes; expiryDate None keeps the current one"""
+    medicine = inventory.update(item_id, quantity=quantity, expiryDate=expiryDate)
+    if medicine is None:
+        return
+    if has_expiry_tracking and medicine.expiryDate:
+        # An item that had no expiry date is not in the heap yet
+        if not expiry_tracker.update(item_id, medicine.quantity, medicine.expiryDate):
+            expiry_tracker.insert(to_expiry_item(medicine))
+    
+    # Keep the Trie ranking in step with the new stock count
+    rank_names([medicine.name_lower])
+
+def apply_delete_item(item_id):
+    """Drop an item from the store and the MinHeap, and re-rank or drop its name in the Trie"""
+    medicine = inventory.remove(item_id)
+    if medicine is None:
+        return
+    if has_expiry_tracking:
+        expiry_tracker.remove(item_id)
+    rank_names([medicine.name_lower])
+
+def apply_upsert_items(items):
+    """Add or replace (id, name, brand, quantity, expiryDate, pharmacy_id) catalogue items by id; returns how many changed"""
+    clashing = [item[0] for item in items if item[0] >= CATALOG_LOCAL_ID_START]
+    if clashing:
+        print(f"Warning: skipping catalogue rows with ids reserved for local items: {clashing[:10]}",
+              file=sys.stderr)
+        items = [item for item in items if item[0] < CATALOG_LOCAL_ID_START]
+    
+    # A renamed item changes the total of its old name as well as its new one
+    names = {record.name_lower for record in map(inventory.get, (item[0] for item in items))
+             if record is not None}
+    records = inventory.upsert_many(items)
+    if has_expiry_tracking:
+        # insertMany replaces items already in the heap; items without an expiry date leave it
+        expiry_tracker.insertMany([to_expiry_item(record) for record in records if record.expiryDate])
+        for record in records:
+            if not record.expiryDate:
+                expiry_tracker.remove(record.id)
+    rank_names(names.union(record.name_lower for record in records))
+    return len(records)
+
+# Every write is one of these changes, applied the same way locally and from the change log
+CHANGE_APPLIERS = {
+    'add_name': apply_add_name,
+    'add_items': apply_add_items,
+    'update_item': apply_update_item,
+    'delete_item': apply_delete_item
+}
+
+def apply_change(kind, payload):
+    CHANGE_APPLIERS[kind](**payload)
+    response_cache.bump()
+
+# Serializes every write to the indexes within this process (local writes, change-log replay
+# and catalogue refreshes), so locally allocated ids stay consecutive
+write_lock = threading.Lock()
+
+change_feed = ChangeFeed(CHANGE_LOG_PATH) if CHANGE_LOG_PATH else None
+
+def sync_changes():
+    """Apply changes other workers have published since the last call (a no-op without a change log)"""
+    if change_feed is not None:
+        # The catalogue refresher writes the indexes too; take write_lock before the
+        # feed's own lock, in the same order as record_change
+        with write_lock:
+            change_feed.catch_up(apply_change)
+
+def record_change(kind, new_ids=0, **payload):
+    """Apply a write in this process and, with a change log, in every other worker too
+
+    new_ids claims that many item ids, passed to the change as first_id; it is returned.
+    """
+    with write_lock:
+        if change_feed is None:
+            if new_ids:
+                payload['first_id'] = inventory.reserve_ids(new_ids)
+            apply_change(kind, payload)
+            return payload.get('first_id')
+        
+        # Ids come from the log so workers never hand out the same one
+        payload = change_feed.publish(kind, payload, new_ids, min_id=inventory.next_id)
+        change_feed.catch_up(apply_change)
+        return payload.get('first_id')
+
+def add_medicine_batch(rows):
+    """Add validated (name, brand, quantity, expiryDate) rows to the store, MinHeap and Trie"""
+    rows = [list(row) for row in rows]
+    if rows:
+        record_change('add_items', new_ids=len(rows), rows=rows)
+    return len(rows)
+
+if CATALOG_DATABASE_URI:
+    from catalog_loader import CatalogLoader
+    catalog_loader = CatalogLoader(CATALOG_DATABASE_URI)
+else:
+    catalog_loader = None
+
+def refresh_catalog(full=False):
+    """Apply catalogue rows changed since the last refresh (or every row) to the indexes"""
+    changed = 0
+    for batch in catalog_loader.load() if full else catalog_loader.refresh():
+        with write_lock:
+            changed += apply_upsert_items(batch)
+    if changed:
+        response_cache.bump()
+    return changed
+
+def reconcile_catalog():
+    """Drop catalogue items whose rows were deleted from the database; returns how many"""
+    # Snapshot the loaded ids before reading the table: an id missing from both
+    # reads was deleted, while rows added meanwhile are not in the snapshot
+    with write_lock:
+        deleted = {record.id for record in inventory if record.id < CATALOG_LOCAL_ID_START}
+    for ids in catalog_loader.ids():
+        deleted.difference_update(ids)
+    
+    if deleted:
+        with write_lock:
+            for item_id in deleted:
+                apply_delete_item(item_id)
+        response_cache.bump()
+    return len(deleted)
+
+def catalog_refresh_loop():
+    last_reconcile = time.monotonic()
+    while True:
+        time.sleep(CATALOG_REFRESH_SECONDS)
+        try:
+            refresh_catalog()
+            if time.monotonic() - last_reconcile >= CATALOG_RECONCILE_SECONDS:
+                last_reconcile = time.monotonic()
+                reconcile_catalog()
+        except Exception as e:
+            print(f"Warning: catalogue refresh failed: {e}", file=sys.stderr)
+
+# Started by the first request rather than at import, so it runs in each forked worker
+catalog_refresher = threading.Thread(target=catalog_refresh_loop, name='catalog-refresh', daemon=True)
+catalog_refresher_lock = threading.Lock()
+
+def start_catalog_refresher():
+    if catalog_loader is None or catalog_refresher.is_alive():
+        return
+    with catalog_refresher_lock:
+        if not catalog_refresher.is_alive():
+            catalog_refresher.start()
+
+# Load the catalogue in keyset-paged batches, then replay the change log, if any,
+# so a new worker starts from the shared state
+if catalog_loader is not None:
+    refresh_catalog(full=True)
+sync_changes()
+
+@app.before_request
+def catch_up_changes():
+    """Apply other workers' writes before serving, so no request sees stale indexes"""
+    sync_changes()
+    start_catalog_refresher()
 
 @app.route('/', methods=['GET'])
 def api_info():
@@ -91,68 +367,168 @@ def api_info():
         "name": "Medilocate API",
         "version": "1.0.0",
         "endpoints": {
-            "search": "/search?query=<medicine name>",
+            "search": "/search?query=<medicine name>&limit=<n>&cursor=<next_cursor>&rank=<alpha|popular>&mode=<auto|fuzzy>",
+            "search_batch": "/search/batch (POST)",
             "add": "/add (POST)",
             "health": "/health",
-            "search_medicine": "/search_medicine?name=<medicine name>",
-            "expiring_medicines": "/expiring_medicines",
+            "metrics": "/metrics",
+            "search_medicine": "/search_medicine?name=<medicine name>&limit=<n>&after=<next_cursor>",
+            "medicines": "/medicines?name=<filter>&limit=<n>&after=<next_cursor>&format=<json|jsonl>",
+            "expiring_medicines": "/expiring_medicines?before=<YYYY-MM-DD>&limit=<n>&cursor=<next_cursor>",
             "low_stock_medicines": "/low_stock_medicines",
-            "upload_medicines": "/upload_medicines (POST)"
+            "dashboard": "/dashboard?threshold=<n>",
+            "upload_medicines": "/upload_medicines (POST)",
+            "add_medicine_item": "/add_medicine_item (POST)",
+            "update_medicine_item": "/update_medicine_item/<id> (PUT)",
+            "delete_medicine_item": "/delete_medicine_item/<id> (DELETE)"
         },
         "example": "/search?query=aspirin"
     })
 
 @app.route('/search', methods=['GET'])
+@response_cache.cached
 def search_medicines():
     query = request.args.get('query', '').lower()
     
     if not query:
         return jsonify({"error": "No query parameter provided"}), 400
     
-    if len(query) <= 2:
-        results = medicine_trie.startsWith(query)
-        return jsonify({
-            "query": query,
-            "results": results,
-            "count": len(results),
-            "search_type": "prefix"
-        })
+    # Page size and cursor keep autocomplete cost bounded by the page, not the catalogue
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    cursor = max(0, request.args.get('cursor', 0, type=int))
+    rank = request.args.get('rank', 'alpha')
+    mode = request.args.get('mode', 'auto')
     
-    exact_match = medicine_trie.search(query)
+    if mode == 'fuzzy':
+        return jsonify(fuzzy_search_response(query, limit))
     
-    if exact_match:
+    if len(query) > 2 and cursor == 0 and medicine_trie.search(query):
         return jsonify({
             "query": query,
             "results": [query],
             "count": 1,
-            "search_type": "exact"
+            "search_type": "exact",
+            "next_cursor": None
         })
     
-    results = medicine_trie.startsWith(query)
+    if rank == 'popular':
+        # Highest-weighted names first; ranked results are a single page
+        results = medicine_trie.topK(query, limit)
+        next_cursor = None
+    else:
+        # Fetch one extra name to know whether another page exists
+        results = medicine_trie.startsWith(query, limit + 1, cursor)
+        next_cursor = cursor + limit if len(results) > limit else None
+        results = results[:limit]
+    
+    # Nothing starts with a longer query, so it is probably misspelled
+    if not results and cursor == 0 and len(query) > 2:
+        return jsonify(fuzzy_search_response(query, limit))
+    
     return jsonify({
         "query": query,
         "results": results,
         "count": len(results),
-        "search_type": "prefix"
+        "search_type": "prefix",
+        "next_cursor": next_cursor
+    })
+
+def fuzzy_distance(query, requested=None):
+    """Edit distance bound for a fuzzy lookup, capped at MAX_FUZZY_DISTANCE"""
+    # One typo for short names, two for longer ones, unless the caller asks otherwise
+    if requested is None:
+        requested = 1 if len(query) <= 5 else 2
+    return max(0, min(requested, MAX_FUZZY_DISTANCE))
+
+def fuzzy_search_response(query, limit):
+    """Typo-tolerant lookup: names within a small edit distance of the query"""
+    max_distance = fuzzy_distance(query, request.args.get('max_distance', type=int))
+    results = medicine_trie.fuzzySearch(query, max_distance, limit)
+    return {
+        "query": query,
+        "results": results,
+        "count": len(results),
+        "search_type": "fuzzy",
+        "max_distance": max_distance,
+        "next_cursor": None
+    }
+
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    """Run several /search lookups, e.g. every drug on a prescription, in one native call"""
+    data = request.get_json(silent=True)
+    entries = data.get('queries') if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Provide a non-empty 'queries' list"}), 400
+    if len(entries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+    default_limit = data.get('limit', DEFAULT_SEARCH_LIMIT)
+    
+    queries = []
+    for entry in entries:
+        # A bare string is an auto-mode query, like /search?query=...
+        if isinstance(entry, str):
+            entry = {"query": entry}
+        text = entry.get('query') if isinstance(entry, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            return jsonify({"error": "Each query must be a non-empty string or an object with a 'query' string"}), 400
+        text = text.strip().lower()
+        
+        mode = entry.get('mode', 'auto')
+        if not isinstance(mode, str) or mode not in BATCH_SEARCH_MODES:
+            return jsonify({"error": f"Invalid mode '{mode}'. Use one of: {', '.join(BATCH_SEARCH_MODES)}"}), 400
+        try:
+            limit = max(1, min(int(entry.get('limit', default_limit)), MAX_SEARCH_LIMIT))
+            cursor = max(0, int(entry.get('cursor', 0)))
+            requested = entry.get('max_distance')
+            max_distance = fuzzy_distance(text, None if requested is None else int(requested))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"limit, cursor and max_distance of '{text}' must be integers"}), 400
+        queries.append(medilocate.TrieQuery(text, BATCH_SEARCH_MODES[mode], limit, cursor, max_distance))
+    
+    # One crossing into C++ for the whole batch, under a single read lock and without
+    # the GIL; results come back in request order, duplicates included
+    results = []
+    for query, found in zip(queries, medicine_trie.searchMany(queries)):
+        result = {
+            "query": query.text,
+            "results": found.words,
+            "count": len(found.words),
+            "search_type": SEARCH_TYPES[found.type],
+            "next_cursor": query.offset + query.limit if found.more else None
+        }
+        if found.type == medilocate.SearchMode.Fuzzy:
+            result["max_distance"] = query.maxDistance
+        results.append(result)
+    
+    return jsonify({
+        "results": results,
+        "count": len(results)
     })
 
 @app.route('/add', methods=['POST'])
 def add_medicine():
     data = request.get_json()
     
-    if not data or 'medicine' not in data:
+    if not data or not isinstance(data.get('medicine'), str) or not data['medicine'].strip():
         return jsonify({"error": "No medicine name provided"}), 400
     
     medicine_name = data['medicine'].strip().lower()
+    
+    # Optional ranking weight (e.g. popularity) used by /search?rank=popular
+    try:
+        weight = int(data.get('weight', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "weight must be an integer"}), 400
 
-    if medicine_name in inserted_medicines:
+    if medicine_trie.search(medicine_name):
         return jsonify({
             "status": "exists",
             "message": f"{medicine_name} already exists in the medicine database"
         })
 
-    medicine_trie.insert(medicine_name)
-    inserted_medicines.add(medicine_name)
+    record_change('add_name', name=medicine_name, weight=weight)
     
     return jsonify({
         "status": "success",
@@ -161,54 +537,127 @@ def add_medicine():
 
 @app.route('/health', methods=['GET'])
 def health_check():
+    catalog_mark = catalog_loader.high_water_mark if catalog_loader is not None else None
     return jsonify({
         "status": "healthy",
-        "medicines_count": len(inserted_medicines),
-        "expiry_tracking_available": has_expiry_tracking
+        "medicines_count": medicine_trie.size(),
+        "expiry_tracking_available": has_expiry_tracking,
+        "change_log_position": change_feed.position if change_feed is not None else None,
+        "catalog_high_water_mark": catalog_mark.isoformat() if catalog_mark else None
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Latency and result-size histograms in Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/ping', methods=['GET'])
 def ping():
     """Simple health check endpoint"""
     return {"status": "ok", "message": "Medilocate API is running"}
 
 @app.route('/search_medicine', methods=['GET'])
+@response_cache.cached
 def search_medicine_db():
     name = request.args.get('name', '').lower()
     
     if not name:
         return jsonify({"error": "No name parameter provided"}), 400
     
-    # Search for medicines in the in-memory list
-    results = [medicine for medicine in medicines if name in medicine['name'].lower()]
+    return medicine_listing(name)
+
+@app.route('/medicines', methods=['GET'])
+@response_cache.cached
+def list_medicines():
+    """List items in id order, optionally filtered by name, one page at a time
+    
+    format=jsonl streams every matching item as JSON lines instead.
+    """
+    return medicine_listing(request.args.get('name', '').lower())
+
+def medicine_listing(name):
+    """Response for /medicines and /search_medicine: keyset pages by id, or a JSON-lines stream"""
+    after = request.args.get('after')
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            return jsonify({"error": "Invalid after cursor"}), 400
+    
+    # Search the inventory's n-gram name index, or page through every item
+    def page(after_id, limit):
+        if name:
+            return inventory.search(name, after_id, limit)
+        return inventory.page(after_id, limit)
     
-    return jsonify({"results": results})
+    if request.args.get('format') == 'jsonl':
+        def stream(after_id):
+            while True:
+                records = page(after_id, STREAM_BATCH_SIZE)
+                if not records:
+                    return
+                yield b''.join(dumps_bytes(record.to_dict(), sort_keys=False) + b'\n' for record in records)
+                after_id = records[-1].id
+        return Response(stream_with_context(stream(after)), mimetype='application/x-ndjson')
+    
+    limit = request.args.get('limit', DEFAULT_LIST_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIST_LIMIT))
+    
+    # Fetch one extra item to know whether another page exists
+    records = page(after, limit + 1)
+    next_cursor = records[limit - 1].id if len(records) > limit else None
+    results = [medicine.to_dict() for medicine in records[:limit]]
+    
+    return jsonify({
+        "results": results,
+        "count": len(results),
+        "next_cursor": next_cursor
+    })
 
 @app.route('/expiring_medicines', methods=['GET'])
+@response_cache.cached
 def expiring_medicines():
-    """Get medicines sorted by expiry date (earliest first)"""
-    if not has_expiry_tracking:
-        # Fallback if C++ module is not available
-        sorted_meds = sorted(medicines, key=lambda m: m['expiryDate'])
-        return jsonify({"results": sorted_meds})
+    """Get medicines sorted by expiry date (earliest first), one page at a time"""
+    before = request.args.get('before')
+    limit = request.args.get('limit', DEFAULT_EXPIRING_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_EXPIRING_LIMIT))
+    cursor = max(0, request.args.get('cursor', 0, type=int))
     
-    # Use the C++ MinHeap implementation
-    sorted_items = expiry_tracker.getSortedItems()
+    if before is not None:
+        try:
+            datetime.strptime(before, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"error": "Invalid before date format. Use YYYY-MM-DD"}), 400
     
-    # Convert C++ objects to Python dictionaries
-    results = []
-    for item in sorted_items:
-        results.append({
-            "id": item.id,
-            "name": item.name,
-            "brand": item.brand,
-            "quantity": item.quantity,
-            "expiryDate": item.expiryDate
-        })
+    if not has_expiry_tracking:
+        # Fallback if C++ module is not available
+        sorted_meds = sorted((m.to_dict() for m in inventory if m.expiryDate),
+                             key=lambda m: (m['expiryDate'], m['id']))
+        if before is not None:
+            sorted_meds = [m for m in sorted_meds if m['expiryDate'] <= before]
+        page = sorted_meds[cursor:cursor + limit + 1]
+        
+        # One extra item was fetched to know whether another page exists
+        next_cursor = cursor + limit if len(page) > limit else None
+        results = page[:limit]
+    else:
+        # The C++ MinHeap walks only the items on this page and encodes them as
+        # JSON itself, so no per-item Python objects are built
+        if before is not None:
+            page = expiry_tracker.expiringBeforeJson(before, limit, cursor)
+        else:
+            page = expiry_tracker.peekNJson(limit, cursor)
+        next_cursor = cursor + limit if page.more else None
+        results = RawJSON(page.json)
     
-    return jsonify({"results": results})
+    return jsonify({
+        "results": results,
+        "before": before,
+        "next_cursor": next_cursor
+    })
 
 @app.route('/low_stock_medicines', methods=['GET'])
+@response_cache.cached
 def low_stock_medicines():
     """Get medicines with low stock (below threshold)"""
     global LOW_STOCK_THRESHOLD
@@ -220,17 +669,36 @@ def low_stock_medicines():
     else:
         current_threshold = LOW_STOCK_THRESHOLD
     
-    # Filter medicines below threshold
-    low_stock = [m for m in medicines if m['quantity'] <= current_threshold]
-    
-    # Sort by quantity (ascending)
-    low_stock.sort(key=lambda m: m['quantity'])
+    # Read medicines at or below threshold off the quantity index, lowest first
+    low_stock = [m.to_dict() for m in inventory.low_stock(current_threshold)]
     
     return jsonify({
         "results": low_stock,
         "threshold": current_threshold
     })
 
+@app.route('/dashboard', methods=['GET'])
+def dashboard():
+    """Inventory summary for the admin page
+    
+    Read off totals and sorted indexes the store updates on every write, so
+    the cost does not grow with the inventory.
+    """
+    threshold = request.args.get('threshold', LOW_STOCK_THRESHOLD, type=int)
+    expired, expiring = inventory.expiry_counts(datetime.now().strftime('%Y-%m-%d'), DASHBOARD_EXPIRY_DAYS)
+    
+    return jsonify({
+        "totals": inventory.totals(),
+        "expired": expired,
+        "expiring": {str(days): count for days, count in expiring.items()},
+        "low_stock": {
+            "threshold": threshold,
+            "count": inventory.low_stock_count(threshold),
+            "lowest": [m.to_dict() for m in inventory.lowest_stock(DASHBOARD_LOWEST_STOCK)]
+        },
+        "expiry_tracking_available": has_expiry_tracking
+    })
+
 @app.route('/upload_medicines', methods=['POST'])
 def upload_medicines():
     """Upload medicines via CSV file"""
@@ -244,62 +712,55 @@ def upload_medicines():
     if not file.filename.endswith('.csv'):
         return jsonify({"error": "File must be CSV format"}), 400
     
-    # Process the CSV file
+    # Decode and parse the upload incrementally, so memory stays flat whatever the file size
+    csv_reader = csv.DictReader(codecs.iterdecode(file.stream, 'utf-8'))
     try:
-        # Read the CSV file
-        stream = io.StringIO(file.stream.read().decode('utf-8'), newline='')
-        csv_reader = csv.DictReader(stream)
-        
-        # Validate CSV structure
-        required_fields = ['name', 'brand', 'quantity', 'expiryDate']
-        if not all(field in csv_reader.fieldnames for field in required_fields):
-            return jsonify({
-                "error": "CSV file must contain columns: name, brand, quantity, expiryDate"
-            }), 400
-        
-        # Process the medicines
-        new_medicines = []
-        for row in csv_reader:
+        fieldnames = csv_reader.fieldnames
+    except UnicodeDecodeError:
+        return jsonify({"error": "CSV file must be UTF-8 encoded"}), 400
+    
+    # Validate CSV structure
+    required_fields = ['name', 'brand', 'quantity', 'expiryDate']
+    if not fieldnames or not all(field in fieldnames for field in required_fields):
+        return jsonify({
+            "error": "CSV file must contain columns: name, brand, quantity, expiryDate"
+        }), 400
+    
+    # Process the medicines in chunks; bad rows are reported and skipped
+    inserted = 0
+    failed = 0
+    errors = []
+    chunk = []
+    try:
+        for row_number, row in enumerate(csv_reader, start=1):
             try:
-                medicine = {
-                    "id": len(medicines) + len(new_medicines) + 1,
-                    "name": row['name'].strip(),
-                    "brand": row['brand'].strip(),
-                    "quantity": int(row['quantity']),
-                    "expiryDate": row['expiryDate'].strip()
-                }
-                
-                # Add to in-memory store
-                new_medicines.append(medicine)
-                
-                # Add to Trie for search
-                medicine_trie.insert(medicine['name'].lower())
-                inserted_medicines.add(medicine['name'].lower())
-                
-                # Add to MinHeap for expiry tracking if available
-                if has_expiry_tracking:
-                    item = expiry_heap.MedicineItem()
-                    item.id = medicine['id']
-                    item.name = medicine['name']
-                    item.brand = medicine['brand']
-                    item.quantity = medicine['quantity']
-                    item.expiryDate = medicine['expiryDate']
-                    expiry_tracker.insert(item)
-                
+                chunk.append(parse_medicine_fields(row))
             except Exception as e:
-                return jsonify({"error": f"Error processing row: {str(e)}"}), 400
-        
-        # Add all new medicines to the in-memory store
-        medicines.extend(new_medicines)
-        
+                failed += 1
+                if len(errors) < MAX_UPLOAD_ERRORS:
+                    errors.append({"row": row_number, "error": str(e)})
+                continue
+            
+            if len(chunk) >= UPLOAD_CHUNK_SIZE:
+                inserted += add_medicine_batch(chunk)
+                chunk = []
+        inserted += add_medicine_batch(chunk)
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Rows before the unreadable part have already been added
         return jsonify({
-            "status": "success",
-            "message": f"Uploaded {len(new_medicines)} medicines",
-            "medicines": new_medicines
-        })
-        
-    except Exception as e:
-        return jsonify({"error": f"Error processing CSV: {str(e)}"}), 500
+            "error": f"Error processing CSV: {str(e)}",
+            "inserted": inserted,
+            "failed": failed,
+            "errors": errors
+        }), 400
+    
+    return jsonify({
+        "status": "success" if failed == 0 else "partial",
+        "message": f"Uploaded {inserted} medicines",
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors
+    })
 
 @app.route('/add_medicine_item', methods=['POST'])
 def add_medicine_item():
@@ -316,40 +777,62 @@ def add_medicine_item():
             return jsonify({"error": f"Missing required field: {field}"}), 400
     
     try:
-        # Create new medicine
-        medicine = {
-            "id": len(medicines) + 1,
-            "name": data['name'].strip(),
-            "brand": data['brand'].strip(),
-            "quantity": int(data['quantity']),
-            "expiryDate": data['expiryDate'].strip()
-        }
-        
-        # Add to in-memory store
-        medicines.append(medicine)
-        
-        # Add to Trie for search
-        medicine_trie.insert(medicine['name'].lower())
-        inserted_medicines.add(medicine['name'].lower())
-        
-        # Add to MinHeap for expiry tracking if available
-        if has_expiry_tracking:
-            item = expiry_heap.MedicineItem()
-            item.id = medicine['id']
-            item.name = medicine['name']
-            item.brand = medicine['brand']
-            item.quantity = medicine['quantity']
-            item.expiryDate = medicine['expiryDate']
-            expiry_tracker.insert(item)
+        # Add to the in-memory store, the Trie (ranked by stock count) and the MinHeap
+        item_id = record_change('add_items', new_ids=1, rows=[list(parse_medicine_fields(data))])
+        medicine = inventory.get(item_id)
         
         return jsonify({
             "status": "success",
-            "message": f"Added medicine: {medicine['name']}",
-            "medicine": medicine
+            "message": f"Added medicine: {medicine.name}",
+            "medicine": medicine.to_dict()
         })
         
     except Exception as e:
         return jsonify({"error": f"Error adding medicine: {str(e)}"}), 500
 
+@app.route('/update_medicine_item/<int:item_id>', methods=['PUT'])
+def update_medicine_item(item_id):
+    """Change the quantity and/or expiry date of a medicine item"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    
+    medicine = inventory.get(item_id)
+    if medicine is None:
+        return jsonify({"error": f"Medicine item with ID {item_id} not found"}), 404
+    
+    try:
+        quantity = int(data.get('quantity', medicine.quantity))
+        # Only a supplied date is checked; items loaded from the catalogue may have none
+        expiry_date = data.get('expiryDate')
+        if expiry_date is not None:
+            expiry_date = expiry_date.strip()
+            datetime.strptime(expiry_date, '%Y-%m-%d')
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({"error": "quantity must be an integer and expiryDate a YYYY-MM-DD date"}), 400
+    
+    record_change('update_item', item_id=item_id, quantity=quantity, expiryDate=expiry_date)
+    
+    return jsonify({
+        "status": "success",
+        "message": f"Updated medicine: {medicine.name}",
+        "medicine": medicine.to_dict()
+    })
+
+@app.route('/delete_medicine_item/<int:item_id>', methods=['DELETE'])
+def delete_medicine_item(item_id):
+    """Remove a medicine item from the inventory"""
+    medicine = inventory.get(item_id)
+    if medicine is None:
+        return jsonify({"error": f"Medicine item with ID {item_id} not found"}), 404
+    
+    record_change('delete_item', item_id=item_id)
+    
+    return jsonify({
+        "status": "success",
+        "message": f"Deleted medicine: {medicine.name}"
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
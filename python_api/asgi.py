@@ -0,0 +1,432 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from python_api.bulk_ingest import (DEFAULT_CHUNK_SIZE, IngestSummary, decode_lines, flush_chunk,
+                                    iter_records, valid_chunks)
+from python_api.config import get_config
+from python_api.geo_index import PharmacyGrid
+from python_api.json_provider import dumps_bytes
+from python_api.models import Medicine, Pharmacy
+from python_api.pagination import decode_cursor, encode_cursor
+from python_api.pool_metrics import pool_status
+from python_api.routes import (DEFAULT_LIST_LIMIT, DEFAULT_NEARBY_K, DEFAULT_NEARBY_RADIUS_KM,
+                               DEFAULT_SEARCH_LIMIT, MAX_LIST_LIMIT, MAX_NEARBY_K, MAX_NEARBY_RADIUS_KM,
+                               MAX_SEARCH_LIMIT, STREAM_BATCH_SIZE)
+import asyncio
+import logging
+import os
+import tempfile
+
+try:
+    import medilocate
+except ImportError:
+    # Started from the project root: the extension module sits next to this file
+    from python_api import medilocate
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Default and maximum number of names returned by /search
+DEFAULT_PREFIX_LIMIT = 20
+MAX_PREFIX_LIMIT = 200
+
+# Seconds between reads of the names other processes added to the medicines table;
+# each read re-reads this much earlier, for transactions that committed late
+TRIE_REFRESH_SECONDS = float(os.getenv('MEDILOCATE_TRIE_REFRESH', 30))
+TRIE_REFRESH_OVERLAP = timedelta(seconds=60)
+
+# /bulk_add_medicines bodies are spooled to a temporary file past this size
+BULK_SPOOL_BYTES = 8 * 1024 * 1024
+
+config = get_config()
+
+# Pooled async connections: a request waiting on the database holds no thread
+engine = create_async_engine(config.ASYNC_DATABASE_URI, **config.ASYNC_ENGINE_OPTIONS)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Prefix index over the medicine names in the database, filled at startup
+medicine_trie = medilocate.Trie()
+
+# Spatial index of the pharmacies for /nearby, built at startup
+pharmacy_grid = PharmacyGrid()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is installed"""
+
+    def render(self, content):
+        return dumps_bytes(content, sort_keys=False)
+
+def query_int(request, key, default):
+    """Integer query parameter, or `default` if missing or malformed (like Flask's type=int)"""
+    try:
+        return int(request.query_params[key])
+    except (KeyError, ValueError):
+        return default
+
+def query_float(request, key, default):
+    """Float query parameter, or `default` if missing or malformed (like Flask's type=float)"""
+    try:
+        return float(request.query_params[key])
+    except (KeyError, ValueError):
+        return default
+
+async def request_json(request):
+    """The parsed JSON body, or None if it is missing or malformed"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+async def load_names(since=None):
+    """Insert the names of medicines changed after `since` (every name if None) into the Trie
+
+    Returns the newest updated_at seen, to pass as `since` next time.
+    """
+    query = select(Medicine.name, func.max(Medicine.updated_at)).group_by(Medicine.name)
+    if since is not None:
+        query = query.where(Medicine.updated_at > since - TRIE_REFRESH_OVERLAP)
+    async with Session() as session:
+        rows = (await session.execute(query)).all()
+    if rows:
+        # Native calls release the GIL, so they run on the thread pool, off the event loop
+        await run_in_threadpool(medicine_trie.insertMany, [name for name, _ in rows])
+        newest = max((updated_at for _, updated_at in rows if updated_at is not None), default=since)
+        if newest is not None:
+            since = max(since or newest, newest)
+    return since
+
+async def refresh_names(since):
+    """Pick up names other processes add, every TRIE_REFRESH_SECONDS"""
+    while True:
+        await asyncio.sleep(TRIE_REFRESH_SECONDS)
+        try:
+            since = await load_names(since)
+        except Exception as e:
+            logger.error(f"Trie refresh failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app):
+    global pharmacy_grid
+    since = await load_names()
+
+    grid = PharmacyGrid()
+    async with Session() as session:
+        rows = await session.execute(select(Pharmacy.id, Pharmacy.latitude, Pharmacy.longitude).where(
+            Pharmacy.latitude.isnot(None), Pharmacy.longitude.isnot(None)))
+        for pharmacy_id, latitude, longitude in rows:
+            grid.add(pharmacy_id, latitude, longitude)
+    pharmacy_grid = grid
+
+    refresher = asyncio.create_task(refresh_names(since))
+    yield
+    refresher.cancel()
+    await engine.dispose()
+
+async def search(request):
+    """Prefix search over medicine names, served by the native Trie"""
+    query = request.query_params.get('query', '').strip().lower()
+    if not query:
+        return FastJSONResponse({"error": "No query parameter provided"}, status_code=400)
+
+    limit = max(1, min(query_int(request, 'limit', DEFAULT_PREFIX_LIMIT), MAX_PREFIX_LIMIT))
+    results = await run_in_threadpool(medicine_trie.startsWith, query, limit)
+
+    return FastJSONResponse({
+        "query": query,
+        "results": results,
+        "count": len(results)
+    })
+
+async def search_medicine(request):
+    """Search for medicines by name (case-insensitive)"""
+    name = request.query_params.get('name', '').lower()
+    if not name:
+        return FastJSONResponse({"error": "No name parameter provided"}, status_code=400)
+
+    limit = max(1, min(query_int(request, 'limit', DEFAULT_SEARCH_LIMIT), MAX_SEARCH_LIMIT))
+
+    after = request.query_params.get('after')
+    if after:
+        try:
+            after = decode_cursor(after, 3)
+        except ValueError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        async with Session() as session:
+            query = Medicine.search_rows_query(name, limit + 1, engine.dialect.name, after or None)
+            results, next_after = Medicine.split_search_page((await session.execute(query)).mappings(), limit)
+    except Exception as e:
+        logger.error(f"Database error when searching medicines: {str(e)}")
+        return FastJSONResponse({"error": f"Database error: {str(e)}"}, status_code=500)
+
+    return FastJSONResponse({
+        "query": name,
+        "results": results,
+        "count": len(results),
+        "next_cursor": encode_cursor(*next_after) if next_after else None
+    })
+
+async def add_medicine(request):
+    """Add a new medicine to the database"""
+    data = await request_json(request)
+    if not data:
+        return FastJSONResponse({"error": "No data provided"}, status_code=400)
+
+    # Validate required fields
+    for field in ['name', 'pharmacy_id']:
+        if field not in data:
+            return FastJSONResponse({"error": f"Missing required field: {field}"}, status_code=400)
+
+    expiry_date = None
+    if data.get('expiry_date'):
+        try:
+            expiry_date = datetime.strptime(data['expiry_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return FastJSONResponse({"error": "Invalid expiry date format. Use YYYY-MM-DD"}, status_code=400)
+
+    try:
+        async with Session() as session:
+            pharmacy = await session.get(Pharmacy, data['pharmacy_id'])
+            if not pharmacy:
+                return FastJSONResponse({"error": f"Pharmacy with ID {data['pharmacy_id']} not found"},
+                                    status_code=404)
+
+            medicine = Medicine(
+                name=data['name'].lower(),
+                expiry_date=expiry_date,
+                quantity=data.get('quantity', 0),
+                pharmacy=pharmacy
+            )
+            session.add(medicine)
+            await session.commit()
+            # created_at is set by the database; load it now, as to_dict() cannot await
+            await session.refresh(medicine, ['created_at'])
+    except Exception as e:
+        logger.error(f"Database error when adding medicine: {str(e)}")
+        return FastJSONResponse({"error": f"Database error: {str(e)}"}, status_code=500)
+
+    await run_in_threadpool(medicine_trie.insert, medicine.name)
+
+    return FastJSONResponse({
+        "status": "success",
+        "message": f"Medicine '{medicine.name}' added successfully",
+        "medicine": medicine.to_dict()
+    }, status_code=201)
+
+async def bulk_add_medicines(request):
+    """Bulk-load medicines from a CSV or JSON-lines request body
+
+    The body is spooled to a temporary file as it arrives. Rows are parsed on
+    the thread pool and inserted in chunks, as in the WSGI route. Multipart
+    file uploads are not accepted here: send the file as the body.
+    """
+    fmt = request.query_params.get('format')
+    content_type = request.headers.get('content-type', '')
+    if fmt is None:
+        fmt = 'jsonl' if 'json' in content_type else 'csv'
+    if fmt not in ('csv', 'jsonl'):
+        return FastJSONResponse({"error": "format must be csv or jsonl"}, status_code=400)
+    if content_type.startswith('multipart/'):
+        return FastJSONResponse({"error": "Send the file as the request body, not as a multipart upload"},
+                                status_code=400)
+    chunk_size = max(1, query_int(request, 'chunk_size', DEFAULT_CHUNK_SIZE))
+
+    with tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES) as body:
+        async for data in request.stream():
+            body.write(data)
+        body.seek(0)
+
+        summary = IngestSummary()
+        try:
+            async with Session() as session:
+                pharmacy_ids = set((await session.scalars(select(Pharmacy.id))).all())
+                chunks = valid_chunks(iter_records(decode_lines(body), fmt), pharmacy_ids, summary, chunk_size)
+                while (chunk := await run_in_threadpool(next, chunks, None)) is not None:
+                    inserted = await session.run_sync(flush_chunk, chunk, summary)
+                    if inserted:
+                        await run_in_threadpool(medicine_trie.insertMany, {values['name'] for values in inserted})
+        except UnicodeDecodeError:
+            return FastJSONResponse({"error": "Body must be UTF-8 encoded"}, status_code=400)
+        except Exception as e:
+            logger.error(f"Database error during bulk medicine load: {str(e)}")
+            return FastJSONResponse({"error": f"Database error: {str(e)}"}, status_code=500)
+
+    result = summary.to_dict()
+    result["status"] = "success" if summary.failed == 0 else "partial"
+    return FastJSONResponse(result)
+
+async def stream_rows(query):
+    """JSON lines of the query's rows, read from the database in batches"""
+    async with Session() as session:
+        result = await session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.mappings().partitions():
+            yield b''.join(dumps_bytes(dict(row), sort_keys=False) + b'\n' for row in rows)
+
+async def list_medicines(request):
+    """List medicines in id order, optionally filtered by name, one page at a time
+
+    format=jsonl streams every matching row as JSON lines instead.
+    """
+    name = request.query_params.get('name', '').lower()
+    after = request.query_params.get('after')
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            return FastJSONResponse({"error": "Invalid after cursor"}, status_code=400)
+
+    if request.query_params.get('format') == 'jsonl':
+        return StreamingResponse(stream_rows(Medicine.list_rows_query(name, after)),
+                                 media_type='application/x-ndjson')
+
+    limit = max(1, min(query_int(request, 'limit', DEFAULT_LIST_LIMIT), MAX_LIST_LIMIT))
+    try:
+        async with Session() as session:
+            query = Medicine.list_rows_query(name, after, limit + 1)
+            results = [dict(row) for row in (await session.execute(query)).mappings()]
+    except Exception as e:
+        logger.error(f"Database error when listing medicines: {str(e)}")
+        return FastJSONResponse({"error": f"Database error: {str(e)}"}, status_code=500)
+
+    next_cursor = None
+    if len(results) > limit:
+        del results[limit:]
+        next_cursor = results[-1]['id']
+
+    return FastJSONResponse({
+        "results": results,
+        "count": len(results),
+        "next_cursor": next_cursor
+    })
+
+async def add_pharmacy(request):
+    """Add a new pharmacy to the database"""
+    data = await request_json(request)
+    if not data:
+        return FastJSONResponse({"error": "No data provided"}, status_code=400)
+
+    # Validate required fields
+    for field in ['name', 'address']:
+        if field not in data:
+            return FastJSONResponse({"error": f"Missing required field: {field}"}, status_code=400)
+
+    try:
+        async with Session() as session:
+            pharmacy = Pharmacy(
+                name=data['name'],
+                address=data['address'],
+                latitude=data.get('latitude'),
+                longitude=data.get('longitude')
+            )
+            session.add(pharmacy)
+            await session.commit()
+            await session.refresh(pharmacy, ['created_at'])
+    except Exception as e:
+        logger.error(f"Database error when adding pharmacy: {str(e)}")
+        return FastJSONResponse({"error": f"Database error: {str(e)}"}, status_code=500)
+
+    # Keep the spatial index in step without rebuilding it
+    pharmacy_grid.add(pharmacy.id, pharmacy.latitude, pharmacy.longitude)
+
+    return FastJSONResponse({
+        "status": "success",
+        "message": f"Pharmacy '{pharmacy.name}' added successfully",
+        "pharmacy": pharmacy.to_dict()
+    }, status_code=201)
+
+async def nearby(request):
+    """Nearest pharmacies to a point, optionally only those stocking a medicine"""
+    lat = query_float(request, 'lat', None)
+    lon = query_float(request, 'lon', None)
+    if lat is None or lon is None:
+        return FastJSONResponse({"error": "lat and lon are required numbers"}, status_code=400)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return FastJSONResponse({"error": "lat must be within [-90, 90] and lon within [-180, 180]"},
+                                status_code=400)
+
+    radius = max(0.0, min(query_float(request, 'radius', DEFAULT_NEARBY_RADIUS_KM), MAX_NEARBY_RADIUS_KM))
+    k = max(1, min(query_int(request, 'k', DEFAULT_NEARBY_K), MAX_NEARBY_K))
+    medicine = request.query_params.get('medicine', '').strip().lower()
+
+    try:
+        async with Session() as session:
+            stock = None
+            if medicine:
+                # Pharmacies with the medicine in stock, and how much each holds
+                stock = dict((await session.execute(
+                    select(Medicine.pharmacy_id, func.sum(Medicine.quantity))
+                    .where(Medicine.name == medicine, Medicine.quantity > 0)
+                    .group_by(Medicine.pharmacy_id))).all())
+
+            matches = pharmacy_grid.nearest(lat, lon, radius, k, candidates=stock)
+            pharmacies = {}
+            if matches:
+                ids = [pharmacy_id for _, pharmacy_id in matches]
+                pharmacies = {p.id: p for p in await session.scalars(select(Pharmacy).where(Pharmacy.id.in_(ids)))}
+    except Exception as e:
+        logger.error(f"Database error when finding nearby pharmacies: {str(e)}")
+        return FastJSONResponse({"error": f"Database error: {str(e)}"}, status_code=500)
+
+    results = []
+    for distance, pharmacy_id in matches:
+        pharmacy = pharmacies.get(pharmacy_id)
+        if pharmacy is None:
+            continue
+        result = pharmacy.to_dict()
+        result['distance_km'] = round(distance, 3)
+        if stock is not None:
+            result['quantity'] = stock[pharmacy_id]
+        results.append(result)
+
+    return FastJSONResponse({
+        "medicine": medicine or None,
+        "lat": lat,
+        "lon": lon,
+        "radius_km": radius,
+        "results": results,
+        "count": len(results)
+    })
+
+async def health_check(request):
+    """Health check endpoint"""
+    try:
+        async with Session() as session:
+            pharmacies_count = await session.scalar(select(func.count()).select_from(Pharmacy))
+            medicines_count = await session.scalar(select(func.count()).select_from(Medicine))
+    except Exception as e:
+        logger.error(f"Health check failed: {str(e)}")
+        return FastJSONResponse({
+            "status": "unhealthy",
+            "database": "disconnected",
+            "error": str(e),
+            "pool": pool_status(engine.sync_engine)
+        }, status_code=500)
+
+    return FastJSONResponse({
+        "status": "healthy",
+        "database": "connected",
+        "pharmacies_count": pharmacies_count,
+        "medicines_count": medicines_count,
+        "names_indexed": medicine_trie.size(),
+        "pool": pool_status(engine.sync_engine)
+    })
+
+app = Starlette(
+    routes=[
+        Route('/search', search, methods=['GET']),
+        Route('/search_medicine', search_medicine, methods=['GET']),
+        Route('/medicines', list_medicines, methods=['GET']),
+        Route('/add_medicine', add_medicine, methods=['POST']),
+        Route('/bulk_add_medicines', bulk_add_medicines, methods=['POST']),
+        Route('/add_pharmacy', add_pharmacy, methods=['POST']),
+        Route('/nearby', nearby, methods=['GET']),
+        Route('/health', health_check, methods=['GET']),
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,162 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from sqlalchemy import insert
+from python_api.models import db, Medicine, Pharmacy
+
+# Rows inserted per executemany batch; each batch is its own transaction
+DEFAULT_CHUNK_SIZE = 1000
+
+# Per-row errors echoed back in the summary; further failures are only counted
+MAX_REPORTED_ERRORS = 100
+
+def iter_records(lines, fmt):
+    """Yield (row_number, dict) from an iterable of text lines in CSV or JSONL format
+
+    Rows that cannot be parsed at all are yielded as (row_number, ValueError).
+    """
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, row
+    elif fmt == 'jsonl':
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield number, ValueError("Each line must be a JSON object")
+                continue
+            yield number, record
+    else:
+        raise ValueError(f"Unsupported format: {fmt}. Use csv or jsonl")
+
+def decode_lines(byte_lines, encoding='utf-8'):
+    """Incrementally decode an iterable of byte lines (e.g. a request stream)"""
+    return codecs.iterdecode(byte_lines, encoding)
+
+def parse_medicine(record, pharmacy_ids):
+    """Validate one input record and return the column values to insert"""
+    name = record.get('name')
+    if name is not None and not isinstance(name, str):
+        raise ValueError("name must be a string")
+    name = (name or '').strip()
+    if not name:
+        raise ValueError("Missing required field: name")
+
+    try:
+        pharmacy_id = int(record.get('pharmacy_id'))
+    except (TypeError, ValueError):
+        raise ValueError("pharmacy_id must be an integer")
+    if pharmacy_id not in pharmacy_ids:
+        raise ValueError(f"Pharmacy with ID {pharmacy_id} not found")
+
+    quantity = record.get('quantity')
+    try:
+        quantity = int(quantity) if quantity not in (None, '') else 0
+    except (TypeError, ValueError):
+        raise ValueError("quantity must be an integer")
+
+    expiry_date = record.get('expiry_date')
+    if expiry_date:
+        try:
+            expiry_date = datetime.strptime(expiry_date, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise ValueError("Invalid expiry date format. Use YYYY-MM-DD")
+    else:
+        expiry_date = None
+
+    return {
+        'name': name.lower(),
+        'expiry_date': expiry_date,
+        'quantity': quantity,
+        'pharmacy_id': pharmacy_id
+    }
+
+class IngestSummary:
+    """Running counts and the first few per-row errors of a bulk load"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": str(error)})
+
+    def to_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+def valid_chunks(records, pharmacy_ids, summary, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of up to chunk_size (row_number, values) pairs parsed from (row_number, record) pairs
+
+    Invalid records are added to the summary's errors instead.
+    """
+    chunk = []
+    for row, record in records:
+        if isinstance(record, Exception):
+            summary.add_error(row, record)
+            continue
+        try:
+            chunk.append((row, parse_medicine(record, pharmacy_ids)))
+        except ValueError as e:
+            summary.add_error(row, e)
+            continue
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def flush_chunk(session, chunk, summary):
+    """Insert one chunk in a single executemany + transaction; returns the values inserted
+
+    If the batch is rejected, retry its rows one at a time so only the
+    offending rows are reported and the rest still land.
+    """
+    try:
+        session.execute(insert(Medicine), [values for _, values in chunk])
+        session.commit()
+        summary.inserted += len(chunk)
+        return [values for _, values in chunk]
+    except Exception:
+        session.rollback()
+
+    inserted = []
+    for row, values in chunk:
+        try:
+            session.execute(insert(Medicine), [values])
+            session.commit()
+            summary.inserted += 1
+            inserted.append(values)
+        except Exception as e:
+            session.rollback()
+            summary.add_error(row, e)
+    return inserted
+
+def ingest_medicines(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bulk-insert medicines from (row_number, record) pairs; returns an IngestSummary
+
+    Pharmacy ids are loaded once up front and checked as a set, rows are
+    inserted in chunked executemany batches with one transaction per chunk,
+    and invalid rows are reported without aborting the load.
+    """
+    pharmacy_ids = {pharmacy_id for (pharmacy_id,) in db.session.query(Pharmacy.id)}
+    summary = IngestSummary()
+    for chunk in valid_chunks(records, pharmacy_ids, summary, chunk_size):
+        flush_chunk(db.session, chunk, summary)
+    return summary
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from sqlalchemy import create_engine, func, select, tuple_
+from python_api.models import Medicine
+
+# Rows fetched per keyset page; each page is its own short query, so memory stays bounded
+LOAD_BATCH_SIZE = 5000
+
+# A refresh re-reads rows stamped this long before the high-water mark, so a row whose
+# transaction committed after a later one (with an earlier updated_at) is not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class CatalogLoader:
+    """Reads the medicines table in keyset-paged batches for the in-memory indexes
+
+    load() pages through every row by primary key. refresh() pages through
+    the rows whose (updated_at, id) is past the high-water mark left by the
+    previous call. Batches are lists of (id, name, brand, quantity, expiryDate,
+    pharmacy_id) tuples in the shape InventoryStore.upsert_many takes. ids()
+    pages through the primary keys alone, to find rows deleted since.
+    """
+
+    def __init__(self, database_uri, batch_size=LOAD_BATCH_SIZE):
+        self.engine = create_engine(database_uri)
+        self.batch_size = batch_size
+        self.high_water_mark = None  # Newest updated_at seen so far
+        self._columns = (Medicine.id, Medicine.name, Medicine.quantity, Medicine.expiry_date,
+                         Medicine.pharmacy_id, Medicine.updated_at)
+
+    def load(self):
+        """Yield every row of the table, in batches ordered by id"""
+        with self.engine.connect() as conn:
+            # Rows changed while the load runs are stamped after this, so the next refresh sees them
+            self.high_water_mark = conn.execute(select(func.max(Medicine.updated_at))).scalar()
+
+        query = select(*self._columns).order_by(Medicine.id).limit(self.batch_size)
+        last_id = None
+        while True:
+            page = query if last_id is None else query.where(Medicine.id > last_id)
+            rows = self._fetch(page)
+            if rows:
+                yield [self._item(row) for row in rows]
+                last_id = rows[-1].id
+            if len(rows) < self.batch_size:
+                return
+
+    def refresh(self):
+        """Yield the rows changed since the last load or refresh, in batches, and advance the mark"""
+        if self.high_water_mark is None:
+            # Nothing loaded yet, or the table was empty
+            yield from self.load()
+            return
+
+        query = select(*self._columns).order_by(Medicine.updated_at, Medicine.id).limit(self.batch_size)
+        after = (self.high_water_mark - REFRESH_OVERLAP, 0)
+        newest = self.high_water_mark
+        while True:
+            rows = self._fetch(query.where(tuple_(Medicine.updated_at, Medicine.id) > tuple_(*after)))
+            if rows:
+                yield [self._item(row) for row in rows]
+                after = (rows[-1].updated_at, rows[-1].id)
+                newest = max(newest, rows[-1].updated_at)
+            if len(rows) < self.batch_size:
+                break
+        self.high_water_mark = newest
+
+    def ids(self):
+        """Yield every id in the table, in batches ordered by id"""
+        query = select(Medicine.id).order_by(Medicine.id).limit(self.batch_size)
+        last_id = None
+        while True:
+            page = query if last_id is None else query.where(Medicine.id > last_id)
+            ids = [row.id for row in self._fetch(page)]
+            if ids:
+                yield ids
+                last_id = ids[-1]
+            if len(ids) < self.batch_size:
+                return
+
+    def _fetch(self, query):
+        with self.engine.connect() as conn:
+            return conn.execute(query).all()
+
+    @staticmethod
+    def _item(row):
+        # The table has no brand column; rows without an expiry date are not tracked for expiry
+        expiry_date = row.expiry_date.isoformat() if row.expiry_date else None
+        return (row.id, row.name, '', row.quantity or 0, expiry_date, row.pharmacy_id)
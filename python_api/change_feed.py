@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Changes read per query while catching up, so a long backlog is applied in bounded batches
+READ_BATCH_SIZE = 1000
+
+
+class ChangeFeed:
+    """Append-only log of inventory writes, shared by every worker process through one SQLite file
+
+    Each worker publishes its writes here instead of applying them directly,
+    then applies every change in the log, its own included, in sequence
+    order. All workers therefore reach the same indexes, and item ids are
+    allocated by the log so they never clash between workers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0  # Sequence number of the last change applied in this process
+        self._pending = True  # Set after a local publish; other workers are seen through data_version
+        self._data_version = None
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        """This process's connection to the log, opened on first use
+
+        A connection inherited across fork (e.g. gunicorn --preload) is never
+        used: the child opens its own. Callers must hold the lock.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS changes ('
+                         'seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS id_sequence (next_id INTEGER NOT NULL)')
+            self._conn, self._pid = conn, os.getpid()
+            # data_version is per connection; read the log on the next catch-up
+            self._pending = True
+            self._data_version = None
+        return self._conn
+
+    def publish(self, kind, payload, new_ids=0, min_id=1):
+        """Append a change to the log and return the payload as stored
+
+        With new_ids, that many consecutive item ids (at least min_id) are
+        claimed in the same transaction and stored as payload['first_id'].
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if new_ids:
+                    row = conn.execute('SELECT next_id FROM id_sequence').fetchone()
+                    first_id = max(row[0] if row else 1, min_id)
+                    if row:
+                        conn.execute('UPDATE id_sequence SET next_id = ?', (first_id + new_ids,))
+                    else:
+                        conn.execute('INSERT INTO id_sequence (next_id) VALUES (?)', (first_id + new_ids,))
+                    payload = dict(payload, first_id=first_id)
+                conn.execute('INSERT INTO changes (kind, payload) VALUES (?, ?)',
+                             (kind, json.dumps(payload, separators=(',', ':'))))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            self._pending = True
+        return payload
+
+    def catch_up(self, apply):
+        """Pass every change this process has not applied yet to apply(kind, payload), oldest first
+
+        Costs one PRAGMA when nothing new was committed. A change whose apply
+        raises is logged and skipped so one bad entry cannot wedge the worker.
+        """
+        with self._lock:
+            conn = self._connection()
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if not self._pending and version == self._data_version:
+                return 0
+            self._pending = False
+            self._data_version = version
+
+            applied = 0
+            while True:
+                rows = conn.execute(
+                    'SELECT seq, kind, payload FROM changes WHERE seq > ? ORDER BY seq LIMIT ?',
+                    (self.position, READ_BATCH_SIZE)).fetchall()
+                for seq, kind, payload in rows:
+                    try:
+                        apply(kind, json.loads(payload))
+                    except Exception:
+                        logger.exception(f"Skipping change {seq} ({kind}) that could not be applied")
+                    self.position = seq
+                    applied += 1
+                if len(rows) < READ_BATCH_SIZE:
+                    return applied
@@ -1,4 +1,30 @@
 import os
+from python_api.pool_metrics import TimedAsyncQueuePool, TimedQueuePool
+
+def pool_options(pool_size, max_overflow, poolclass, connect_args):
+    """Engine options for a PostgreSQL connection pool; DB_POOL_* env vars override the sizes"""
+    return {
+        'poolclass': poolclass,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', max_overflow)),
+        # Seconds a request waits for a free connection before failing
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        # Replace connections before server or firewall idle timeouts drop them
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        # Check each connection on checkout, so a dropped one is replaced instead of failing the request
+        'pool_pre_ping': True,
+        'connect_args': connect_args
+    }
+
+def sync_pool_options(pool_size, max_overflow):
+    # psycopg 3 prepares a statement server-side once it has run this many times on a connection
+    return pool_options(pool_size, max_overflow, TimedQueuePool,
+                        {'prepare_threshold': int(os.getenv('DB_PREPARE_THRESHOLD', 2))})
+
+def async_pool_options(pool_size, max_overflow):
+    # asyncpg keeps this many prepared statements per connection
+    return pool_options(pool_size, max_overflow, TimedAsyncQueuePool,
+                        {'prepared_statement_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', 256))})
 
 class Config:
     # PostgreSQL database configuration
@@ -9,8 +35,14 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', 'medilocate')
     
     # SQLAlchemy configuration
-    SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    # psycopg 3 driver: supports server-side prepared statements
+    SQLALCHEMY_DATABASE_URI = f'postgresql+psycopg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = sync_pool_options(pool_size=10, max_overflow=20)
+    
+    # Same database through an async driver, for the ASGI server (asgi.py)
+    ASYNC_DATABASE_URI = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    ASYNC_ENGINE_OPTIONS = async_pool_options(pool_size=10, max_overflow=20)
     
     # Flask configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-for-medilocate')
@@ -18,15 +50,23 @@ class Config:
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    SQLALCHEMY_ENGINE_OPTIONS = sync_pool_options(pool_size=5, max_overflow=5)
+    ASYNC_ENGINE_OPTIONS = async_pool_options(pool_size=5, max_overflow=5)
     
 class TestingConfig(Config):
     TESTING = True
     # Use SQLite for testing
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_medilocate.db'
+    ASYNC_DATABASE_URI = 'sqlite+aiosqlite:///test_medilocate.db'
+    # SQLite: default pools, no PostgreSQL driver arguments
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    ASYNC_ENGINE_OPTIONS = {}
 
 class ProductionConfig(Config):
     DEBUG = False
     SECRET_KEY = os.getenv('SECRET_KEY')  # Must be set in production
+    SQLALCHEMY_ENGINE_OPTIONS = sync_pool_options(pool_size=20, max_overflow=30)
+    ASYNC_ENGINE_OPTIONS = async_pool_options(pool_size=20, max_overflow=30)
 
 # Select configuration based on environment
 config_by_name = {
@@ -36,4 +76,8 @@ config_by_name = {
 }
 
 # Default configuration
-default_config = config_by_name['dev'] 
\ No newline at end of file
+default_config = config_by_name['dev']
+
+def get_config(name=None):
+    """Config class for `name`, or for the MEDILOCATE_CONFIG environment variable"""
+    return config_by_name[name or os.getenv('MEDILOCATE_CONFIG', 'dev')] 
\ No newline at end of file
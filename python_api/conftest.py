@@ -0,0 +1,43 @@
+import os
+import sys
+import pytest
+
+# app.py and its modules import each other as siblings; the blueprint imports python_api.*
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (os.path.dirname(API_DIR), API_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+@pytest.fixture
+def client():
+    """Test client of the in-memory app (app.py); needs the compiled native modules
+
+    The app keeps its indexes in module globals, so tests share one inventory
+    and should use names and ids of their own.
+    """
+    pytest.importorskip('medilocate')
+    import app
+    return app.app.test_client()
+
+@pytest.fixture
+def db_app():
+    """The api blueprint on an in-memory SQLite database with one pharmacy (id 1)"""
+    from flask import Flask
+    from python_api.config import TestingConfig
+    from python_api.models import db, Pharmacy
+    from python_api.routes import api, response_cache
+
+    # The blueprint's response cache is module-level: drop responses of earlier tests' databases
+    response_cache.bump()
+    app = Flask(__name__)
+    app.config.from_object(TestingConfig)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(api)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Pharmacy(name='Central', address='1 High St', latitude=51.5, longitude=-0.1))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
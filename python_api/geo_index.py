@@ -0,0 +1,155 @@
+import heapq
+import math
+import threading
+
+# Mean Earth radius used by the haversine distance
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilometres per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Grid cell size in degrees (~11 km of latitude); cells are scanned ring by ring
+CELL_DEGREES = 0.1
+
+# When at most this many pharmacies stock a medicine, measure them directly
+# instead of walking the grid
+DIRECT_SCAN_LIMIT = 512
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat, lon):
+    # Longitude in [-180, 180), so 180 and -180 share the cells the ring wrap visits
+    lon = (lon + 180.0) % 360.0 - 180.0
+    return int(math.floor(lat / CELL_DEGREES)), int(math.floor(lon / CELL_DEGREES))
+
+
+class PharmacyGrid:
+    """Fixed-size lat/lon grid of pharmacy locations for radius and k-nearest queries
+
+    - (lat cell, lon cell) -> {pharmacy id: (lat, lon)} buckets
+    - pharmacy id -> (lat, lon) for direct lookups and removals
+    """
+
+    def __init__(self):
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, pharmacy_id):
+        return pharmacy_id in self._points
+
+    def add(self, pharmacy_id, lat, lon):
+        """Index (or move) a pharmacy; ignored if it has no coordinates"""
+        if lat is None or lon is None:
+            return
+        with self._lock:
+            self._discard(pharmacy_id)
+            self._points[pharmacy_id] = (lat, lon)
+            self._cells.setdefault(_cell(lat, lon), {})[pharmacy_id] = (lat, lon)
+
+    def remove(self, pharmacy_id):
+        """Drop a pharmacy from the index if present"""
+        with self._lock:
+            self._discard(pharmacy_id)
+
+    def nearest(self, lat, lon, radius_km, k, candidates=None):
+        """Up to k (distance_km, pharmacy_id) pairs within radius_km, closest first
+
+        If `candidates` is given, only those pharmacy ids are considered.
+        """
+        with self._lock:
+            if candidates is not None and len(candidates) <= DIRECT_SCAN_LIMIT:
+                points = ((pid, self._points[pid]) for pid in candidates if pid in self._points)
+                found = [(distance, pid) for pid, (plat, plon) in points
+                         for distance in (haversine_km(lat, lon, plat, plon),)
+                         if distance <= radius_km]
+                return heapq.nsmallest(k, found)
+            return self._ring_search(lat, lon, radius_km, k, candidates)
+
+    def _ring_search(self, lat, lon, radius_km, k, candidates):
+        # Highest latitude a match can have; longitude spans widen towards it
+        cos_max = math.cos(math.radians(min(90.0, abs(lat) + radius_km / KM_PER_DEGREE)))
+        lat_rings = int(math.ceil(radius_km / (KM_PER_DEGREE * CELL_DEGREES)))
+        # Largest longitude gap within radius_km: sin(d/2R) >= cos(lat) * sin(dlon/2)
+        half_chord = math.sin(min(math.pi / 2, radius_km / (2 * EARTH_RADIUS_KM)))
+        if half_chord >= cos_max:
+            lon_rings = None
+        else:
+            lon_span = math.degrees(2 * math.asin(half_chord / cos_max))
+            lon_rings = int(math.ceil(lon_span / CELL_DEGREES))
+        lon_bounds = self._lon_bounds(lon_rings)
+
+        center_lat, center_lon = _cell(lat, lon)
+        best = []  # max-heap of (-distance, pharmacy_id), at most k entries
+        ring = 0
+        while ring <= lat_rings or ring <= max(-lon_bounds[0], lon_bounds[1]):
+            for cell in self._ring_cells(center_lat, center_lon, ring, lat_rings, lon_bounds):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for pid, (plat, plon) in bucket.items():
+                    if candidates is not None and pid not in candidates:
+                        continue
+                    distance = haversine_km(lat, lon, plat, plon)
+                    if distance > radius_km:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, pid))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, pid))
+            if len(best) == k and -best[0][0] <= self._ring_reach(ring, cos_max):
+                break
+            ring += 1
+        return sorted((-distance, pid) for distance, pid in best)
+
+    @staticmethod
+    def _lon_bounds(lon_rings):
+        """Longitude cell offsets to scan, without visiting a wrapped cell twice"""
+        lon_cells = int(round(360 / CELL_DEGREES))
+        if lon_rings is None or 2 * lon_rings + 1 >= lon_cells:
+            return -(lon_cells // 2), lon_cells - lon_cells // 2 - 1
+        return -lon_rings, lon_rings
+
+    @staticmethod
+    def _ring_reach(ring, cos_max):
+        """Distance below which every point lies within rings 0..ring"""
+        lat_km = ring * CELL_DEGREES * KM_PER_DEGREE
+        half_lon = math.radians(ring * CELL_DEGREES) / 2
+        lon_km = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, cos_max * math.sin(min(math.pi / 2, half_lon))))
+        return min(lat_km, lon_km)
+
+    @staticmethod
+    def _ring_cells(center_lat, center_lon, ring, lat_rings, lon_bounds):
+        """Cells at Chebyshev distance `ring` from the centre, clipped to the search box"""
+        lon_cells = int(round(360 / CELL_DEGREES))
+        lat_lo, lat_hi = max(-ring, -lat_rings), min(ring, lat_rings)
+        lon_lo, lon_hi = max(-ring, lon_bounds[0]), min(ring, lon_bounds[1])
+        for dlat in range(lat_lo, lat_hi + 1):
+            if abs(dlat) == ring:
+                dlons = range(lon_lo, lon_hi + 1)
+            else:
+                dlons = [d for d in (-ring, ring) if lon_lo <= d <= lon_hi]
+            for dlon in dlons:
+                # Wrap across the antimeridian
+                wrapped = (center_lon + dlon + lon_cells // 2) % lon_cells - lon_cells // 2
+                yield center_lat + dlat, wrapped
+
+    def _discard(self, pharmacy_id):
+        point = self._points.pop(pharmacy_id, None)
+        if point is None:
+            return
+        cell = _cell(*point)
+        bucket = self._cells[cell]
+        del bucket[pharmacy_id]
+        if not bucket:
+            del self._cells[cell]
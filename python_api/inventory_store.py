@@ -0,0 +1,340 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from itertools import islice
+
+# Longest n-gram kept in the name index; longer queries intersect these grams
+NGRAM_SIZE = 3
+
+
+class MedicineRecord:
+    """One inventory item, stored with __slots__ to keep per-row overhead small"""
+    __slots__ = ('id', 'name', 'brand', 'quantity', 'expiryDate', 'pharmacy_id', 'name_lower')
+
+    def __init__(self, id, name, brand, quantity, expiryDate, pharmacy_id=None):
+        self.id = id
+        self.name = name
+        self.brand = brand
+        self.quantity = quantity
+        self.expiryDate = expiryDate
+        self.pharmacy_id = pharmacy_id  # None for items added through this app
+        self.name_lower = name.lower()
+
+    def to_dict(self):
+        """Convert the record to the JSON shape used by the API"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "brand": self.brand,
+            "quantity": self.quantity,
+            "expiryDate": self.expiryDate
+        }
+
+
+def name_grams(name):
+    """All 1- to NGRAM_SIZE-character substrings of a lowercase name"""
+    grams = set()
+    for size in range(1, NGRAM_SIZE + 1):
+        for start in range(len(name) - size + 1):
+            grams.add(name[start:start + size])
+    return grams
+
+
+class InventoryStore:
+    """In-memory medicine inventory with indexes for the API's lookups
+
+    - id -> record hash index for direct access
+    - sorted id list for keyset-paged listing
+    - (quantity, id) sorted list for low-stock threshold queries
+    - (expiryDate, id) sorted list for counts by expiry window
+    - per-pharmacy item and unit totals, kept up to date on every write
+    - unit totals per lowercase name, used to rank names in the Trie
+    - n-gram -> lowercase names and name -> sorted ids maps for substring search
+    """
+
+    def __init__(self, first_id=1):
+        self._records = {}
+        self._ids = []
+        self._by_quantity = []
+        self._by_expiry = []
+        self._totals_by_pharmacy = {}
+        self._units = 0
+        self._ids_by_name = {}
+        self._units_by_name = {}
+        self._names_by_gram = {}
+        self._next_id = first_id
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def get(self, item_id):
+        """Return the record with this id, or None"""
+        return self._records.get(item_id)
+
+    @property
+    def next_id(self):
+        """Lowest id not yet used by this store"""
+        return self._next_id
+
+    def reserve_ids(self, count):
+        """Claim `count` consecutive ids for records added later; returns the first"""
+        first_id = self._next_id
+        self._next_id += count
+        return first_id
+
+    def add(self, name, brand, quantity, expiryDate, item_id=None, pharmacy_id=None):
+        """Create a record with the given id (default: the next free one) and index it"""
+        if item_id is None:
+            item_id = self.reserve_ids(1)
+        self._next_id = max(self._next_id, item_id + 1)
+        record = MedicineRecord(item_id, name, brand, quantity, expiryDate, pharmacy_id)
+        self._records[record.id] = record
+        insort(self._ids, record.id)
+        insort(self._by_quantity, (record.quantity, record.id))
+        if record.expiryDate:
+            insort(self._by_expiry, (record.expiryDate, record.id))
+        self._index_name(record)
+        self._count(record, 1)
+        return record
+
+    def add_many(self, rows, first_id=None):
+        """Create and index records for (name, brand, quantity, expiryDate) rows
+
+        Rows get consecutive ids from first_id, by default the next free ones.
+        """
+        rows = list(rows)
+        if first_id is None:
+            first_id = self.reserve_ids(len(rows))
+        self._next_id = max(self._next_id, first_id + len(rows))
+        records = []
+        for item_id, (name, brand, quantity, expiryDate) in enumerate(rows, start=first_id):
+            record = MedicineRecord(item_id, name, brand, quantity, expiryDate)
+            self._records[record.id] = record
+            self._index_name(record)
+            self._count(record, 1)
+            records.append(record)
+
+        # One sort merges the batch in: timsort finds the existing sorted run
+        self._ids.extend(record.id for record in records)
+        self._ids.sort()
+        self._by_quantity.extend((record.quantity, record.id) for record in records)
+        self._by_quantity.sort()
+        self._by_expiry.extend((record.expiryDate, record.id) for record in records if record.expiryDate)
+        self._by_expiry.sort()
+        return records
+
+    def upsert_many(self, items):
+        """Add or replace records from (id, name, brand, quantity, expiryDate, pharmacy_id) items
+
+        Returns the records that were added or changed; items identical to the
+        stored record are skipped. New records are merged into the quantity
+        index with one sort, as in add_many.
+        """
+        # An id listed twice is applied once, with its last values
+        items = {item[0]: item for item in items}.values()
+        changed = []
+        added = []
+        for item_id, name, brand, quantity, expiryDate, pharmacy_id in items:
+            record = self._records.get(item_id)
+            if record is None:
+                record = MedicineRecord(item_id, name, brand, quantity, expiryDate, pharmacy_id)
+                self._records[item_id] = record
+                self._index_name(record)
+                self._count(record, 1)
+                self._next_id = max(self._next_id, item_id + 1)
+                added.append(record)
+            elif ((record.name, record.brand, record.quantity, record.expiryDate, record.pharmacy_id)
+                  != (name, brand, quantity, expiryDate, pharmacy_id)):
+                same_item = (record.name, record.brand, record.pharmacy_id) == (name, brand, pharmacy_id)
+                if same_item and expiryDate is not None:
+                    changed.append(self.update(item_id, quantity=quantity, expiryDate=expiryDate))
+                else:
+                    self.remove(item_id)
+                    changed.append(self.add(name, brand, quantity, expiryDate, item_id, pharmacy_id))
+
+        if added:
+            self._ids.extend(record.id for record in added)
+            self._ids.sort()
+            self._by_quantity.extend((record.quantity, record.id) for record in added)
+            self._by_quantity.sort()
+            self._by_expiry.extend((record.expiryDate, record.id) for record in added if record.expiryDate)
+            self._by_expiry.sort()
+        return changed + added
+
+    def update(self, item_id, quantity=None, expiryDate=None):
+        """Change a record's quantity and/or expiry date; returns None if not found"""
+        record = self._records.get(item_id)
+        if record is None:
+            return None
+
+        if quantity is not None and quantity != record.quantity:
+            _discard(self._by_quantity, (record.quantity, record.id))
+            self._count(record, -1)
+            record.quantity = quantity
+            insort(self._by_quantity, (record.quantity, record.id))
+            self._count(record, 1)
+        if expiryDate is not None and expiryDate != record.expiryDate:
+            if record.expiryDate:
+                _discard(self._by_expiry, (record.expiryDate, record.id))
+            record.expiryDate = expiryDate
+            insort(self._by_expiry, (record.expiryDate, record.id))
+        return record
+
+    def remove(self, item_id):
+        """Delete a record and drop it from every index; returns None if not found"""
+        record = self._records.get(item_id)
+        if record is None:
+            return None
+
+        del self._ids[bisect_left(self._ids, record.id)]
+        _discard(self._by_quantity, (record.quantity, record.id))
+        if record.expiryDate:
+            _discard(self._by_expiry, (record.expiryDate, record.id))
+        self._count(record, -1)
+        ids = self._ids_by_name[record.name_lower]
+        del ids[bisect_left(ids, record.id)]
+        if not ids:
+            # Last item with this name: forget the name in the gram index too
+            del self._ids_by_name[record.name_lower]
+            del self._units_by_name[record.name_lower]
+            for gram in name_grams(record.name_lower):
+                names = self._names_by_gram[gram]
+                names.discard(record.name_lower)
+                if not names:
+                    del self._names_by_gram[gram]
+        # Last, so a reader never finds an id in an index without its record
+        del self._records[item_id]
+        return record
+
+    def page(self, after_id=None, limit=None):
+        """Up to `limit` records with ids above after_id, ordered by id"""
+        start = 0 if after_id is None else bisect_right(self._ids, after_id)
+        end = len(self._ids) if limit is None else start + limit
+        return self._records_for(self._ids[start:end])
+
+    def search(self, text, after_id=None, limit=None):
+        """Records whose name contains the text (case-insensitive), ordered by id
+
+        after_id and limit select one page, as in page(). The matching names'
+        sorted id lists are merged from after_id on and the merge stops after
+        `limit` ids, so a page costs about the same wherever it starts.
+        """
+        text = text.lower()
+        if not text:
+            return []
+
+        # Sets are copied in one call before iterating: writers may change them meanwhile
+        if len(text) <= NGRAM_SIZE:
+            names = tuple(self._names_by_gram.get(text, ()))
+        else:
+            # Intersect the posting sets, smallest first, then confirm the full substring
+            postings = sorted(
+                (self._names_by_gram.get(text[i:i + NGRAM_SIZE], set())
+                 for i in range(len(text) - NGRAM_SIZE + 1)),
+                key=len
+            )
+            names = set(postings[0]).intersection(*postings[1:])
+            names = [name for name in names if text in name]
+
+        runs = []
+        for name in names:
+            ids = self._ids_by_name.get(name)
+            if ids:
+                start = 0 if after_id is None else bisect_right(ids, after_id)
+                runs.append(_iter_from(ids, start))
+        return self._records_for(islice(heapq.merge(*runs), limit))
+
+    def low_stock(self, threshold):
+        """Records with quantity <= threshold, lowest quantity first"""
+        end = bisect_right(self._by_quantity, (threshold, float('inf')))
+        return self._records_for(item_id for _, item_id in self._by_quantity[:end])
+
+    def low_stock_count(self, threshold):
+        """Number of records with quantity <= threshold, without building them"""
+        return bisect_right(self._by_quantity, (threshold, float('inf')))
+
+    def lowest_stock(self, n):
+        """The n records with the lowest quantity, lowest first"""
+        return self._records_for(item_id for _, item_id in self._by_quantity[:n])
+
+    def expiry_counts(self, today, days):
+        """Count records by expiry date relative to today (a YYYY-MM-DD string)
+
+        Returns (expired, within) where `within` maps each number of days in
+        `days` to the records expiring between today and that many days on.
+        """
+        start = bisect_left(self._by_expiry, (today,))
+        base = date.fromisoformat(today)
+        within = {}
+        for window in days:
+            end = (base + timedelta(days=window)).isoformat()
+            within[window] = bisect_right(self._by_expiry, (end, float('inf'))) - start
+        return start, within
+
+    def totals(self):
+        """Item and unit counts overall and per pharmacy, locally added items (pharmacy None) first"""
+        by_pharmacy = sorted(self._totals_by_pharmacy.items(),
+                             key=lambda entry: (entry[0] is not None, entry[0] or 0))
+        return {
+            "items": len(self._records),
+            "units": self._units,
+            "by_pharmacy": [{"pharmacy_id": pharmacy_id, "items": items, "units": units}
+                            for pharmacy_id, (items, units) in by_pharmacy]
+        }
+
+    def name_units(self, name_lower):
+        """Total quantity of the records with this lowercase name, or None if there are none"""
+        return self._units_by_name.get(name_lower)
+
+    def _records_for(self, ids):
+        # Readers do not take the write lock: skip ids whose record was removed meanwhile
+        records = self._records
+        return [record for record in map(records.get, ids) if record is not None]
+
+    def _index_name(self, record):
+        ids = self._ids_by_name.get(record.name_lower)
+        if ids is None:
+            # First item with this name: add the name to the gram index
+            ids = self._ids_by_name[record.name_lower] = []
+            names_by_gram = self._names_by_gram
+            for gram in name_grams(record.name_lower):
+                names = names_by_gram.get(gram)
+                if names is None:
+                    names_by_gram[gram] = {record.name_lower}
+                else:
+                    names.add(record.name_lower)
+        insort(ids, record.id)
+
+    def _count(self, record, sign):
+        # Add (sign=1) or subtract (sign=-1) a record from the running totals
+        totals = self._totals_by_pharmacy.get(record.pharmacy_id)
+        if totals is None:
+            totals = self._totals_by_pharmacy[record.pharmacy_id] = [0, 0]
+        totals[0] += sign
+        totals[1] += sign * record.quantity
+        if not totals[0]:
+            del self._totals_by_pharmacy[record.pharmacy_id]
+        self._units += sign * record.quantity
+        self._units_by_name[record.name_lower] = (self._units_by_name.get(record.name_lower, 0)
+                                                  + sign * record.quantity)
+
+
+def _iter_from(items, start):
+    # iter(items[start:]) without the copy, and without islice stepping over the
+    # first items; stops early if a writer shortens the list meanwhile
+    try:
+        while True:
+            yield items[start]
+            start += 1
+    except IndexError:
+        return
+
+
+def _discard(sorted_keys, key):
+    # Remove a key from a sorted index list, if present
+    index = bisect_right(sorted_keys, key) - 1
+    if index >= 0 and sorted_keys[index] == key:
+        del sorted_keys[index]
@@ -0,0 +1,80 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+# orjson encodes several times faster than the json module; it is optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class RawJSON:
+    """Already-encoded JSON, e.g. from MinHeap.peekNJson, inserted into a response verbatim
+
+    Only supported as a value of the top-level dict passed to jsonify.
+    """
+
+    __slots__ = ('encoded',)
+
+    def __init__(self, encoded):
+        self.encoded = encoded if isinstance(encoded, bytes) else encoded.encode('utf-8')
+
+def _default(o):
+    """Types the encoders do not handle natively; dates use ISO 8601, as to_dict() does"""
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def dumps_bytes(obj, sort_keys=True):
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+def dumps_with_raw(obj, sort_keys=True):
+    """dumps_bytes, splicing top-level RawJSON values in without decoding them"""
+    if not isinstance(obj, dict) or not any(isinstance(value, RawJSON) for value in obj.values()):
+        return dumps_bytes(obj, sort_keys)
+    keys = sorted(obj) if sort_keys else obj
+    members = []
+    for key in keys:
+        value = obj[key]
+        encoded = value.encoded if isinstance(value, RawJSON) else dumps_bytes(value, sort_keys)
+        members.append(dumps_bytes(str(key)) + b':' + encoded)
+    return b'{' + b','.join(members) + b'}'
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the json module
+
+    Set with `app.json = FastJSONProvider(app)`. Responses are always compact
+    and may contain RawJSON values.
+    """
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for json.dumps options (indent, ...) get the json module
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_with_raw(obj, self.sort_keys) + b'\n',
+                                        mimetype=self.mimetype)
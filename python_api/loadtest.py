@@ -0,0 +1,104 @@
+"""Mixed search/add load generator for comparing the WSGI and ASGI servers
+
+    python -m python_api.loadtest http://localhost:5001 --clients 64 --duration 30
+    python -m python_api.loadtest http://localhost:8000 --clients 64 --duration 30
+
+Each client keeps one HTTP/1.1 connection open and sends /search_medicine
+requests, with an `--add-ratio` share of /add_medicine writes mixed in.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+# Search terms drawn at random for /search_medicine
+SEARCH_TERMS = ['amox', 'para', 'ibu', 'asp', 'cet', 'lor', 'met', 'ator', 'ome', 'cipro']
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def run_client(base, args, deadline, latencies, errors, lock):
+    """Send requests on one keep-alive connection until the deadline"""
+    rng = random.Random()
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        if rng.random() < args.add_ratio:
+            body = json.dumps({
+                'name': f'loadtest-{rng.randrange(1_000_000)}',
+                'pharmacy_id': args.pharmacy_id,
+                'quantity': rng.randrange(100),
+                'expiry_date': '2030-01-01'
+            })
+            method, path = 'POST', '/add_medicine'
+            headers = {'Content-Type': 'application/json'}
+        else:
+            body = None
+            method, path = 'GET', f'/search_medicine?name={quote(rng.choice(SEARCH_TERMS))}&limit={args.limit}'
+            headers = {}
+
+        start = time.perf_counter()
+        try:
+            conn.request(method, base.path.rstrip('/') + path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+            continue
+        local_latencies.append(time.perf_counter() - start)
+    conn.close()
+
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url', help='Server base URL, e.g. http://localhost:8000')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+    parser.add_argument('--add-ratio', type=float, default=0.1, help='Share of requests that are writes')
+    parser.add_argument('--pharmacy-id', type=int, default=1, help='Pharmacy the writes go to')
+    parser.add_argument('--limit', type=int, default=20, help='limit sent with each search')
+    args = parser.parse_args()
+
+    base = urlsplit(args.url)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    clients = [threading.Thread(target=run_client, args=(base, args, deadline, latencies, errors, lock))
+               for _ in range(args.clients)]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(json.dumps({
+        "url": args.url,
+        "clients": args.clients,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2)
+        }
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import bisect
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+from functools import wraps
+from flask import g, request
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the result-size histogram buckets
+SIZE_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000, 100000)
+
+# Rows of the cProfile summary returned by ?profile=1
+PROFILE_ROWS = 40
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format"""
+
+    def __init__(self, name, description, labelnames, buckets):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                le = ','.join(pairs + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            label_text = '{' + ','.join(pairs) + '}' if pairs else ''
+            lines.append(f"{self.name}_sum{label_text} {values[-1]}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    """The histograms of one process, exposed together at /metrics"""
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            'medilocate_http_request_duration_seconds', 'Time spent handling HTTP requests',
+            ('method', 'endpoint', 'status'), LATENCY_BUCKETS)
+        self.call_latency = Histogram(
+            'medilocate_native_call_duration_seconds', 'Time spent in Trie and MinHeap calls',
+            ('call',), LATENCY_BUCKETS)
+        self.result_size = Histogram(
+            'medilocate_result_size', 'Number of items returned by Trie and MinHeap calls',
+            ('call',), SIZE_BUCKETS)
+        self.query_latency = Histogram(
+            'medilocate_db_query_duration_seconds', 'Time spent executing SQL statements',
+            ('statement',), LATENCY_BUCKETS)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in (self.request_latency, self.call_latency, self.result_size, self.query_latency):
+            lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by app.py and the blueprint
+REGISTRY = Registry()
+
+
+class TimedProxy:
+    """Wraps a native object so every method call records its latency and result size
+
+    `medicine_trie = TimedProxy(medilocate.Trie(), 'trie')` behaves like the Trie,
+    with calls recorded under call="trie.startsWith" and so on.
+    """
+
+    def __init__(self, target, prefix, registry=REGISTRY):
+        self._target = target
+        self._prefix = prefix
+        self._registry = registry
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        call = f"{self._prefix}.{name}"
+        call_latency = self._registry.call_latency
+        result_size = self._registry.result_size
+
+        @wraps(attribute)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = attribute(*args, **kwargs)
+            call_latency.observe(time.perf_counter() - start, call)
+            if isinstance(result, list):
+                result_size.observe(len(result), call)
+            return result
+
+        self._wrapped[name] = timed
+        return timed
+
+
+def _profile_allowed(request):
+    """?profile=1 is honoured only with the admin token from MEDILOCATE_PROFILE_TOKEN"""
+    token = os.getenv('MEDILOCATE_PROFILE_TOKEN')
+    if not token or request.args.get('profile') != '1':
+        return False
+    return hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token)
+
+
+def install_metrics(target, registry=REGISTRY):
+    """Time every request of a Flask app or blueprint, and add the ?profile=1 hook"""
+    @target.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        if _profile_allowed(request):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process, and another request has it
+                return
+            g.metrics_profiler = profiler
+            # Profile the view itself, not a response cache hit
+            g.skip_response_cache = True
+
+    @target.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            registry.request_latency.observe(time.perf_counter() - start, request.method,
+                                             request.endpoint or 'unmatched', str(response.status_code))
+
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(PROFILE_ROWS)
+            response.set_data(summary.getvalue())
+            response.mimetype = 'text/plain'
+            response.headers.pop('ETag', None)
+            response.status_code = 200
+        return response
+
+    @target.teardown_request
+    def stop_profiler(exc):
+        # after_request is skipped when the view raises; never leave a profiler running
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
@@ -0,0 +1,9 @@
+-- Trigram index for substring search on medicines.name (PostgreSQL only).
+-- New databases get this from db.create_all(); run this once on existing ones:
+--   psql -d medilocate -f python_api/migrations/0001_medicine_name_trgm.sql
+-- CONCURRENTLY builds the index without blocking writes, so it cannot run inside a transaction.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_medicines_name_trgm
+    ON medicines USING gin (name gin_trgm_ops);
@@ -0,0 +1,14 @@
+-- updated_at column for the incremental catalogue refresh (catalog_loader.py).
+-- New databases get this from db.create_all(); run this once on existing ones:
+--   psql -d medilocate -f python_api/migrations/0002_medicine_updated_at.sql
+-- CONCURRENTLY builds the index without blocking writes, so it cannot run inside a transaction.
+
+ALTER TABLE medicines ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+
+-- Existing rows count as last changed when they were created
+UPDATE medicines SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL;
+
+ALTER TABLE medicines ALTER COLUMN updated_at SET DEFAULT now();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_medicines_updated_at_id
+    ON medicines (updated_at, id);
@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, and_, event, or_, select, tuple_
+from sqlalchemy.orm import configure_mappers
 from sqlalchemy.sql import func
 from datetime import datetime
 
@@ -36,6 +38,13 @@ class Pharmacy(db.Model):
 class Medicine(db.Model):
     """Medicine model representing medicines in the database"""
     __tablename__ = 'medicines'
+    __table_args__ = (
+        # Trigram GIN index: lets PostgreSQL serve ILIKE '%name%' and similarity() from an index
+        db.Index('ix_medicines_name_trgm', 'name',
+                 postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        # Keyset index for incremental refresh: rows changed after a (updated_at, id) mark
+        db.Index('ix_medicines_updated_at_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, index=True)
@@ -43,6 +52,8 @@ class Medicine(db.Model):
     quantity = db.Column(db.Integer, default=0)
     pharmacy_id = db.Column(db.Integer, db.ForeignKey('pharmacies.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=func.now())
+    # Set on every insert and update; the in-memory app's catalogue refresh pages on (updated_at, id)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
     
     def __repr__(self):
         return f"<Medicine {self.name}>"
@@ -57,4 +68,85 @@ class Medicine(db.Model):
             'pharmacy_id': self.pharmacy_id,
             'pharmacy_name': self.pharmacy.name if self.pharmacy else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        } 
\ No newline at end of file
+        }
+    
+    @classmethod
+    def search_page(cls, name, limit, after=None):
+        """One page of search results as to_dict()-shaped rows, dates left as date objects for
+        the JSON encoder. Returns (rows, next_after); next_after is None on the last page."""
+        query = cls.search_rows_query(name, limit + 1, db.engine.dialect.name, after)
+        return cls.split_search_page(db.session.execute(query).mappings(), limit)
+    
+    @staticmethod
+    def split_search_page(rows, limit):
+        """Rows of a search_rows_query fetched with limit + 1, as (rows, next_after)"""
+        rows = [dict(row) for row in rows]
+        next_after = None
+        if len(rows) > limit:
+            del rows[limit:]
+            next_after = (rows[-1]['rank'], rows[-1]['name'], rows[-1]['id'])
+        for row in rows:
+            del row['rank']
+        return rows, next_after
+    
+    @classmethod
+    def search_rows_query(cls, name, limit, dialect_name, after=None):
+        """Medicines whose name contains `name` (case-insensitive), best matches first, as the
+        to_dict() fields and the `rank` in plain columns, without ORM objects; shared with the
+        async server (asgi.py)
+
+        `after` is the (rank, name, id) of the last row of the previous page:
+        the page continues from it by keyset instead of skipping rows with OFFSET.
+        """
+        rank, descending = cls._name_rank(name, dialect_name)
+        query = select(*cls._row_columns(), rank.label('rank')).outerjoin(cls.pharmacy).where(
+            cls._name_filter(name))
+        if after is not None:
+            last_rank, last_name, last_id = after
+            later_rank = rank < last_rank if descending else rank > last_rank
+            query = query.where(or_(later_rank, and_(rank == last_rank,
+                                                     tuple_(cls.name, cls.id) > tuple_(last_name, last_id))))
+        return query.order_by(rank.desc() if descending else rank, cls.name, cls.id).limit(limit)
+    
+    @classmethod
+    def list_rows_query(cls, name=None, after_id=None, limit=None):
+        """Medicines in id order as to_dict()-shaped rows, optionally filtered by a name
+        substring, continuing after the row with id `after_id` (keyset pagination)"""
+        query = select(*cls._row_columns()).outerjoin(cls.pharmacy).order_by(cls.id)
+        if name:
+            query = query.where(cls._name_filter(name))
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+        return query.limit(limit) if limit is not None else query
+    
+    @classmethod
+    def _row_columns(cls):
+        return (cls.id, cls.name, cls.expiry_date, cls.quantity, cls.pharmacy_id,
+                Pharmacy.name.label('pharmacy_name'), cls.created_at)
+    
+    @classmethod
+    def _name_filter(cls, name):
+        # Escape LIKE wildcards so user input is matched literally
+        escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return cls.name.ilike(f'%{escaped}%', escape='\\')
+    
+    @classmethod
+    def _name_rank(cls, name, dialect_name):
+        """Similarity of each matching name to the query, and whether higher is better"""
+        if dialect_name == 'postgresql':
+            # Rank by trigram similarity (pg_trgm)
+            return func.similarity(cls.name, name), True
+        # SQLite fallback: every row already contains the query, so the
+        # shortest names are the most similar, as with trigram similarity
+        return func.length(cls.name), False
+
+# pg_trgm must exist before the trigram index on medicines can be created
+event.listen(
+    Medicine.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+# Set up relationships now: the Medicine.pharmacy backref joined by search_rows_query and
+# list_rows_query otherwise only exists after the first query, and concurrent first requests can miss it
+configure_mappers()
@@ -0,0 +1,22 @@
+import base64
+import json
+from python_api.json_provider import dumps_bytes
+
+def encode_cursor(*values):
+    """Opaque `after` token holding the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(dumps_bytes(list(values))).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    """Sort key from an encode_cursor token; ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid after cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid after cursor")
+    return values
+
+def json_lines(rows):
+    """Encode row mappings as JSON lines, one chunk per row, for a streamed response"""
+    for row in rows:
+        yield dumps_bytes(dict(row), sort_keys=False) + b'\n'
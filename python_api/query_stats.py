@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from python_api.metrics import REGISTRY
+
+# Counters currently collecting statements in this context (nested blocks all count)
+_active_counters = ContextVar('active_query_counters', default=())
+
+class QueryCounter:
+    """Number and text of SQL statements executed while the counter is active"""
+    
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+def start_counter():
+    """Start counting statements in the current context; returns (counter, token)"""
+    counter = QueryCounter()
+    return counter, _active_counters.set(_active_counters.get() + (counter,))
+
+def stop_counter(token):
+    """Stop the counter started with the given token"""
+    _active_counters.reset(token)
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed inside the block, e.g. to assert a fixed query budget:
+    
+        with count_queries() as counter:
+            client.get('/search_medicine?name=amox')
+        assert counter.count == 1
+    """
+    counter, token = start_counter()
+    try:
+        yield counter
+    finally:
+        stop_counter(token)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters.get():
+        counter.count += 1
+        counter.statements.append(statement)
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    # Label by statement type only, so the number of series stays small
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+    if kind not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE'):
+        kind = 'OTHER'
+    REGISTRY.query_latency.observe(time.perf_counter() - starts.pop(), kind)
+
+@event.listens_for(Engine, 'handle_error')
+def _drop_failed_statement(context):
+    # after_cursor_execute is skipped when a statement raises; drop its start time too
+    if context.connection is not None and context.execution_context is not None:
+        starts = context.connection.info.get('query_start')
+        if starts:
+            starts.pop()
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, make_response, request
+
+# Responses kept before the least recently used one is evicted
+DEFAULT_MAX_ENTRIES = 1024
+
+# Seconds an entry may be served without a write; bounds staleness from
+# changes made outside this process (other workers, CLI imports)
+DEFAULT_TTL = 60
+
+
+class ResponseCache:
+    """LRU + TTL cache of successful JSON GET responses, keyed by path and query
+
+    Write routes call bump() to advance the generation counter, which drops
+    every cached response. Responses carry a content ETag and honour
+    If-None-Match with 304 Not Modified, whether or not they came from the cache.
+    A request that sets g.skip_response_cache (e.g. ?profile=1) bypasses it.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bump(self):
+        """Invalidate every cached response after a write"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def cached(self, view):
+        """Decorator serving a view from the cache (place it under @route)"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if g.get('skip_response_cache'):
+                return view(*args, **kwargs)
+
+            # Parameter order does not matter: ?a=1&b=2 and ?b=2&a=1 share an entry
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = self._get(key)
+            if entry is not None:
+                body, etag = entry
+                response = current_app.response_class(body, mimetype='application/json')
+            else:
+                # Read the generation first so a write racing this request
+                # leaves the result unservable instead of caching stale data
+                generation = self.generation
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or not response.is_json:
+                    return response
+                etag = hashlib.sha1(response.get_data()).hexdigest()
+                self._put(key, generation, response.get_data(), etag)
+
+            response.set_etag(etag)
+            # Let clients keep the body but revalidate it with If-None-Match
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            generation, expires, body, etag = entry
+            if generation != self.generation or expires < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body, etag
+
+    def _put(self, key, generation, body, etag):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (generation, time.monotonic() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,6 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, g, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
 from python_api.models import db, Medicine, Pharmacy
+from python_api.query_stats import start_counter, stop_counter
+from python_api.bulk_ingest import DEFAULT_CHUNK_SIZE, decode_lines, ingest_medicines, iter_records
+from python_api.geo_index import PharmacyGrid
+from python_api.json_provider import FastJSONProvider
+from python_api.pagination import decode_cursor, encode_cursor, json_lines
+from python_api.pool_metrics import pool_status
+from python_api.metrics import REGISTRY, install_metrics
+from python_api.response_cache import ResponseCache
+from sqlalchemy.sql import func
+import click
+import json
 import logging
 
 # Initialize logger
@@ -8,6 +20,52 @@ logger = logging.getLogger(__name__)
 
 # Create a Blueprint for API routes
 api = Blueprint('api', __name__)
+install_metrics(api)  # Request latency histograms and the ?profile=1 hook
+
+@api.record_once
+def use_fast_json(state):
+    """Medicine.search_page leaves dates to the JSON provider; use ours unless the app picked one"""
+    if type(state.app.json) is DefaultJSONProvider:
+        state.app.json = FastJSONProvider(state.app)
+
+# Default and maximum number of rows returned by /search_medicine
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+# Default and maximum page size of /medicines; format=jsonl streams every row instead
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000
+
+# Rows fetched from the database cursor at a time while streaming format=jsonl
+STREAM_BATCH_SIZE = 1000
+
+# Default and maximum search radius (km) and result count for /nearby
+DEFAULT_NEARBY_RADIUS_KM = 10
+MAX_NEARBY_RADIUS_KM = 500
+DEFAULT_NEARBY_K = 10
+MAX_NEARBY_K = 100
+
+# Cached GET responses; every write route bumps the cache generation
+response_cache = ResponseCache()
+
+@api.before_request
+def start_query_count():
+    """Count SQL statements issued while handling each request"""
+    g.query_counter, g.query_counter_token = start_counter()
+
+@api.after_request
+def add_query_count_header(response):
+    """Expose the statement count in debug/testing so N+1 regressions are visible"""
+    counter = g.pop('query_counter', None)
+    if counter is not None and (current_app.debug or current_app.testing):
+        response.headers['X-Query-Count'] = str(counter.count)
+    return response
+
+@api.teardown_request
+def stop_query_count(exc):
+    token = g.pop('query_counter_token', None)
+    if token is not None:
+        stop_counter(token)
 
 @api.route('/', methods=['GET'])
 def api_info():
@@ -16,10 +74,14 @@ def api_info():
         "name": "Medilocate API",
         "version": "1.0.0",
         "endpoints": {
-            "search_medicine": "/search_medicine?name=<medicine name>",
+            "search_medicine": "/search_medicine?name=<medicine name>&limit=<n>&after=<next_cursor>",
+            "medicines": "/medicines?name=<filter>&limit=<n>&after=<next_cursor>&format=<json|jsonl>",
             "add_medicine": "/add_medicine (POST)",
+            "bulk_add_medicines": "/bulk_add_medicines?format=<csv|jsonl> (POST)",
             "add_pharmacy": "/add_pharmacy (POST)",
-            "health": "/health"
+            "nearby": "/nearby?medicine=<name>&lat=<lat>&lon=<lon>&radius=<km>&k=<n>",
+            "health": "/health",
+            "metrics": "/metrics"
         },
         "example": "/search_medicine?name=aspirin"
     })
@@ -63,6 +125,7 @@ def add_medicine():
         # Add to database
         db.session.add(medicine)
         db.session.commit()
+        response_cache.bump()
         
         return jsonify({
             "status": "success",
@@ -74,7 +137,58 @@ def add_medicine():
         logger.error(f"Database error when adding medicine: {str(e)}")
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
+@api.route('/bulk_add_medicines', methods=['POST'])
+def bulk_add_medicines():
+    """Bulk-load medicines from a CSV or JSON-lines body (or an uploaded file)"""
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'jsonl' if 'json' in request.mimetype else 'csv'
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+    chunk_size = max(1, request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int))
+    
+    # Read the body line by line instead of buffering the whole feed
+    if request.mimetype == 'multipart/form-data':
+        if 'file' not in request.files:
+            return jsonify({"error": "No file part"}), 400
+        lines = decode_lines(request.files['file'].stream)
+    else:
+        lines = decode_lines(request.stream)
+    
+    try:
+        summary = ingest_medicines(iter_records(lines, fmt), chunk_size)
+    except UnicodeDecodeError:
+        return jsonify({"error": "Body must be UTF-8 encoded"}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Database error during bulk medicine load: {str(e)}")
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+    finally:
+        # Chunks before a failure are already committed
+        response_cache.bump()
+    
+    result = summary.to_dict()
+    result["status"] = "success" if summary.failed == 0 else "partial"
+    return jsonify(result)
+
+@api.cli.command('import-medicines')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']),
+              help='Input format (default: from the file extension)')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Rows per insert batch and transaction')
+def import_medicines_command(path, fmt, chunk_size):
+    """Bulk-load medicines from a CSV or JSON-lines file"""
+    if fmt is None:
+        fmt = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    
+    with open(path, encoding='utf-8', newline='') as f:
+        summary = ingest_medicines(iter_records(f, fmt), max(1, chunk_size))
+    
+    click.echo(json.dumps(summary.to_dict(), indent=2))
+
 @api.route('/search_medicine', methods=['GET'])
+@response_cache.cached
 def search_medicine():
     """Search for medicines by name (case-insensitive)"""
     name = request.args.get('name', '').lower()
@@ -82,22 +196,78 @@ def search_medicine():
     if not name:
         return jsonify({"error": "No name parameter provided"}), 400
     
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    
+    after = request.args.get('after')
+    if after:
+        try:
+            after = decode_cursor(after, 3)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    
     try:
-        # Search for medicines in the database
-        medicines = Medicine.query.filter(Medicine.name.ilike(f'%{name}%')).all()
-        
-        # Convert to list of dictionaries
-        results = [medicine.to_dict() for medicine in medicines]
+        # Search for medicines in the database, most similar names first, as plain
+        # rows: no ORM objects, and the dates are encoded by the JSON provider.
+        # Later pages continue from the last row's sort key (keyset pagination)
+        results, next_after = Medicine.search_page(name, limit, after or None)
         
         return jsonify({
             "query": name,
             "results": results,
-            "count": len(results)
+            "count": len(results),
+            "next_cursor": encode_cursor(*next_after) if next_after else None
         })
     except Exception as e:
         logger.error(f"Database error when searching medicines: {str(e)}")
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
+@api.route('/medicines', methods=['GET'])
+@response_cache.cached
+def list_medicines():
+    """List medicines in id order, optionally filtered by name, one page at a time
+    
+    format=jsonl streams every matching row as JSON lines instead, read from
+    the database in batches, so large exports never sit in memory.
+    """
+    name = request.args.get('name', '').lower()
+    after = request.args.get('after')
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            return jsonify({"error": "Invalid after cursor"}), 400
+    
+    if request.args.get('format') == 'jsonl':
+        query = Medicine.list_rows_query(name, after).execution_options(yield_per=STREAM_BATCH_SIZE)
+        try:
+            rows = db.session.execute(query).mappings()
+        except Exception as e:
+            logger.error(f"Database error when listing medicines: {str(e)}")
+            return jsonify({"error": f"Database error: {str(e)}"}), 500
+        return Response(stream_with_context(json_lines(rows)), mimetype='application/x-ndjson')
+    
+    limit = request.args.get('limit', DEFAULT_LIST_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIST_LIMIT))
+    
+    try:
+        query = Medicine.list_rows_query(name, after, limit + 1)
+        results = [dict(row) for row in db.session.execute(query).mappings()]
+    except Exception as e:
+        logger.error(f"Database error when listing medicines: {str(e)}")
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+    
+    next_cursor = None
+    if len(results) > limit:
+        del results[limit:]
+        next_cursor = results[-1]['id']
+    
+    return jsonify({
+        "results": results,
+        "count": len(results),
+        "next_cursor": next_cursor
+    })
+
 @api.route('/add_pharmacy', methods=['POST'])
 def add_pharmacy():
     """Add a new pharmacy to the database"""
@@ -124,6 +294,12 @@ def add_pharmacy():
         # Add to database
         db.session.add(pharmacy)
         db.session.commit()
+        response_cache.bump()
+        
+        # Keep the spatial index in step without rebuilding it
+        grid = current_app.extensions.get('pharmacy_grid')
+        if grid is not None:
+            grid.add(pharmacy.id, pharmacy.latitude, pharmacy.longitude)
         
         return jsonify({
             "status": "success",
@@ -135,6 +311,79 @@ def add_pharmacy():
         logger.error(f"Database error when adding pharmacy: {str(e)}")
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
+def pharmacy_grid():
+    """The app's pharmacy spatial index, built from the pharmacies table on first use"""
+    grid = current_app.extensions.get('pharmacy_grid')
+    if grid is None:
+        grid = PharmacyGrid()
+        rows = db.session.query(Pharmacy.id, Pharmacy.latitude, Pharmacy.longitude).filter(
+            Pharmacy.latitude.isnot(None), Pharmacy.longitude.isnot(None))
+        for pharmacy_id, latitude, longitude in rows:
+            grid.add(pharmacy_id, latitude, longitude)
+        current_app.extensions['pharmacy_grid'] = grid
+    return grid
+
+@api.route('/nearby', methods=['GET'])
+@response_cache.cached
+def nearby():
+    """Nearest pharmacies to a point, optionally only those stocking a medicine"""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None:
+        return jsonify({"error": "lat and lon are required numbers"}), 400
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({"error": "lat must be within [-90, 90] and lon within [-180, 180]"}), 400
+    
+    radius = request.args.get('radius', DEFAULT_NEARBY_RADIUS_KM, type=float)
+    radius = max(0.0, min(radius, MAX_NEARBY_RADIUS_KM))
+    k = request.args.get('k', DEFAULT_NEARBY_K, type=int)
+    k = max(1, min(k, MAX_NEARBY_K))
+    medicine = request.args.get('medicine', '').strip().lower()
+    
+    try:
+        stock = None
+        if medicine:
+            # Pharmacies with the medicine in stock, and how much each holds
+            stock = dict(
+                db.session.query(Medicine.pharmacy_id, func.sum(Medicine.quantity))
+                .filter(Medicine.name == medicine, Medicine.quantity > 0)
+                .group_by(Medicine.pharmacy_id)
+            )
+        
+        matches = pharmacy_grid().nearest(lat, lon, radius, k, candidates=stock)
+        pharmacies = {}
+        if matches:
+            ids = [pharmacy_id for _, pharmacy_id in matches]
+            pharmacies = {p.id: p for p in Pharmacy.query.filter(Pharmacy.id.in_(ids))}
+        
+        results = []
+        for distance, pharmacy_id in matches:
+            pharmacy = pharmacies.get(pharmacy_id)
+            if pharmacy is None:
+                continue
+            result = pharmacy.to_dict()
+            result['distance_km'] = round(distance, 3)
+            if stock is not None:
+                result['quantity'] = stock[pharmacy_id]
+            results.append(result)
+        
+        return jsonify({
+            "medicine": medicine or None,
+            "lat": lat,
+            "lon": lon,
+            "radius_km": radius,
+            "results": results,
+            "count": len(results)
+        })
+    except Exception as e:
+        logger.error(f"Database error when finding nearby pharmacies: {str(e)}")
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Request and SQL latency histograms in Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -146,12 +395,14 @@ def health_check():
             "status": "healthy",
             "database": "connected",
             "pharmacies_count": pharmacies_count,
-            "medicines_count": medicines_count
+            "medicines_count": medicines_count,
+            "pool": pool_status(db.engine)
         })
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         return jsonify({
             "status": "unhealthy",
             "database": "disconnected",
-            "error": str(e)
+            "error": str(e),
+            "pool": pool_status(db.engine)
         }), 500 
\ No newline at end of file
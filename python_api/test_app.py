@@ -0,0 +1,212 @@
+import io
+import json
+import pytest
+
+def test_add_name_validates_weight(client):
+    assert client.post('/add', json={'medicine': 'testoprazole', 'weight': 'abc'}).status_code == 400
+    assert client.post('/add', json={'medicine': ['x']}).status_code == 400
+    assert client.post('/add', json={'medicine': 'testoprazole', 'weight': 7}).json['status'] == 'success'
+    assert client.get('/search?query=testop').json['results'] == ['testoprazole']
+
+def test_update_validates_fields(client):
+    item = client.post('/add_medicine_item', json={'name': 'Updatol', 'brand': 'B', 'quantity': 5,
+                                                   'expiryDate': '2031-01-01'}).json['medicine']
+    url = f"/update_medicine_item/{item['id']}"
+    for body in ({'quantity': None}, {'quantity': 'x'}, {'expiryDate': 5}, {'expiryDate': ''},
+                 {'expiryDate': '01/02/2031'}):
+        assert client.put(url, json=body).status_code == 400
+    assert client.put(url, json={'quantity': 9}).json['medicine'] == dict(item, quantity=9)
+
+def test_update_item_without_expiry_date(client):
+    import app
+    with app.write_lock:
+        record = app.inventory.add('Nodatium', '', 4, None)
+    url = f'/update_medicine_item/{record.id}'
+
+    assert client.put(url, json={'quantity': 2}).json['medicine']['quantity'] == 2
+    assert not app.expiry_tracker.contains(record.id)
+
+    # Gaining an expiry date puts the item into the heap
+    assert client.put(url, json={'expiryDate': '2031-02-03'}).status_code == 200
+    assert app.expiry_tracker.contains(record.id)
+    page = client.get('/expiring_medicines?before=2031-02-03&limit=1000').json['results']
+    assert any(m['id'] == record.id for m in page)
+
+def test_batch_search_answers_every_query_in_order(client):
+    queries = ['aspirin', 'ASPIRIN', {'query': 'aspirin', 'mode': 'prefix', 'limit': 1},
+               {'query': 'metformn', 'mode': 'fuzzy'}]
+    response = client.post('/search/batch', json={'queries': queries})
+
+    assert response.json['count'] == 4
+    assert [(r['query'], r['search_type']) for r in response.json['results']] == [
+        ('aspirin', 'exact'), ('aspirin', 'exact'), ('aspirin', 'prefix'), ('metformn', 'fuzzy')]
+    assert response.json['results'][3]['results'] == ['metformin']
+
+def test_batch_search_rejects_bad_entries(client):
+    for body in ({}, {'queries': []}, {'queries': [5]}, {'queries': [{'query': 'a', 'mode': ['fuzzy']}]},
+                 {'queries': [{'query': 'a', 'mode': {'x': 1}}]}, {'queries': [{'query': 'a', 'mode': 'best'}]},
+                 {'queries': [{'query': 'a', 'limit': 'ten'}]}, {'queries': ['a'] * 51}):
+        assert client.post('/search/batch', json=body).status_code == 400
+
+def test_catalogue_rows_never_replace_local_items(client):
+    import app
+    item = client.post('/add_medicine_item', json={'name': 'Localin', 'brand': 'B', 'quantity': 5,
+                                                   'expiryDate': '2031-01-01'}).json['medicine']
+    with app.write_lock:
+        reserved = app.CATALOG_LOCAL_ID_START + item['id']
+        assert app.apply_upsert_items([(reserved, 'Clash', '', 1, None, 1)]) == 0
+    assert app.inventory.get(reserved) is None
+    assert app.inventory.get(item['id']).name == 'Localin'
+
+def test_medicines_pages_follow_the_cursor(client):
+    for i in range(5):
+        client.post('/add_medicine_item', json={'name': f'Pagerin {i % 2}', 'brand': 'B', 'quantity': i,
+                                                'expiryDate': '2031-01-01'})
+    ids, after = [], ''
+    while True:
+        body = client.get(f'/medicines?name=pagerin&limit=2{after}').json
+        ids += [m['id'] for m in body['results']]
+        if body['next_cursor'] is None:
+            break
+        after = f"&after={body['next_cursor']}"
+
+    assert len(ids) == 5 and ids == sorted(ids)
+    lines = client.get('/medicines?name=pagerin&format=jsonl').get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == ids
+    assert client.get('/medicines?after=x').status_code == 400
+
+def test_dashboard_totals_by_pharmacy(client):
+    import app
+    before = client.get('/dashboard').json['totals']
+    with app.write_lock:
+        app.apply_upsert_items([(900001, 'Dashbin', '', 3, None, 7), (900002, 'Dashbin', '', 4, None, 7)])
+    totals = client.get('/dashboard').json['totals']
+
+    assert totals['items'] == before['items'] + 2
+    assert {'pharmacy_id': 7, 'items': 2, 'units': 7} in totals['by_pharmacy']
+    assert totals['by_pharmacy'][0]['pharmacy_id'] is None
+
+def test_change_log_replay_holds_the_write_lock(client, monkeypatch):
+    import app
+
+    class Feed:
+        def catch_up(self, apply):
+            held.append(app.write_lock.locked())
+
+    held = []
+    monkeypatch.setattr(app, 'change_feed', Feed())
+    assert client.get('/ping').status_code == 200
+    assert held == [True]
+
+def upload(client, text, filename='meds.csv'):
+    body = text.encode('utf-8') if isinstance(text, str) else text
+    return client.post('/upload_medicines', data={'file': (io.BytesIO(body), filename)},
+                       content_type='multipart/form-data')
+
+def csv_rows(names, quantity='5'):
+    return ''.join(f'{name},B,{quantity},2031-01-01\n' for name in names)
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Chunks of 3 rows; records the size of each batch the upload adds"""
+    import app
+    sizes = []
+    add_medicine_batch = app.add_medicine_batch
+
+    def record(rows):
+        rows = list(rows)
+        if rows:
+            sizes.append(len(rows))
+        return add_medicine_batch(rows)
+
+    monkeypatch.setattr(app, 'UPLOAD_CHUNK_SIZE', 3)
+    monkeypatch.setattr(app, 'add_medicine_batch', record)
+    return sizes
+
+def test_upload_adds_rows_in_chunks(client, batches):
+    names = [f'Chunkol {i}' for i in range(7)]
+    response = upload(client, 'name,brand,quantity,expiryDate\n' + csv_rows(names))
+
+    assert response.json['status'] == 'success' and response.json['inserted'] == 7
+    assert batches == [3, 3, 1]
+    ids = [m['id'] for m in client.get('/medicines?name=chunkol').json['results']]
+    assert len(ids) == 7 and ids == list(range(ids[0], ids[0] + 7))
+
+def test_upload_skips_a_bad_row_inside_a_chunk(client, batches):
+    text = ('name,brand,quantity,expiryDate\n' + csv_rows(['Midrow 0']) + 'Midrow 1,B,many,2031-01-01\n'
+            + csv_rows(['Midrow 2', 'Midrow 3']) + 'Midrow 4,B,1,31/01/2031\n')
+    response = upload(client, text)
+
+    assert response.json['status'] == 'partial'
+    assert (response.json['inserted'], response.json['failed']) == (3, 2)
+    assert [e['row'] for e in response.json['errors']] == [2, 5]
+    assert batches == [3]
+    names = [m['name'] for m in client.get('/medicines?name=midrow').json['results']]
+    assert names == ['Midrow 0', 'Midrow 2', 'Midrow 3']
+
+def test_upload_caps_the_error_list(client, batches, monkeypatch):
+    import app
+    monkeypatch.setattr(app, 'MAX_UPLOAD_ERRORS', 2)
+    text = 'name,brand,quantity,expiryDate\n' + csv_rows([f'Capped {i}' for i in range(5)], quantity='x')
+    response = upload(client, text)
+
+    assert (response.json['inserted'], response.json['failed']) == (0, 5)
+    assert [e['row'] for e in response.json['errors']] == [1, 2]
+
+def test_upload_rejects_bad_files(client, batches):
+    assert upload(client, 'name,brand\nx,y\n').status_code == 400
+    assert upload(client, csv_rows(['x']), filename='meds.txt').status_code == 400
+    assert upload(client, b'\xff\xfe').status_code == 400
+
+    # Chunks before an undecodable line are kept
+    text = ('name,brand,quantity,expiryDate\n' + csv_rows([f'Halfway {i}' for i in range(4)])).encode()
+    response = upload(client, text + b'\xff,B,1,2031-01-01\n')
+    assert response.status_code == 400
+    assert response.json['inserted'] == 3
+
+def test_upload_goes_through_the_change_log(client, batches, monkeypatch, tmp_path):
+    import app
+    from change_feed import ChangeFeed
+    monkeypatch.setattr(app, 'change_feed', ChangeFeed(str(tmp_path / 'changes.db')))
+    names = [f'Logged {i}' for i in range(4)]
+    response = upload(client, 'name,brand,quantity,expiryDate\n' + csv_rows(names))
+    assert response.json['inserted'] == 4
+
+    # Another worker replaying the log sees both batches, with the ids this worker used
+    replayed = []
+    ChangeFeed(str(tmp_path / 'changes.db')).catch_up(lambda kind, payload: replayed.append((kind, payload)))
+    assert [(kind, len(payload['rows'])) for kind, payload in replayed] == [('add_items', 3), ('add_items', 1)]
+    ids = [m['id'] for m in client.get('/medicines?name=logged').json['results']]
+    assert [payload['first_id'] for _, payload in replayed] == [ids[0], ids[3]]
+
+def test_trie_ranks_names_by_total_stock(client):
+    import app
+    items = [client.post('/add_medicine_item', json={'name': name, 'brand': 'B', 'quantity': quantity,
+                                                     'expiryDate': '2031-01-01'}).json['medicine']
+             for name, quantity in [('Rankolin', 3), ('Rankolin', 4), ('Rankozyme', 5)]]
+    assert app.medicine_trie.topK('ranko', 2) == ['rankolin', 'rankozyme']
+
+    # One item's new count changes the name's total, not the whole ranking
+    client.put(f"/update_medicine_item/{items[0]['id']}", json={'quantity': 0})
+    assert app.medicine_trie.topK('ranko', 2) == ['rankozyme', 'rankolin']
+
+    # The name stays searchable until its last item is deleted
+    client.delete(f"/delete_medicine_item/{items[1]['id']}")
+    assert client.get('/search?query=rankolin').json['results'] == ['rankolin']
+    client.delete(f"/delete_medicine_item/{items[0]['id']}")
+    assert client.get('/search?query=rankol').json['results'] == []
+    assert app.medicine_trie.topK('ranko', 2) == ['rankozyme']
+
+def test_renamed_catalogue_item_leaves_its_old_name(client):
+    import app
+    with app.write_lock:
+        app.apply_upsert_items([(900021, 'Oldnamol', '', 3, None, 1)])
+        assert app.medicine_trie.search('oldnamol')
+        app.apply_upsert_items([(900021, 'Newnamol', '', 3, None, 1)])
+    assert not app.medicine_trie.search('oldnamol')
+    assert app.medicine_trie.search('newnamol')
+
+def test_metrics_share_one_registry_with_the_blueprint(client):
+    import app
+    from python_api import query_stats, routes
+    assert app.REGISTRY is query_stats.REGISTRY is routes.REGISTRY
@@ -0,0 +1,119 @@
+import json
+from sqlalchemy import create_engine, insert
+from python_api.models import db, Pharmacy
+import pytest
+
+@pytest.fixture
+def asgi_client(tmp_path, monkeypatch):
+    """Test client of the ASGI server on a SQLite file with two pharmacies (ids 1 and 2)"""
+    pytest.importorskip('medilocate')
+    pytest.importorskip('greenlet')
+    pytest.importorskip('aiosqlite')
+    monkeypatch.setenv('MEDILOCATE_CONFIG', 'test')
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from starlette.testclient import TestClient
+    from python_api import asgi
+
+    path = tmp_path / 'asgi.db'
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Pharmacy), [
+            {'id': 1, 'name': 'Central', 'address': '1 High St', 'latitude': 51.5, 'longitude': -0.1},
+            {'id': 2, 'name': 'North', 'address': '2 Hill Rd', 'latitude': 51.6, 'longitude': -0.1}])
+    engine.dispose()
+
+    async_engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    monkeypatch.setattr(asgi, 'engine', async_engine)
+    monkeypatch.setattr(asgi, 'Session', async_sessionmaker(async_engine, expire_on_commit=False))
+    with TestClient(asgi.app) as client:
+        yield client
+
+def add(client, name, pharmacy_id=1, quantity=1, **fields):
+    return client.post('/add_medicine', json=dict(fields, name=name, pharmacy_id=pharmacy_id, quantity=quantity))
+
+def test_add_medicine_is_searchable(asgi_client):
+    response = add(asgi_client, 'Asgicillin', expiry_date='2031-01-01')
+    assert response.status_code == 201
+    assert response.json()['medicine']['pharmacy_name'] == 'Central'
+
+    assert asgi_client.get('/search?query=asgic').json()['results'] == ['asgicillin']
+    body = asgi_client.get('/search_medicine?name=asgic').json()
+    assert [m['expiry_date'] for m in body['results']] == ['2031-01-01']
+
+    assert add(asgi_client, 'x', pharmacy_id=99).status_code == 404
+    assert add(asgi_client, 'x', expiry_date='01/01/2031').status_code == 400
+    assert asgi_client.post('/add_medicine', json={'name': 'x'}).status_code == 400
+    assert asgi_client.get('/search').status_code == 400
+    assert asgi_client.get('/search_medicine?name=a&after=junk').status_code == 400
+
+def test_bulk_add_reports_row_errors_and_indexes_names(asgi_client):
+    body = 'name,pharmacy_id,quantity\nbulkamine,1,4\n,1,2\nbulkol,9,1\nbulkadol,2,x\nbulkitin,2,3\n'
+    response = asgi_client.post('/bulk_add_medicines?chunk_size=1', content=body,
+                                headers={'Content-Type': 'text/csv'})
+
+    assert response.json()['status'] == 'partial'
+    assert (response.json()['inserted'], response.json()['failed']) == (2, 3)
+    assert [e['row'] for e in response.json()['errors']] == [2, 3, 4]
+    assert asgi_client.get('/search?query=bulk').json()['results'] == ['bulkamine', 'bulkitin']
+
+    lines = '{"name": "jsonolol", "pharmacy_id": 1}\nnot json\n'
+    response = asgi_client.post('/bulk_add_medicines', content=lines,
+                                headers={'Content-Type': 'application/x-ndjson'})
+    assert (response.json()['inserted'], response.json()['failed']) == (1, 1)
+    assert asgi_client.post('/bulk_add_medicines?format=xml', content='').status_code == 400
+
+def test_medicines_pages_and_stream_agree(asgi_client):
+    for name in ['pagerol', 'pagerol syrup', 'other', 'pagerol gel']:
+        add(asgi_client, name)
+    ids, after = [], ''
+    while True:
+        body = asgi_client.get(f'/medicines?name=pagerol&limit=2{after}').json()
+        ids += [m['id'] for m in body['results']]
+        if body['next_cursor'] is None:
+            break
+        after = f"&after={body['next_cursor']}"
+
+    assert len(ids) == 3 and ids == sorted(ids)
+    lines = asgi_client.get('/medicines?name=pagerol&format=jsonl').text.splitlines()
+    assert [json.loads(line)['id'] for line in lines] == ids
+    assert asgi_client.get('/medicines?after=x').status_code == 400
+
+def test_nearby_uses_stock_and_new_pharmacies(asgi_client):
+    add(asgi_client, 'nearbyol', pharmacy_id=1, quantity=2)
+    add(asgi_client, 'nearbyol', pharmacy_id=1, quantity=3)
+    add(asgi_client, 'nearbyol', pharmacy_id=2, quantity=0)
+
+    body = asgi_client.get('/nearby?lat=51.5&lon=-0.1&medicine=NearbyOL').json()
+    assert [(p['id'], p['quantity']) for p in body['results']] == [(1, 5)]
+    assert [p['id'] for p in asgi_client.get('/nearby?lat=51.5&lon=-0.1&radius=50').json()['results']] == [1, 2]
+
+    response = asgi_client.post('/add_pharmacy', json={'name': 'Close', 'address': '3 Lane',
+                                                       'latitude': 51.501, 'longitude': -0.1})
+    assert response.status_code == 201
+    new_id = response.json()['pharmacy']['id']
+    assert asgi_client.get('/nearby?lat=51.501&lon=-0.1&k=1').json()['results'][0]['id'] == new_id
+
+    assert asgi_client.post('/add_pharmacy', json={'name': 'No address'}).status_code == 400
+    for query in ('lat=51.5', 'lat=x&lon=0', 'lat=91&lon=0', 'lat=0&lon=181'):
+        assert asgi_client.get(f'/nearby?{query}').status_code == 400
+
+def test_health_reports_counts_and_pool(asgi_client):
+    add(asgi_client, 'healthol')
+    body = asgi_client.get('/health').json()
+    assert body['status'] == 'healthy'
+    assert (body['pharmacies_count'], body['medicines_count']) == (2, 1)
+    assert body['names_indexed'] >= 1
+    assert 'pool' in body
+
+def test_names_added_elsewhere_reach_the_trie(asgi_client):
+    import anyio
+    from python_api import asgi
+    from python_api.models import Medicine
+    engine = create_engine(str(asgi.engine.url).replace('+aiosqlite', ''))
+    with engine.begin() as conn:
+        conn.execute(insert(Medicine), [{'name': 'elsewherin', 'pharmacy_id': 1, 'quantity': 1}])
+    engine.dispose()
+
+    anyio.run(asgi.load_names, None)
+    assert asgi_client.get('/search?query=elsewh').json()['results'] == ['elsewherin']
@@ -0,0 +1,45 @@
+from python_api.bulk_ingest import ingest_medicines, iter_records, parse_medicine
+from python_api.models import Medicine
+import pytest
+
+def test_parse_medicine_normalises_fields():
+    values = parse_medicine({'name': ' Aspirin ', 'pharmacy_id': '1', 'quantity': '5',
+                             'expiry_date': '2025-01-31'}, {1})
+    assert values['name'] == 'aspirin'
+    assert values['quantity'] == 5
+    assert values['expiry_date'].isoformat() == '2025-01-31'
+
+@pytest.mark.parametrize('record, message', [
+    ({'pharmacy_id': 1}, 'Missing required field: name'),
+    ({'name': 5, 'pharmacy_id': 1}, 'name must be a string'),
+    ({'name': 'x', 'pharmacy_id': 'a'}, 'pharmacy_id must be an integer'),
+    ({'name': 'x', 'pharmacy_id': 2}, 'Pharmacy with ID 2 not found'),
+    ({'name': 'x', 'pharmacy_id': 1, 'quantity': 'many'}, 'quantity must be an integer'),
+    ({'name': 'x', 'pharmacy_id': 1, 'expiry_date': 20250101}, 'Invalid expiry date format'),
+])
+def test_parse_medicine_rejects_bad_fields(record, message):
+    with pytest.raises(ValueError, match=message):
+        parse_medicine(record, {1})
+
+def test_ingest_reports_bad_rows_without_losing_good_ones(db_app):
+    lines = [
+        '{"name": "amoxicillin", "pharmacy_id": 1, "quantity": 3}\n',
+        '{"name": 5, "pharmacy_id": 1}\n',
+        'not json\n',
+        '[1, 2]\n',
+        '{"name": "aspirin", "pharmacy_id": 9}\n',
+        '{"name": "ibuprofen", "pharmacy_id": 1, "expiry_date": "2025-02-01"}\n',
+    ]
+    summary = ingest_medicines(iter_records(lines, 'jsonl'), chunk_size=10)
+
+    assert summary.inserted == 2
+    assert [error['row'] for error in summary.errors] == [2, 3, 4, 5]
+    assert sorted(m.name for m in Medicine.query) == ['amoxicillin', 'ibuprofen']
+
+def test_bulk_add_route_returns_row_errors(db_app):
+    body = 'name,pharmacy_id,quantity\namox,1,2\n,1,2\nibu,1,x\n'
+    response = db_app.test_client().post('/bulk_add_medicines?format=csv', data=body)
+
+    assert response.status_code == 200
+    assert response.json['inserted'] == 1
+    assert [error['row'] for error in response.json['errors']] == [2, 3]
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, insert, update
+from python_api.catalog_loader import CatalogLoader
+from python_api.models import db, Medicine, Pharmacy
+from inventory_store import InventoryStore
+import pytest
+
+@pytest.fixture
+def catalog(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'catalog.db'}"
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Pharmacy), [{'id': 1, 'name': 'Central', 'address': 'x'},
+                                        {'id': 2, 'name': 'North', 'address': 'y'}])
+        conn.execute(insert(Medicine), [
+            {'id': i, 'name': f'med{i}', 'quantity': i, 'pharmacy_id': 1 if i < 5 else 2,
+             'expiry_date': date(2030, 1, i) if i % 2 else None} for i in range(1, 8)])
+    yield uri, engine
+    engine.dispose()
+
+def apply_all(store, batches):
+    sizes = []
+    for batch in batches:
+        sizes.append(len(batch))
+        store.upsert_many(batch)
+    return sizes
+
+def test_load_pages_through_every_row(catalog):
+    uri, _ = catalog
+    loader = CatalogLoader(uri, batch_size=3)
+    store = InventoryStore()
+
+    assert apply_all(store, loader.load()) == [3, 3, 1]
+    assert len(store) == 7
+    assert store.get(3).expiryDate == '2030-01-03'
+    assert store.get(4).expiryDate is None
+    assert store.totals()['by_pharmacy'] == [{'pharmacy_id': 1, 'items': 4, 'units': 10},
+                                             {'pharmacy_id': 2, 'items': 3, 'units': 18}]
+    assert loader.high_water_mark is not None
+
+def test_refresh_applies_changed_and_new_rows(catalog):
+    uri, engine = catalog
+    loader = CatalogLoader(uri, batch_size=3)
+    store = InventoryStore()
+    apply_all(store, loader.load())
+
+    later = loader.high_water_mark + timedelta(seconds=5)
+    with engine.begin() as conn:
+        conn.execute(update(Medicine).where(Medicine.id == 2).values(quantity=50, updated_at=later))
+        conn.execute(update(Medicine).where(Medicine.id == 3).values(name='renamed', updated_at=later))
+        conn.execute(insert(Medicine), [{'id': 8, 'name': 'med8', 'quantity': 1, 'pharmacy_id': 1,
+                                         'updated_at': later}])
+
+    apply_all(store, loader.refresh())
+    assert store.get(2).quantity == 50
+    assert [m.id for m in store.search('renamed')] == [3]
+    assert store.get(8).name == 'med8'
+    assert loader.high_water_mark == later
+
+def test_refresh_before_load_loads_everything(catalog):
+    uri, _ = catalog
+    store = InventoryStore()
+    apply_all(store, CatalogLoader(uri).refresh())
+    assert len(store) == 7
+
+def test_local_ids_start_above_the_catalogue():
+    store = InventoryStore(first_id=1000)
+    store.upsert_many([(13, 'catalogued', '', 1, None, 1)])
+    local = store.add('local', 'b', 1, '2030-01-01')
+
+    assert local.id == 1000
+    store.upsert_many([(14, 'catalogued too', '', 1, None, 1)])
+    assert store.get(1000).name == 'local'
+    assert store.reserve_ids(1) == 1001
+
+def test_ids_pages_through_every_id(catalog):
+    uri, engine = catalog
+    with engine.begin() as conn:
+        conn.execute(Medicine.__table__.delete().where(Medicine.id == 4))
+    assert list(CatalogLoader(uri, batch_size=3).ids()) == [[1, 2, 3], [5, 6, 7]]
+
+def test_reconcile_drops_items_deleted_from_the_catalogue(client, monkeypatch):
+    import app
+    with app.write_lock:
+        gone = app.inventory.add('Deletol', '', 3, '2031-01-01')
+        app.expiry_tracker.insert(app.to_expiry_item(gone))
+        kept = sorted(record.id for record in app.inventory if record.id != gone.id)
+
+    class Loader:
+        def ids(self):
+            yield kept
+
+    monkeypatch.setattr(app, 'catalog_loader', Loader())
+    assert app.reconcile_catalog() == 1
+    assert app.inventory.get(gone.id) is None
+    assert not app.expiry_tracker.contains(gone.id)
+    assert app.reconcile_catalog() == 0
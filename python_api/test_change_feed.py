@@ -0,0 +1,58 @@
+import change_feed
+from change_feed import ChangeFeed
+
+def recorder():
+    applied = []
+    return applied, lambda kind, payload: applied.append((kind, payload))
+
+def test_workers_apply_every_change_in_order(tmp_path):
+    path = str(tmp_path / 'changes.db')
+    first, second = ChangeFeed(path), ChangeFeed(path)
+    applied_first, apply_first = recorder()
+    applied_second, apply_second = recorder()
+
+    first.publish('add_name', {'name': 'aspirin', 'weight': 0})
+    second.publish('delete_item', {'item_id': 3})
+    assert first.catch_up(apply_first) == 2
+    assert second.catch_up(apply_second) == 2
+    assert applied_first == applied_second == [('add_name', {'name': 'aspirin', 'weight': 0}),
+                                               ('delete_item', {'item_id': 3})]
+    # Nothing new: no changes are applied again
+    assert first.catch_up(apply_first) == 0
+    assert first.position == second.position == 2
+
+def test_ids_are_allocated_once_across_workers(tmp_path):
+    path = str(tmp_path / 'changes.db')
+    first, second = ChangeFeed(path), ChangeFeed(path)
+
+    assert first.publish('add_items', {'rows': []}, new_ids=3)['first_id'] == 1
+    assert second.publish('add_items', {'rows': []}, new_ids=2)['first_id'] == 4
+    # A worker whose own ids are further ahead moves the sequence past them
+    assert first.publish('add_items', {'rows': []}, new_ids=1, min_id=100)['first_id'] == 100
+    assert second.publish('add_items', {'rows': []}, new_ids=1)['first_id'] == 101
+
+def test_new_worker_replays_the_log_and_skips_bad_entries(tmp_path):
+    path = str(tmp_path / 'changes.db')
+    feed = ChangeFeed(path)
+    for item_id in range(2500):
+        feed.publish('delete_item', {'item_id': item_id})
+
+    applied = []
+    def apply(kind, payload):
+        if payload['item_id'] == 7:
+            raise KeyError(7)
+        applied.append(payload['item_id'])
+
+    late = ChangeFeed(path)
+    assert late.catch_up(apply) == 2500
+    assert applied == [i for i in range(2500) if i != 7]
+
+def test_forked_process_opens_its_own_connection(tmp_path, monkeypatch):
+    feed = ChangeFeed(str(tmp_path / 'changes.db'))
+    feed.publish('add_name', {'name': 'a', 'weight': 0})
+    inherited = feed._conn
+
+    monkeypatch.setattr(change_feed.os, 'getpid', lambda: -1)
+    applied, apply = recorder()
+    assert feed.catch_up(apply) == 1
+    assert feed._conn is not inherited
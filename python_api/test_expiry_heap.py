@@ -0,0 +1,71 @@
+import json
+import pytest
+
+expiry_heap = pytest.importorskip('expiry_heap')
+
+def make_item(item_id, expiry_date, quantity=1):
+    item = expiry_heap.MedicineItem()
+    item.id = item_id
+    item.name = f'item{item_id}'
+    item.brand = 'brand'
+    item.quantity = quantity
+    item.expiryDate = expiry_date
+    return item
+
+@pytest.fixture
+def heap():
+    heap = expiry_heap.MinHeap()
+    heap.insertMany([make_item(1, '2025-03-01'), make_item(2, '2025-01-01'),
+                     make_item(3, '2025-02-01'), make_item(4, '2025-04-01')])
+    return heap
+
+def ids(items):
+    return [item.id for item in items]
+
+def test_sorted_by_expiry(heap):
+    assert ids(heap.getSortedItems()) == [2, 3, 1, 4]
+    assert heap.peek().id == 2
+
+def test_update_rekeys_an_item(heap):
+    assert heap.update(4, 7, '2024-12-01')
+    assert heap.peek().id == 4 and heap.peek().quantity == 7
+    assert heap.update(2, 1, '2026-01-01')
+    assert ids(heap.getSortedItems()) == [4, 3, 1, 2]
+
+def test_update_and_remove_unknown_ids(heap):
+    assert not heap.update(99, 1, '2025-01-01')
+    assert not heap.remove(99)
+    assert heap.size() == 4
+
+def test_remove_keeps_the_heap_ordered(heap):
+    assert heap.remove(3)
+    assert not heap.contains(3)
+    assert ids(heap.getSortedItems()) == [2, 1, 4]
+    assert heap.remove(2)
+    assert heap.peek().id == 1
+
+def test_insert_replaces_an_item_with_the_same_id(heap):
+    heap.insert(make_item(1, '2020-01-01'))
+    assert heap.size() == 4
+    assert heap.peek().id == 1
+
+def as_dicts(items):
+    return [{'brand': item.brand, 'expiryDate': item.expiryDate, 'id': item.id, 'name': item.name,
+             'quantity': item.quantity} for item in items]
+
+def test_json_pages_match_the_item_lists(heap):
+    odd = make_item(5, '2025-01-15', quantity=3)
+    odd.name = 'say "hi" \\ back\nslash\t\x01 café'
+    odd.brand = 'B\\"'
+    heap.insert(odd)
+
+    page = heap.peekNJson(3, 1)
+    assert json.loads(page.json) == as_dicts(heap.peekN(3, 1))
+    assert (page.count, page.more, len(page)) == (3, True, 3)
+    assert json.loads(page.json)[0]['name'] == odd.name
+
+    page = heap.expiringBeforeJson('2025-02-01', 10)
+    assert json.loads(page.json) == as_dicts(heap.expiringBefore('2025-02-01', 10))
+    assert [item['id'] for item in json.loads(page.json)] == [2, 5, 3]
+    assert not page.more
+    assert heap.peekNJson(2, 10).json == b'[]'
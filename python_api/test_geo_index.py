@@ -0,0 +1,45 @@
+import random
+import pytest
+from python_api.geo_index import DIRECT_SCAN_LIMIT, PharmacyGrid, haversine_km
+
+def brute_force(points, lat, lon, radius_km, k):
+    found = sorted((haversine_km(lat, lon, plat, plon), pid) for pid, (plat, plon) in points.items())
+    return [(distance, pid) for distance, pid in found if distance <= radius_km][:k]
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(7)
+    grid = PharmacyGrid()
+    points = {}
+    for pid in range(2000):
+        points[pid] = (rng.uniform(50, 53), rng.uniform(-2, 2))
+        grid.add(pid, *points[pid])
+
+    for _ in range(50):
+        lat, lon = rng.uniform(50, 53), rng.uniform(-2, 2)
+        radius, k = rng.choice([1, 5, 25, 200]), rng.choice([1, 5, 20])
+        assert grid.nearest(lat, lon, radius, k) == brute_force(points, lat, lon, radius, k)
+
+@pytest.mark.parametrize('query_lon', [180.0, 179.95, -179.95, -180.0])
+def test_antimeridian(query_lon):
+    grid = PharmacyGrid()
+    grid.add(1, 10.0, 180.0)
+    grid.add(2, 10.0, -179.9)
+    grid.add(3, 10.0, 179.9)
+
+    found = grid.nearest(10.0, query_lon, 50, 3)
+    assert sorted(pid for _, pid in found) == [1, 2, 3]
+    # Candidate sets above the direct-scan limit use the grid walk too
+    candidates = set(range(1, DIRECT_SCAN_LIMIT + 2))
+    assert grid.nearest(10.0, query_lon, 50, 3, candidates) == found
+
+def test_move_and_remove():
+    grid = PharmacyGrid()
+    grid.add(1, 0.0, 0.0)
+    grid.add(1, 5.0, 5.0)
+    grid.add(2, None, 1.0)
+
+    assert len(grid) == 1 and 2 not in grid
+    assert grid.nearest(0.0, 0.0, 10, 5) == []
+    assert [pid for _, pid in grid.nearest(5.0, 5.0, 10, 5)] == [1]
+    grid.remove(1)
+    assert grid.nearest(5.0, 5.0, 10, 5) == []
@@ -0,0 +1,106 @@
+import threading
+from inventory_store import InventoryStore
+
+def make_store():
+    store = InventoryStore()
+    store.add_many([('Aspirin', 'Bayer', 120, '2024-12-31'), ('Ibuprofen', 'Advil', 85, '2024-06-30'),
+                    ('Paracetamol', 'Tylenol', 50, '2023-11-15'), ('Amoxicillin', 'Amoxil', 30, '2023-12-10'),
+                    ('Aspirin', 'Disprin', 10, None)])
+    return store
+
+def test_lookups():
+    store = make_store()
+    assert [m.id for m in store.search('asp')] == [1, 5]
+    assert [m.id for m in store.search('CILLIN')] == [4]
+    assert store.search('zzz') == []
+    assert [m.id for m in store.low_stock(50)] == [5, 4, 3]
+    assert store.low_stock_count(50) == 3
+    assert [m.id for m in store.lowest_stock(2)] == [5, 4]
+
+def test_update_and_remove_keep_indexes_in_step():
+    store = make_store()
+    store.update(1, quantity=5)
+    assert [m.id for m in store.low_stock(10)] == [1, 5]
+
+    assert store.remove(5).name == 'Aspirin'
+    assert store.remove(5) is None
+    assert [m.id for m in store.search('aspirin')] == [1]
+    store.remove(1)
+    assert store.search('aspirin') == []
+    assert [m.id for m in store.page()] == [2, 3, 4]
+    assert len(store) == 3
+
+def test_readers_never_see_a_removed_record():
+    store = InventoryStore()
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                for record in store.page(limit=50) + store.search('item') + store.low_stock(10):
+                    assert record is not None
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for round_ in range(300):
+        records = store.add_many([(f'item{i % 7}', 'b', i % 20, None) for i in range(20)])
+        for record in records:
+            store.remove(record.id)
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+
+def test_upsert_applies_a_repeated_id_once():
+    store = make_store()
+    changed = store.upsert_many([(10, 'Cetirizine', '', 4, None, 1), (10, 'Cetirizine', '', 6, '2030-01-01', 1),
+                                 (2, 'Ibuprofen', 'Advil', 1, '2024-06-30', None)])
+
+    assert sorted(record.id for record in changed) == [2, 10]
+    assert store.get(10).quantity == 6
+    assert [m.id for m in store.page(after_id=4)] == [5, 10]
+    assert store.low_stock_count(6) == 2
+    store.remove(10)
+    assert store.low_stock(100) == [store.get(2), store.get(5), store.get(4), store.get(3)]
+
+def test_search_pages_merge_matching_names_in_id_order():
+    store = InventoryStore()
+    store.add_many([(f'item{i % 3}', 'b', 1, None) for i in range(30)] + [('other', 'b', 1, None)])
+    pages, after = [], None
+    while True:
+        page = store.search('ITEM', after, 7)
+        if not page:
+            break
+        pages.append([m.id for m in page])
+        after = page[-1].id
+
+    assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+    assert sum(pages, []) == list(range(1, 31))
+    assert [m.id for m in store.search('item2', after_id=20)] == [21, 24, 27, 30]
+
+def test_totals_follow_each_pharmacy():
+    store = make_store()
+    store.upsert_many([(10, 'Cetirizine', '', 4, None, 2), (11, 'Loratadine', '', 6, None, 1),
+                       (12, 'Ranitidine', '', 1, None, 2)])
+    store.upsert_many([(11, 'Loratadine', '', 6, None, 2)])  # moved to another pharmacy
+    store.update(12, quantity=5)
+    store.remove(1)
+
+    assert store.totals() == {"items": 7, "units": 190, "by_pharmacy": [
+        {"pharmacy_id": None, "items": 4, "units": 175}, {"pharmacy_id": 2, "items": 3, "units": 15}]}
+
+def test_name_units_total_every_item_with_the_name():
+    store = make_store()
+    assert store.name_units('aspirin') == 130
+    store.update(5, quantity=20)
+    store.upsert_many([(1, 'ASPIRIN', 'Bayer', 120, '2024-12-31', None)])  # renamed, same lowercase name
+    assert store.name_units('aspirin') == 140
+    store.remove(5)
+    assert store.name_units('aspirin') == 120
+    store.remove(1)
+    assert store.name_units('aspirin') is None
@@ -0,0 +1,43 @@
+import json
+from datetime import date
+from flask import Flask, jsonify
+from python_api import json_provider
+from python_api.json_provider import FastJSONProvider, RawJSON, dumps_bytes, dumps_with_raw
+import pytest
+
+def test_raw_json_values_are_spliced_in_verbatim():
+    raw = RawJSON('[{"id":2,"name":"a\\"b"}]')
+    encoded = dumps_with_raw({"results": raw, "count": 1, "next_cursor": None})
+
+    assert encoded == b'{"count":1,"next_cursor":null,"results":[{"id":2,"name":"a\\"b"}]}'
+    assert json.loads(dumps_with_raw({"b": RawJSON(b'1'), "a": 2}, sort_keys=False)) == {"b": 1, "a": 2}
+    # No RawJSON: the plain encoder
+    assert dumps_with_raw({"a": [1]}) == dumps_bytes({"a": [1]})
+
+def test_jsonify_splices_raw_json_through_the_provider():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    with app.app_context():
+        response = jsonify({"results": RawJSON(b'[1,2]'), "expires": date(2030, 1, 2)})
+    assert response.get_data() == b'{"expires":"2030-01-02","results":[1,2]}\n'
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_encoders_agree(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        # As if orjson were not installed
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    value = {"b": "café \"q\" \\", "a": [date(2030, 1, 2), None, 1.5], "c": {"y": 1, "x": 2}}
+
+    assert dumps_bytes(value) == (b'{"a":["2030-01-02",null,1.5],"b":"caf\xc3\xa9 \\"q\\" \\\\",'
+                                  b'"c":{"x":2,"y":1}}')
+    assert list(json.loads(dumps_bytes(value, sort_keys=False))) == ["b", "a", "c"]
+    with pytest.raises(TypeError):
+        dumps_bytes({"a": object()})
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    assert app.json.loads('{"a": [1]}') == {"a": [1]}
+    with app.app_context():
+        assert json.loads(jsonify({"r": RawJSON(b'{"k":true}')}).get_data()) == {"r": {"k": True}}
@@ -0,0 +1,56 @@
+from flask import Flask
+from sqlalchemy import create_engine, exc, text
+from python_api.pool_metrics import TimedQueuePool, pool_status
+import pytest
+
+def test_checkouts_waits_and_timeouts_are_counted(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+                           pool_size=2, max_overflow=0, pool_timeout=0.05)
+    first, second = engine.connect(), engine.connect()
+    status = pool_status(engine)
+    assert status['pool'] == 'TimedQueuePool'
+    assert (status['size'], status['checked_out'], status['checked_in']) == (2, 2, 0)
+    assert (status['checkouts'], status['timeouts']) == (2, 0)
+
+    # The pool is exhausted: the third checkout waits pool_timeout, then fails
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    status = pool_status(engine)
+    assert (status['checkouts'], status['timeouts']) == (2, 1)
+    assert status['max_wait_ms'] >= 50
+    assert 0 < status['avg_wait_ms'] <= status['max_wait_ms']
+
+    first.close()
+    second.close()
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    status = pool_status(engine)
+    assert (status['checked_out'], status['checked_in'], status['checkouts']) == (0, 2, 3)
+    engine.dispose()
+
+def test_pool_without_stats_reports_its_class():
+    engine = create_engine('sqlite://')
+    assert pool_status(engine) == {"pool": type(engine.pool).__name__}
+
+def test_health_reports_the_pool(tmp_path):
+    from python_api.config import TestingConfig
+    from python_api.models import db
+    from python_api.routes import api
+
+    app = Flask(__name__)
+    app.config.from_object(TestingConfig)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'health.db'}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'poolclass': TimedQueuePool, 'pool_size': 3, 'max_overflow': 0}
+    db.init_app(app)
+    app.register_blueprint(api)
+    with app.app_context():
+        db.create_all()
+        pool = app.test_client().get('/health').json['pool']
+        db.session.remove()
+        db.engine.dispose()
+
+    assert pool['pool'] == 'TimedQueuePool' and pool['size'] == 3
+    # The request's session still holds its connection while /health reports
+    assert pool['checked_out'] == 1
+    assert pool['checkouts'] >= 1 and pool['timeouts'] == 0
+    assert set(pool) >= {'checked_in', 'overflow', 'avg_wait_ms', 'max_wait_ms'}
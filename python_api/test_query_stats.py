@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from python_api.models import db
+from python_api.query_stats import count_queries
+import pytest
+
+def test_search_costs_one_query(db_app):
+    client = db_app.test_client()
+    client.post('/add_medicine', json={'name': 'amoxicillin', 'pharmacy_id': 1, 'quantity': 3})
+    with count_queries() as counter:
+        response = client.get('/search_medicine?name=amox')
+    assert response.json['count'] == 1
+    assert counter.count == 1
+    assert response.headers['X-Query-Count'] == '1'
+
+def test_failed_statement_leaves_no_timer_behind(db_app):
+    with db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.execute(text('SELECT * FROM no_such_table'))
+        conn.execute(text('SELECT 1'))
+        assert conn.info.get('query_start') == []
+
+def test_profile_bypasses_the_response_cache(db_app, monkeypatch):
+    monkeypatch.setenv('MEDILOCATE_PROFILE_TOKEN', 'secret')
+    client = db_app.test_client()
+    client.post('/add_medicine', json={'name': 'amoxicillin', 'pharmacy_id': 1, 'quantity': 3})
+    url = '/search_medicine?name=amox&profile=1'
+    for _ in range(2):
+        response = client.get(url, headers={'X-Profile-Token': 'secret'})
+        assert response.mimetype == 'text/plain'
+        assert 'search_page' in response.get_data(as_text=True)
+    # Without the token the parameter is ignored
+    assert client.get(url).json['count'] == 1
@@ -0,0 +1,86 @@
+from flask import Flask, jsonify, request
+from python_api import response_cache as response_cache_module
+from python_api.response_cache import ResponseCache
+import pytest
+
+@pytest.fixture
+def cache_app():
+    """A Flask app with one cached view that counts its calls, and a write route"""
+    app = Flask(__name__)
+    app.cache = ResponseCache(max_entries=2, ttl=60)
+    app.calls = 0
+
+    @app.route('/items')
+    @app.cache.cached
+    def items():
+        app.calls += 1
+        return jsonify({"call": app.calls, "args": sorted(request.args.items(multi=True))})
+
+    @app.route('/items', methods=['POST'])
+    def add_item():
+        app.cache.bump()
+        return jsonify({"status": "success"}), 201
+
+    return app
+
+def test_etag_and_if_none_match(cache_app):
+    client = cache_app.test_client()
+    first = client.get('/items?q=a')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+
+    cached = client.get('/items?q=a')
+    assert cached.json == first.json and cached.headers['ETag'] == etag
+    assert client.get('/items?q=a', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/items?q=a', headers={'If-None-Match': '"other"'}).status_code == 200
+    assert cache_app.calls == 1
+
+def test_write_route_invalidates_every_entry(cache_app):
+    client = cache_app.test_client()
+    client.get('/items?q=a')
+    generation = cache_app.cache.generation
+    assert client.post('/items').status_code == 201
+
+    assert cache_app.cache.generation == generation + 1 and len(cache_app.cache) == 0
+    assert client.get('/items?q=a').json['call'] == 2
+
+def test_entries_expire_after_the_ttl(cache_app, monkeypatch):
+    client = cache_app.test_client()
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, 'monotonic', lambda: now[0])
+    client.get('/items')
+
+    now[0] += 59
+    assert client.get('/items').json['call'] == 1
+    now[0] += 2
+    assert client.get('/items').json['call'] == 2
+
+def test_least_recently_used_entry_is_evicted(cache_app):
+    client = cache_app.test_client()
+    client.get('/items?q=a')
+    client.get('/items?q=b')
+    client.get('/items?q=a')  # b is now the least recently used
+    client.get('/items?q=c')
+
+    assert len(cache_app.cache) == 2
+    assert client.get('/items?q=a').json['call'] == 1
+    assert client.get('/items?q=b').json['call'] == 4
+
+def test_key_ignores_parameter_order(cache_app):
+    client = cache_app.test_client()
+    assert client.get('/items?a=1&b=2').json['call'] == 1
+    assert client.get('/items?b=2&a=1').json['call'] == 1
+    assert client.get('/items?a=1&b=3').json['call'] == 2
+    assert (cache_app.cache.hits, cache_app.cache.misses) == (1, 2)
+
+def test_only_successful_json_responses_are_cached(cache_app):
+    @cache_app.route('/missing')
+    @cache_app.cache.cached
+    def missing():
+        cache_app.calls += 1
+        return jsonify({"error": "not found"}), 404
+
+    client = cache_app.test_client()
+    client.get('/missing')
+    client.get('/missing')
+    assert cache_app.calls == 2 and len(cache_app.cache) == 0
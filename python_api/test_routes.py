@@ -0,0 +1,85 @@
+import json
+import pytest
+
+def add_medicines(client, names):
+    for name in names:
+        client.post('/add_medicine', json={'name': name, 'pharmacy_id': 1, 'quantity': 1})
+
+def test_search_medicine_pages_follow_the_cursor(db_app):
+    client = db_app.test_client()
+    add_medicines(client, ['cetirizine', 'cetirizine syrup', 'cetirizine drops', 'levocetirizine', 'aspirin'])
+    names, after = [], ''
+    while True:
+        body = client.get(f'/search_medicine?name=cetirizine&limit=2{after}').json
+        names += [m['name'] for m in body['results']]
+        if body['next_cursor'] is None:
+            break
+        after = f"&after={body['next_cursor']}"
+
+    assert names[0] == 'cetirizine'
+    assert sorted(names) == ['cetirizine', 'cetirizine drops', 'cetirizine syrup', 'levocetirizine']
+    assert client.get('/search_medicine?name=cetirizine&after=junk').status_code == 400
+
+def test_medicines_pages_and_stream_agree(db_app):
+    client = db_app.test_client()
+    add_medicines(client, ['loratadine', 'loratadine syrup', 'ranitidine', 'loratadine gel'])
+    ids, after = [], ''
+    while True:
+        body = client.get(f'/medicines?name=loratadine&limit=2{after}').json
+        ids += [m['id'] for m in body['results']]
+        if body['next_cursor'] is None:
+            break
+        after = f"&after={body['next_cursor']}"
+
+    assert len(ids) == 3 and ids == sorted(ids)
+    lines = client.get('/medicines?name=loratadine&format=jsonl').get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == ids
+    assert client.get(f'/medicines?after={ids[0]}&limit=100').json['results'][0]['id'] == ids[0] + 1
+
+def add_pharmacy(client, name, latitude, longitude):
+    response = client.post('/add_pharmacy', json={'name': name, 'address': 'x', 'latitude': latitude,
+                                                  'longitude': longitude})
+    return response.json['pharmacy']['id']
+
+def test_nearby_lists_pharmacies_stocking_the_medicine(db_app):
+    client = db_app.test_client()
+    north = add_pharmacy(client, 'North', 51.52, -0.1)
+    far = add_pharmacy(client, 'Far', 52.5, -0.1)
+    for pharmacy_id, quantity in ((1, 2), (1, 3), (north, 0), (far, 7)):
+        client.post('/add_medicine', json={'name': 'Nearbyol', 'pharmacy_id': pharmacy_id, 'quantity': quantity})
+
+    body = client.get('/nearby?lat=51.5&lon=-0.1&medicine=NEARBYOL').json
+    # The pharmacy holding none is skipped; two rows at one pharmacy are summed
+    assert [(p['id'], p['quantity']) for p in body['results']] == [(1, 5)]
+    assert body['medicine'] == 'nearbyol' and body['radius_km'] == 10
+
+    body = client.get('/nearby?lat=51.5&lon=-0.1&medicine=nearbyol&radius=200').json
+    assert [(p['id'], p['quantity']) for p in body['results']] == [(1, 5), (far, 7)]
+    assert body['results'][1]['distance_km'] == pytest.approx(111.2, abs=0.1)
+    assert client.get('/nearby?lat=51.5&lon=-0.1&medicine=unknown').json['results'] == []
+
+def test_nearby_bounds_radius_and_k(db_app):
+    client = db_app.test_client()
+    ids = [add_pharmacy(client, f'P{i}', 51.5 + i * 0.01, -0.1) for i in range(1, 4)]
+
+    body = client.get('/nearby?lat=51.5&lon=-0.1&k=2').json
+    assert [p['id'] for p in body['results']] == [1, ids[0]]
+    assert body['count'] == 2
+    assert client.get('/nearby?lat=51.5&lon=-0.1&k=0').json['count'] == 1
+    assert client.get('/nearby?lat=51.5&lon=-0.1&k=1000').json['count'] == 4
+    assert client.get('/nearby?lat=51.5&lon=-0.1&radius=1').json['count'] == 1
+    assert client.get('/nearby?lat=51.5&lon=-0.1&radius=-5').json['count'] == 1  # Radius 0: only exact matches
+    assert client.get('/nearby?lat=51.5&lon=-0.1&radius=100000').json['radius_km'] == 500
+
+@pytest.mark.parametrize('query', ['lat=51.5', 'lon=0', 'lat=x&lon=0', 'lat=91&lon=0', 'lat=0&lon=-181'])
+def test_nearby_rejects_bad_coordinates(db_app, query):
+    assert db_app.test_client().get(f'/nearby?{query}').status_code == 400
+
+def test_nearby_sees_pharmacies_added_after_the_grid_was_built(db_app):
+    client = db_app.test_client()
+    assert [p['id'] for p in client.get('/nearby?lat=40.7&lon=-74.0').json['results']] == []
+    assert 'pharmacy_grid' in db_app.extensions
+
+    new_id = add_pharmacy(client, 'Manhattan', 40.71, -74.0)
+    assert [p['id'] for p in client.get('/nearby?lat=40.7&lon=-74.0').json['results']] == [new_id]
+    assert len(db_app.extensions['pharmacy_grid']) == 2
@@ -0,0 +1,119 @@
+import os
+import struct
+import pytest
+
+medilocate = pytest.importorskip('medilocate')
+
+@pytest.fixture
+def trie():
+    trie = medilocate.Trie()
+    trie.insertMany([('amoxicillin', 5), ('amlodipine', 50), ('aspirin', 20), ('atenolol', 0),
+                     ('ibuprofen', 1), ('metformin', 2), ('metoprolol', 9)])
+    return trie
+
+def test_starts_with_pages_in_alphabetical_order(trie):
+    assert trie.startsWith('a') == ['amlodipine', 'amoxicillin', 'aspirin', 'atenolol']
+    assert trie.startsWith('a', 2) == ['amlodipine', 'amoxicillin']
+    assert trie.startsWith('a', 2, 2) == ['aspirin', 'atenolol']
+    assert trie.startsWith('a', 2, 4) == []
+    assert trie.startsWith('z') == []
+
+def test_top_k_ranks_by_weight(trie):
+    assert trie.topK('a', 2) == ['amlodipine', 'aspirin']
+    assert trie.topK('met', 5) == ['metoprolol', 'metformin']
+    assert trie.topK('x', 3) == []
+
+def test_reinserting_a_word_updates_its_weight(trie):
+    trie.insert('atenolol', 100)
+    assert trie.topK('a', 1) == ['atenolol']
+    assert trie.size() == 7
+
+def test_search_matches_whole_words_only(trie):
+    assert trie.search('aspirin')
+    assert not trie.search('asp')
+    assert not trie.search('aspirins')
+
+def test_save_and_load_round_trip(trie, tmp_path):
+    path = str(tmp_path / 'trie.bin')
+    trie.save(path)
+    loaded = medilocate.Trie()
+    loaded.load(path)
+    assert loaded.size() == trie.size()
+    assert loaded.startsWith('a') == trie.startsWith('a')
+    assert loaded.topK('a', 2) == trie.topK('a', 2)
+
+def test_fuzzy_search_respects_the_distance(trie):
+    assert trie.fuzzySearch('metformn', 1) == ['metformin']
+    assert trie.fuzzySearch('metfromin', 1) == ['metformin']  # A transposition is one edit
+    assert trie.fuzzySearch('mtformn', 1) == []
+    assert trie.fuzzySearch('mtformn', 2) == ['metformin']
+    assert trie.fuzzySearch('aspirin', 0) == ['aspirin']
+
+def test_search_many_answers_each_query_in_order(trie):
+    mode = medilocate.SearchMode
+    queries = [medilocate.TrieQuery('aspirin', mode.Auto, 10, 0, 0),
+               medilocate.TrieQuery('a', mode.Prefix, 2, 0, 0),
+               medilocate.TrieQuery('a', mode.Popular, 1, 0, 0),
+               medilocate.TrieQuery('ibuprofn', mode.Fuzzy, 5, 0, 1),
+               medilocate.TrieQuery('asp', mode.Exact, 5, 0, 0)]
+    results = trie.searchMany(queries)
+
+    assert [(r.words, r.type) for r in results] == [
+        (['aspirin'], mode.Exact),
+        (['amlodipine', 'amoxicillin'], mode.Prefix),
+        (['amlodipine'], mode.Popular),
+        (['ibuprofen'], mode.Fuzzy),
+        ([], mode.Exact),
+    ]
+    assert results[1].more and not results[2].more
+
+def test_saving_over_a_loaded_snapshot_leaves_its_readers_intact(trie, tmp_path):
+    path = str(tmp_path / 'trie.bin')
+    trie.save(path)
+    reader = medilocate.Trie()
+    reader.load(path)
+
+    other = medilocate.Trie()
+    other.insert('zinc')
+    other.save(path)
+    reader.save(path)  # Its own, still mapped, path
+    assert reader.startsWith('a') == trie.startsWith('a')
+    assert sorted(os.listdir(tmp_path)) == ['trie.bin']
+
+def corrupt(path, offset, value):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(struct.pack('=I', value))
+
+@pytest.mark.parametrize('field, value', [
+    (8, 0xFFFFFF00),    # root.firstChild past the last node
+    (12, 1),            # root.nextSibling pointing at its own first child again
+    (0, 0xFFFFFF00),    # labelOffset past the label pool
+    (4, 0xFFFFFF00),    # labelLength past the label pool
+])
+def test_load_rejects_out_of_range_nodes(trie, tmp_path, field, value):
+    path = str(tmp_path / 'trie.bin')
+    trie.save(path)
+    with open(path, 'rb') as f:
+        header = f.read(32)
+    node_size = struct.unpack_from('=I', header, 12)[0]
+    # Label fields are corrupted on node 1, links on the root (node 0)
+    node = 1 if field < 8 else 0
+    corrupt(path, 32 + node * node_size + field, value)
+
+    loaded = medilocate.Trie()
+    with pytest.raises(RuntimeError, match='Invalid snapshot file'):
+        loaded.load(path)
+    assert loaded.size() == 0
+
+def test_remove_drops_only_the_word(trie):
+    assert trie.remove('AMLODIPINE')
+    assert not trie.remove('amlodipine')
+    assert not trie.remove('am')
+    assert not trie.search('amlodipine')
+    assert trie.startsWith('am') == ['amoxicillin']
+    assert trie.topK('a', 1) == ['aspirin']
+    assert trie.size() == 6
+
+    trie.insert('amlodipine', 1)
+    assert trie.startsWith('am') == ['amlodipine', 'amoxicillin']
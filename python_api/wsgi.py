@@ -0,0 +1,15 @@
+from flask import Flask
+from python_api.config import get_config
+from python_api.models import db
+from python_api.routes import api
+
+def create_app(config_name=None):
+    """Synchronous (WSGI) server for the database-backed `api` blueprint"""
+    app = Flask(__name__)
+    app.config.from_object(get_config(config_name))
+    db.init_app(app)
+    app.register_blueprint(api)
+    return app
+
+if __name__ == '__main__':
+    create_app().run(host='0.0.0.0', port=5001, threaded=True)
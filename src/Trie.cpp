@@ -1,100 +1,777 @@
 #include "../include/Trie.h"
+#include <algorithm>
+#include <cctype>
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <functional>
+#include <limits>
+#include <mutex>
+#include <queue>
+#include <stdexcept>
+#include <thread>
 
-// Constructor: initialize the root node
-TrieNode::TrieNode() : isEndOfWord(false) {}
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+namespace {
+
+/// Header at the start of a snapshot file written by Trie::save().
+struct SnapshotHeader {
+    char magic[8];       ///< Always "MEDTRIE\0".
+    uint32_t version;    ///< Format version, bumped on layout changes.
+    uint32_t nodeSize;   ///< sizeof(TrieNode) when written, guards against ABI changes.
+    uint64_t nodeCount;  ///< Number of nodes following the header.
+    uint64_t labelCount; ///< Number of label bytes following the nodes.
+};
+
+const char SNAPSHOT_MAGIC[8] = {'M', 'E', 'D', 'T', 'R', 'I', 'E', '\0'};
+const uint32_t SNAPSHOT_VERSION = 1;
+
+/// Checks that every child and sibling index and every label slice of a
+/// snapshot's nodes stays inside the file, and that the nodes form a tree
+/// below the root, so a corrupt or foreign file cannot make lookups read out
+/// of bounds or loop forever.
+bool validSnapshotNodes(const TrieNode* nodes, uint64_t nodeCount, uint64_t labelCount) {
+    std::vector<bool> referenced(nodeCount, false);
+    for (uint64_t i = 0; i < nodeCount; ++i) {
+        const TrieNode& node = nodes[i];
+        if (node.labelOffset > labelCount || node.labelLength > labelCount - node.labelOffset) {
+            return false;
+        }
+        for (uint32_t next : {node.firstChild, node.nextSibling}) {
+            // 0 means "none": the root is never a child or sibling
+            if (next == 0) continue;
+            if (next >= nodeCount || referenced[next]) return false;
+            referenced[next] = true;
+        }
+    }
+    
+    // Each node is referenced at most once, so a walk from the root ends;
+    // it must reach every node, or some of them form a detached cycle
+    uint64_t reached = 0;
+    std::vector<uint32_t> stack = {0};
+    while (!stack.empty()) {
+        const TrieNode& node = nodes[stack.back()];
+        stack.pop_back();
+        ++reached;
+        if (node.firstChild) stack.push_back(node.firstChild);
+        if (node.nextSibling) stack.push_back(node.nextSibling);
+    }
+    return reached == nodeCount;
+}
+
+/// Name of the file save() writes before renaming it over the snapshot path,
+/// unique per process and thread so concurrent saves do not share one.
+std::string temporarySnapshotPath(const std::string& path) {
+    std::string suffix = std::to_string(std::hash<std::thread::id>()(std::this_thread::get_id()));
+#ifndef _WIN32
+    suffix = std::to_string(getpid()) + "." + suffix;
+#endif
+    return path + ".tmp." + suffix;
+}
+
+} // namespace
+
+// Lowercase a copy of the given string
+static std::string toLowerCopy(const std::string& text) {
+    std::string lower = text;
+    for (char& c : lower) {
+        c = std::tolower(c);
+    }
+    return lower;
+}
+
+// Constructor: initialize an empty node
+TrieNode::TrieNode()
+    : labelOffset(0), labelLength(0), firstChild(0), nextSibling(0), weight(0),
+      maxWeight(std::numeric_limits<int32_t>::min()), wordCount(0), firstChar('\0'),
+      isEndOfWord(false) {}
 
 // Constructor: initialize the root node
-Trie::Trie() {
-    root = new TrieNode();
+Trie::Trie() : nodeData(nullptr), labelData(nullptr), mappedData(nullptr), mappedSize(0) {
+    nodes.emplace_back();
+    syncView();
 }
 
-// Destructor: free all allocated nodes
+// Destructor: release any mapped snapshot
 Trie::~Trie() {
-    deleteSubtree(root);
+    unmap();
+}
+
+// Point the read view at the owned vectors
+void Trie::syncView() {
+    nodeData = nodes.data();
+    labelData = labels.data();
+}
+
+// Copy a mapped snapshot into owned storage before modifying it
+void Trie::detach() {
+    if (!mappedData) return;
+    
+    const SnapshotHeader* header = static_cast<const SnapshotHeader*>(mappedData);
+    nodes.assign(nodeData, nodeData + header->nodeCount);
+    labels.assign(labelData, labelData + header->labelCount);
+    unmap();
+    syncView();
+}
+
+// Release the mapped snapshot
+void Trie::unmap() {
+    if (!mappedData) return;
+#ifndef _WIN32
+    munmap(mappedData, mappedSize);
+#else
+    delete[] static_cast<char*>(mappedData);
+#endif
+    mappedData = nullptr;
+    mappedSize = 0;
+}
+
+// Find the child of a node whose edge label starts with the given character
+uint32_t Trie::findChild(uint32_t node, char c) const {
+    // Siblings are sorted by first character, so stop as soon as we pass it
+    for (uint32_t child = nodeData[node].firstChild; child != NO_NODE; child = nodeData[child].nextSibling) {
+        unsigned char first = nodeData[child].firstChar;
+        if (first == static_cast<unsigned char>(c)) {
+            return child;
+        }
+        if (first > static_cast<unsigned char>(c)) {
+            break;
+        }
+    }
+    return NO_NODE;
 }
 
-// Recursively delete all nodes in the given subtree
-void Trie::deleteSubtree(TrieNode* node) {
-    if (!node) return;
+// Create a new leaf under the parent, linked into the sorted sibling list
+uint32_t Trie::addChild(uint32_t parent, const char* suffix, size_t length) {
+    uint32_t index = static_cast<uint32_t>(nodes.size());
+    TrieNode leaf;
+    leaf.labelOffset = static_cast<uint32_t>(labels.size());
+    leaf.labelLength = static_cast<uint32_t>(length);
+    leaf.firstChar = suffix[0];
+    labels.insert(labels.end(), suffix, suffix + length);
     
-    // Delete all children first
-    for (auto& pair : node->children) {
-        deleteSubtree(pair.second);
+    // Find the sibling the new leaf goes after (NO_NODE = front of the list)
+    unsigned char first = suffix[0];
+    uint32_t previous = NO_NODE;
+    uint32_t current = nodes[parent].firstChild;
+    while (current != NO_NODE && static_cast<unsigned char>(nodes[current].firstChar) < first) {
+        previous = current;
+        current = nodes[current].nextSibling;
     }
+    leaf.nextSibling = current;
+    nodes.push_back(leaf);
+    
+    if (previous == NO_NODE) {
+        nodes[parent].firstChild = index;
+    } else {
+        nodes[previous].nextSibling = index;
+    }
+    syncView();
+    return index;
+}
+
+// Split the edge into a node so that it keeps only the first `at` label characters
+void Trie::splitEdge(uint32_t node, uint32_t at) {
+    // The tail of the label and everything below it move into a new child, so the
+    // node keeps its arena index and its place in the parent's sibling list
+    TrieNode tail = nodes[node];
+    tail.labelOffset += at;
+    tail.labelLength -= at;
+    tail.firstChar = labels[tail.labelOffset];
+    tail.nextSibling = NO_NODE;
+    
+    uint32_t tailIndex = static_cast<uint32_t>(nodes.size());
+    nodes.push_back(tail);
     
-    // Then delete this node
-    delete node;
+    TrieNode& head = nodes[node];
+    head.labelLength = at;
+    head.firstChild = tailIndex;
+    head.isEndOfWord = false;
+    head.weight = 0;
+    syncView();
+}
+
+// Walk or extend the tree along a lowercased word and return its node
+uint32_t Trie::insertNode(const std::string& lowerWord, std::vector<uint32_t>* path) {
+    uint32_t current = 0;
+    size_t position = 0;
+    if (path) path->push_back(current);
+    
+    // Follow matching edges, splitting one if the word diverges inside it
+    while (position < lowerWord.size()) {
+        uint32_t child = findChild(current, lowerWord[position]);
+        if (child == NO_NODE) {
+            current = addChild(current, lowerWord.data() + position, lowerWord.size() - position);
+            if (path) path->push_back(current);
+            break;
+        }
+        
+        const TrieNode& edge = nodes[child];
+        const char* label = labels.data() + edge.labelOffset;
+        uint32_t matched = 0;
+        while (matched < edge.labelLength && position + matched < lowerWord.size() &&
+               label[matched] == lowerWord[position + matched]) {
+            matched++;
+        }
+        if (matched < edge.labelLength) {
+            splitEdge(child, matched);
+        }
+        
+        current = child;
+        position += matched;
+        if (path) path->push_back(current);
+    }
+    return current;
 }
 
 // Insert a word into the trie
-void Trie::insert(const std::string& word) {
-    TrieNode* current = root;
+void Trie::insert(const std::string& word, int weight) {
+    std::unique_lock<std::shared_mutex> lock(mutex);
+    detach();
+    std::vector<uint32_t> path;
+    uint32_t current = insertNode(toLowerCopy(word), &path);
     
-    // Convert to lowercase and insert each character
-    for (char c : word) {
-        c = std::tolower(c);
-        if (current->children.find(c) == current->children.end()) {
-            current->children[c] = new TrieNode();
+    // Mark the end of the word, counting it only the first time
+    bool isNewWord = !nodes[current].isEndOfWord;
+    nodes[current].isEndOfWord = true;
+    nodes[current].weight = weight;
+    
+    // Refresh subtree counts and weight bounds from the word back up to the root
+    for (auto it = path.rbegin(); it != path.rend(); ++it) {
+        TrieNode& node = nodes[*it];
+        if (isNewWord) {
+            node.wordCount++;
+        }
+        int32_t best = node.isEndOfWord ? node.weight : std::numeric_limits<int32_t>::min();
+        for (uint32_t child = node.firstChild; child != NO_NODE; child = nodes[child].nextSibling) {
+            best = std::max(best, nodes[child].maxWeight);
+        }
+        node.maxWeight = best;
+    }
+}
+
+// Insert many words, rebuilding subtree aggregates once at the end
+void Trie::insertMany(const std::vector<std::string>& words, const std::vector<int>& weights) {
+    if (!weights.empty() && weights.size() != words.size()) {
+        throw std::invalid_argument("weights must be empty or match the number of words");
+    }
+    
+    // Sorted input appends each new leaf at the end of its sibling list
+    std::vector<std::pair<std::string, int>> entries;
+    entries.reserve(words.size());
+    for (size_t i = 0; i < words.size(); i++) {
+        entries.emplace_back(toLowerCopy(words[i]), weights.empty() ? 0 : weights[i]);
+    }
+    std::stable_sort(entries.begin(), entries.end(),
+        [](const auto& a, const auto& b) { return a.first < b.first; });
+    
+    // Readers are only blocked once the input is prepared
+    std::unique_lock<std::shared_mutex> lock(mutex);
+    detach();
+    
+    // Later duplicates win, matching repeated insert() calls
+    for (const auto& entry : entries) {
+        uint32_t node = insertNode(entry.first, nullptr);
+        nodes[node].isEndOfWord = true;
+        nodes[node].weight = entry.second;
+    }
+    rebuildAggregates();
+}
+
+// Recompute word counts and weight bounds bottom-up over the whole tree
+void Trie::rebuildAggregates() {
+    // Iterative post-order walk: a node is finished once all its children are
+    std::vector<std::pair<uint32_t, bool>> stack;
+    stack.emplace_back(0, false);
+    while (!stack.empty()) {
+        auto [index, childrenDone] = stack.back();
+        stack.pop_back();
+        TrieNode& node = nodes[index];
+        
+        if (!childrenDone) {
+            stack.emplace_back(index, true);
+            for (uint32_t child = node.firstChild; child != NO_NODE; child = nodes[child].nextSibling) {
+                stack.emplace_back(child, false);
+            }
+            continue;
+        }
+        
+        node.wordCount = node.isEndOfWord ? 1 : 0;
+        node.maxWeight = node.isEndOfWord ? node.weight : std::numeric_limits<int32_t>::min();
+        for (uint32_t child = node.firstChild; child != NO_NODE; child = nodes[child].nextSibling) {
+            node.wordCount += nodes[child].wordCount;
+            node.maxWeight = std::max(node.maxWeight, nodes[child].maxWeight);
         }
-        current = current->children[c];
     }
+}
+
+// Remove a word from the trie; its nodes stay in place for later inserts
+bool Trie::remove(const std::string& word) {
+    std::string lowerWord = toLowerCopy(word);
+    std::unique_lock<std::shared_mutex> lock(mutex);
+    std::vector<uint32_t> path;
+    if (!containsWord(lowerWord, &path)) {
+        return false;
+    }
+    detach();
+    nodes[path.back()].isEndOfWord = false;
+    nodes[path.back()].weight = 0;
     
-    // Mark the end of the word
-    current->isEndOfWord = true;
+    // Refresh subtree counts and weight bounds from the word back up to the root
+    for (auto it = path.rbegin(); it != path.rend(); ++it) {
+        TrieNode& node = nodes[*it];
+        node.wordCount--;
+        int32_t best = node.isEndOfWord ? node.weight : std::numeric_limits<int32_t>::min();
+        for (uint32_t child = node.firstChild; child != NO_NODE; child = nodes[child].nextSibling) {
+            best = std::max(best, nodes[child].maxWeight);
+        }
+        node.maxWeight = best;
+    }
+    return true;
 }
 
 // Search for an exact word in the trie
 bool Trie::search(const std::string& word) const {
-    TrieNode* node = root;
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    return containsWord(toLowerCopy(word));
+}
+
+// Check for an exact, already-lowercased word
+bool Trie::containsWord(const std::string& lowerWord, std::vector<uint32_t>* path) const {
+    uint32_t node = 0;
+    size_t position = 0;
+    if (path) path->push_back(node);
     
-    // Convert to lowercase and search each character
-    for (char c : word) {
-        c = std::tolower(c);
-        if (node->children.find(c) == node->children.end()) {
+    // Every edge on the way must match the word completely
+    while (position < lowerWord.size()) {
+        node = findChild(node, lowerWord[position]);
+        if (node == NO_NODE) {
             return false;
         }
-        node = node->children[c];
+        const TrieNode& edge = nodeData[node];
+        if (lowerWord.compare(position, edge.labelLength, labelData + edge.labelOffset,
+                              edge.labelLength) != 0) {
+            return false;
+        }
+        position += edge.labelLength;
+        if (path) path->push_back(node);
     }
     
     // Return true only if this is the end of a word
-    return node->isEndOfWord;
+    return nodeData[node].isEndOfWord;
 }
 
-// Find all words in the trie that start with the given prefix
-std::vector<std::string> Trie::startsWith(const std::string& prefix) const {
+// Find the node covering all words with the given prefix
+uint32_t Trie::findPrefixNode(const std::string& lowerPrefix, std::string& path) const {
+    uint32_t node = 0;
+    size_t position = 0;
+    path.clear();
+    
+    // The prefix may end part-way along an edge; the node below it still covers every match
+    while (position < lowerPrefix.size()) {
+        node = findChild(node, lowerPrefix[position]);
+        if (node == NO_NODE) {
+            return NO_NODE; // Prefix not found
+        }
+        const TrieNode& edge = nodeData[node];
+        const char* label = labelData + edge.labelOffset;
+        size_t compared = std::min<size_t>(edge.labelLength, lowerPrefix.size() - position);
+        if (lowerPrefix.compare(position, compared, label, compared) != 0) {
+            return NO_NODE;
+        }
+        path.append(label, edge.labelLength);
+        position += edge.labelLength;
+    }
+    return node;
+}
+
+// Find words in the trie that start with the given prefix
+std::vector<std::string> Trie::startsWith(const std::string& prefix, size_t limit, size_t offset) const {
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    return collectPrefix(toLowerCopy(prefix), limit, offset);
+}
+
+// Page of words under an already-lowercased prefix
+std::vector<std::string> Trie::collectPrefix(const std::string& lowerPrefix, size_t limit, size_t offset) const {
     std::vector<std::string> results;
-    TrieNode* node = root;
     
-    // Convert prefix to lowercase and find the node
-    std::string lowerPrefix = prefix;
-    for (char& c : lowerPrefix) {
-        c = std::tolower(c);
+    // Find the node covering the prefix
+    std::string path;
+    uint32_t node = findPrefixNode(lowerPrefix, path);
+    if (node == NO_NODE && !lowerPrefix.empty()) {
+        return results;
+    }
+    
+    // Collect words under this prefix using DFS, stopping early once the page is full
+    if (limit) {
+        results.reserve(std::min<size_t>(limit, nodeData[node].wordCount));
+    }
+    dfs(node, path, results, limit, offset);
+    return results;
+}
+
+// Recursively collect words under the given node
+void Trie::dfs(uint32_t node, std::string& prefix, std::vector<std::string>& results,
+               size_t limit, size_t& offset) const {
+    // If this is a complete word, either skip it or add it to results
+    if (nodeData[node].isEndOfWord) {
+        if (offset > 0) {
+            offset--;
+        } else {
+            results.push_back(prefix);
+        }
+    }
+    
+    // Visit all children in sorted order, reusing the prefix buffer
+    for (uint32_t child = nodeData[node].firstChild; child != NO_NODE; child = nodeData[child].nextSibling) {
+        if (limit && results.size() >= limit) {
+            return;
+        }
+        const TrieNode& edge = nodeData[child];
+        // Skip whole subtrees that fall entirely before the requested offset
+        if (offset >= edge.wordCount) {
+            offset -= edge.wordCount;
+            continue;
+        }
+        prefix.append(labelData + edge.labelOffset, edge.labelLength);
+        dfs(child, prefix, results, limit, offset);
+        prefix.resize(prefix.size() - edge.labelLength);
+    }
+}
+
+// Find the k highest-weighted words under the given prefix
+std::vector<std::string> Trie::topK(const std::string& prefix, size_t k) const {
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    return collectTopK(toLowerCopy(prefix), k);
+}
+
+// Highest-weighted words under an already-lowercased prefix
+std::vector<std::string> Trie::collectTopK(const std::string& lowerPrefix, size_t k) const {
+    std::vector<std::string> results;
+    std::string path;
+    uint32_t start = findPrefixNode(lowerPrefix, path);
+    if ((start == NO_NODE && !lowerPrefix.empty()) || k == 0) {
+        return results;
     }
     
-    // Traverse to the end of the prefix
-    for (char c : lowerPrefix) {
-        if (node->children.find(c) == node->children.end()) {
-            return results; // Prefix not found
+    // A candidate is either a finished word or a subtree bounded by its best weight
+    struct Candidate {
+        int32_t score;
+        bool isWord;
+        uint32_t node;
+        std::string text;
+    };
+    // Highest score first; ties broken alphabetically, words before their own subtree
+    auto lowerPriority = [](const Candidate& a, const Candidate& b) {
+        if (a.score != b.score) return a.score < b.score;
+        if (a.text != b.text) return a.text > b.text;
+        return !a.isWord && b.isWord;
+    };
+    std::priority_queue<Candidate, std::vector<Candidate>, decltype(lowerPriority)> frontier(lowerPriority);
+    frontier.push({nodeData[start].maxWeight, false, start, path});
+    
+    while (!frontier.empty() && results.size() < k) {
+        Candidate best = frontier.top();
+        frontier.pop();
+        
+        if (best.isWord) {
+            results.push_back(std::move(best.text));
+            continue;
+        }
+        
+        // Expand the subtree: its own word plus one bounded candidate per child
+        const TrieNode& node = nodeData[best.node];
+        if (node.isEndOfWord) {
+            frontier.push({node.weight, true, best.node, best.text});
         }
-        node = node->children[c];
+        for (uint32_t child = node.firstChild; child != NO_NODE; child = nodeData[child].nextSibling) {
+            const TrieNode& edge = nodeData[child];
+            frontier.push({edge.maxWeight, false, child,
+                           best.text + std::string(labelData + edge.labelOffset, edge.labelLength)});
+        }
+    }
+    
+    return results;
+}
+
+// Find words within a bounded edit distance of the query
+std::vector<std::string> Trie::fuzzySearch(const std::string& query, size_t maxDistance, size_t limit) const {
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    return collectFuzzy(toLowerCopy(query), maxDistance, limit);
+}
+
+// Words within maxDistance edits of an already-lowercased query
+std::vector<std::string> Trie::collectFuzzy(const std::string& lowerQuery, size_t maxDistance, size_t limit) const {
+    size_t width = lowerQuery.size() + 1;
+    // Nothing is further than the longer of the two strings, so clamp the bound to stay in range
+    uint32_t bound = static_cast<uint32_t>(std::min<size_t>(maxDistance, std::numeric_limits<uint32_t>::max() / 2));
+    
+    // Row 0 is the distance from the empty string to each query prefix
+    std::vector<uint32_t> rows(width);
+    for (size_t j = 0; j < width; j++) {
+        rows[j] = static_cast<uint32_t>(j);
+    }
+    
+    std::vector<FuzzyMatch> matches;
+    std::string prefix;
+    if (nodeData[0].isEndOfWord && lowerQuery.size() <= bound) {
+        matches.push_back({static_cast<uint32_t>(lowerQuery.size()), nodeData[0].weight, prefix});
     }
+    fuzzyDfs(0, prefix, lowerQuery, bound, rows, matches);
     
-    // Collect all words under this prefix using DFS
-    dfs(node, lowerPrefix, results);
+    // Closest first, then most popular, then alphabetical
+    auto better = [](const FuzzyMatch& a, const FuzzyMatch& b) {
+        if (a.distance != b.distance) return a.distance < b.distance;
+        if (a.weight != b.weight) return a.weight > b.weight;
+        return a.word < b.word;
+    };
+    size_t count = limit ? std::min(limit, matches.size()) : matches.size();
+    std::partial_sort(matches.begin(), matches.begin() + count, matches.end(), better);
+    
+    std::vector<std::string> results;
+    results.reserve(count);
+    for (size_t i = 0; i < count; i++) {
+        results.push_back(std::move(matches[i].word));
+    }
+    return results;
+}
+
+// Run a batch of lookups under one acquisition of the read lock
+std::vector<TrieQueryResult> Trie::searchMany(const std::vector<TrieQuery>& queries) const {
+    std::vector<std::string> lowerTexts;
+    lowerTexts.reserve(queries.size());
+    for (const auto& query : queries) {
+        lowerTexts.push_back(toLowerCopy(query.text));
+    }
+    
+    std::vector<TrieQueryResult> results(queries.size());
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    for (size_t i = 0; i < queries.size(); i++) {
+        const TrieQuery& query = queries[i];
+        const std::string& text = lowerTexts[i];
+        TrieQueryResult& result = results[i];
+        
+        switch (query.mode) {
+            case SearchMode::Exact:
+                result.type = SearchMode::Exact;
+                if (containsWord(text)) result.words.push_back(text);
+                continue;
+            case SearchMode::Fuzzy:
+                result.type = SearchMode::Fuzzy;
+                result.words = collectFuzzy(text, query.maxDistance, query.limit);
+                continue;
+            case SearchMode::Popular:
+                result.type = SearchMode::Popular;
+                result.words = collectTopK(text, query.limit);
+                continue;
+            case SearchMode::Auto:
+                // A complete longer word is returned on its own
+                if (text.size() > 2 && query.offset == 0 && containsWord(text)) {
+                    result.type = SearchMode::Exact;
+                    result.words.push_back(text);
+                    continue;
+                }
+                break;
+            case SearchMode::Prefix:
+                break;
+        }
+        
+        // Fetch one extra word to know whether another page exists
+        result.type = SearchMode::Prefix;
+        bool bounded = query.limit > 0 && query.limit < std::numeric_limits<size_t>::max();
+        result.words = collectPrefix(text, bounded ? query.limit + 1 : query.limit, query.offset);
+        if (bounded && result.words.size() > query.limit) {
+            result.words.pop_back();
+            result.more = true;
+        }
+        
+        // Nothing starts with a longer query, so it is probably misspelled
+        if (query.mode == SearchMode::Auto && result.words.empty() && query.offset == 0 && text.size() > 2) {
+            result.type = SearchMode::Fuzzy;
+            result.words = collectFuzzy(text, query.maxDistance, query.limit);
+        }
+    }
     return results;
 }
 
-// Recursively collect all words under the given node
-void Trie::dfs(TrieNode* node, const std::string& prefix, std::vector<std::string>& results) const {
-    if (!node) return;
+// Extend the edit-distance rows along each child edge and recurse while within bound
+void Trie::fuzzyDfs(uint32_t node, std::string& prefix, const std::string& query,
+                    uint32_t maxDistance, std::vector<uint32_t>& rows,
+                    std::vector<FuzzyMatch>& matches) const {
+    size_t width = query.size() + 1;
+    
+    for (uint32_t child = nodeData[node].firstChild; child != NO_NODE; child = nodeData[child].nextSibling) {
+        const TrieNode& edge = nodeData[child];
+        const char* label = labelData + edge.labelOffset;
+        size_t depth = prefix.size();
+        bool pruned = false;
+        
+        // One new row per label character; rows are stacked by path depth
+        for (uint32_t k = 0; k < edge.labelLength; k++) {
+            size_t row = depth + k + 1;
+            if (rows.size() < (row + 1) * width) {
+                rows.resize((row + 1) * width);
+            }
+            const uint32_t* previous = rows.data() + (row - 1) * width;
+            uint32_t* current = rows.data() + row * width;
+            char c = label[k];
+            
+            current[0] = static_cast<uint32_t>(row);
+            uint32_t rowMin = current[0];
+            for (size_t j = 1; j < width; j++) {
+                uint32_t cost = query[j - 1] == c ? 0 : 1;
+                uint32_t best = std::min({previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost});
+                // Adjacent transposition, e.g. "ibpuprofen" -> "ibuprofen"
+                if (row > 1 && j > 1 && query[j - 1] == (k > 0 ? label[k - 1] : prefix[depth - 1]) &&
+                    query[j - 2] == c) {
+                    best = std::min(best, rows[(row - 2) * width + j - 2] + 1);
+                }
+                current[j] = best;
+                rowMin = std::min(rowMin, best);
+            }
+            
+            // Every alignment already costs too much, so nothing below can match
+            if (rowMin > maxDistance) {
+                pruned = true;
+                break;
+            }
+        }
+        if (pruned) {
+            continue;
+        }
+        
+        prefix.append(label, edge.labelLength);
+        uint32_t distance = rows[prefix.size() * width + width - 1];
+        if (edge.isEndOfWord && distance <= maxDistance) {
+            matches.push_back({distance, edge.weight, prefix});
+        }
+        fuzzyDfs(child, prefix, query, maxDistance, rows, matches);
+        prefix.resize(depth);
+    }
+}
+
+// Number of distinct words in the trie
+size_t Trie::size() const {
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    return nodeData[0].wordCount;
+}
+
+// Memory held by the node arena and label pool, owned or mapped
+size_t Trie::memoryUsage() const {
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    return nodes.capacity() * sizeof(TrieNode) + labels.capacity() * sizeof(char) + mappedSize;
+}
+
+// Write the arena and label pool to a flat snapshot file
+void Trie::save(const std::string& path) const {
+    std::shared_lock<std::shared_mutex> lock(mutex);
+    SnapshotHeader header;
+    std::memcpy(header.magic, SNAPSHOT_MAGIC, sizeof(header.magic));
+    header.version = SNAPSHOT_VERSION;
+    header.nodeSize = sizeof(TrieNode);
+    header.nodeCount = mappedData ? static_cast<const SnapshotHeader*>(mappedData)->nodeCount : nodes.size();
+    header.labelCount = mappedData ? static_cast<const SnapshotHeader*>(mappedData)->labelCount : labels.size();
+    
+    // Write a new file and rename it over the old one, never rewriting the old
+    // one in place: other tries (in this or other processes) may have it mapped,
+    // and truncating it under them makes their next lookup fault with SIGBUS
+    std::string tempPath = temporarySnapshotPath(path);
+    std::ofstream out(tempPath, std::ios::binary | std::ios::trunc);
+    if (!out) {
+        throw std::runtime_error("Cannot open snapshot file for writing: " + tempPath);
+    }
+    out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+    out.write(reinterpret_cast<const char*>(nodeData), header.nodeCount * sizeof(TrieNode));
+    out.write(labelData, header.labelCount);
+    out.close();
+    if (!out) {
+        std::remove(tempPath.c_str());
+        throw std::runtime_error("Failed to write snapshot file: " + path);
+    }
+#ifdef _WIN32
+    // rename() does not replace an existing file on Windows
+    std::remove(path.c_str());
+#endif
+    if (std::rename(tempPath.c_str(), path.c_str()) != 0) {
+        std::remove(tempPath.c_str());
+        throw std::runtime_error("Failed to replace snapshot file: " + path);
+    }
+}
+
+// Map a snapshot file written by save() as this trie's read-only contents
+void Trie::load(const std::string& path) {
+    void* data = nullptr;
+    size_t length = 0;
     
-    // If this is a complete word, add it to results
-    if (node->isEndOfWord) {
-        results.push_back(prefix);
+#ifndef _WIN32
+    int fd = open(path.c_str(), O_RDONLY);
+    if (fd < 0) {
+        throw std::runtime_error("Cannot open snapshot file: " + path);
+    }
+    struct stat info;
+    if (fstat(fd, &info) != 0 || info.st_size < static_cast<off_t>(sizeof(SnapshotHeader))) {
+        close(fd);
+        throw std::runtime_error("Invalid snapshot file: " + path);
+    }
+    length = static_cast<size_t>(info.st_size);
+    data = mmap(nullptr, length, PROT_READ, MAP_SHARED, fd, 0);
+    close(fd);
+    if (data == MAP_FAILED) {
+        throw std::runtime_error("Cannot map snapshot file: " + path);
+    }
+#else
+    // No mmap here: read the file into a private buffer with the same layout
+    std::ifstream in(path, std::ios::binary | std::ios::ate);
+    if (!in) {
+        throw std::runtime_error("Cannot open snapshot file: " + path);
     }
+    length = static_cast<size_t>(in.tellg());
+    if (length < sizeof(SnapshotHeader)) {
+        throw std::runtime_error("Invalid snapshot file: " + path);
+    }
+    data = new char[length];
+    in.seekg(0);
+    in.read(static_cast<char*>(data), length);
+#endif
     
-    // Visit all children in sorted order
-    for (const auto& pair : node->children) {
-        dfs(pair.second, prefix + pair.first, results);
+    // Validate the header and every node before trusting any of the offsets in the file
+    const SnapshotHeader* header = static_cast<const SnapshotHeader*>(data);
+    bool valid = std::memcmp(header->magic, SNAPSHOT_MAGIC, sizeof(header->magic)) == 0 &&
+                 header->version == SNAPSHOT_VERSION &&
+                 header->nodeSize == sizeof(TrieNode) &&
+                 header->nodeCount > 0 &&
+                 header->nodeCount <= (length - sizeof(SnapshotHeader)) / sizeof(TrieNode) &&
+                 header->nodeCount <= std::numeric_limits<uint32_t>::max() &&
+                 header->labelCount == length - sizeof(SnapshotHeader) - header->nodeCount * sizeof(TrieNode);
+    if (valid) {
+        const TrieNode* snapshotNodes = reinterpret_cast<const TrieNode*>(static_cast<const char*>(data) +
+                                                                          sizeof(SnapshotHeader));
+        valid = validSnapshotNodes(snapshotNodes, header->nodeCount, header->labelCount);
+    }
+    if (!valid) {
+#ifndef _WIN32
+        munmap(data, length);
+#else
+        delete[] static_cast<char*>(data);
+#endif
+        throw std::runtime_error("Invalid snapshot file: " + path);
     }
-} 
\ No newline at end of file
+    
+    // Swap in the snapshot, dropping any previously owned or mapped contents
+    std::unique_lock<std::shared_mutex> lock(mutex);
+    unmap();
+    nodes.clear();
+    nodes.shrink_to_fit();
+    labels.clear();
+    labels.shrink_to_fit();
+    mappedData = data;
+    mappedSize = length;
+    nodeData = reinterpret_cast<const TrieNode*>(static_cast<const char*>(data) + sizeof(SnapshotHeader));
+    labelData = reinterpret_cast<const char*>(nodeData + header->nodeCount);
+}
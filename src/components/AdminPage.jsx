@@ -18,6 +18,9 @@ const initialMedicines = [
 // Threshold for low stock
 const LOW_STOCK_THRESHOLD = 30;
 
+// Medicines fetched per page of the full listing
+const MEDICINES_PAGE_SIZE = 100;
+
 // Function to check if a medicine is expiring soon (within 30 days)
 const isExpiringSoon = (expiryDate) => {
   const today = new Date();
@@ -51,6 +54,7 @@ const getExpiredMedicines = (medicines) => {
 const AdminPage = () => {
   const navigate = useNavigate();
   const [medicines, setMedicines] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [formData, setFormData] = useState({
     name: '',
     brand: '',
@@ -65,28 +69,37 @@ const AdminPage = () => {
   const [uploadStatus, setUploadStatus] = useState('');
   const [expiryTrackingAvailable, setExpiryTrackingAvailable] = useState(false);
   const [lowStockThreshold, setLowStockThreshold] = useState(LOW_STOCK_THRESHOLD);
+  const [dashboard, setDashboard] = useState(null);
 
   // Fetch medicines data from API on component mount
   useEffect(() => {
     fetchMedicines();
-    checkExpiryTracking();
   }, []);
 
+  // Fetch the inventory summary on mount and whenever the threshold changes
+  useEffect(() => {
+    fetchDashboard();
+  }, [lowStockThreshold]);
+
   // Fetch all medicines
   const fetchMedicines = async () => {
     setLoading(true);
+    setNextCursor(null);
     try {
       // If expiry tracking is available, use the C++ implementation
       if (expiryTrackingAvailable && activeTab === 'expiringSoon') {
-        const response = await axios.get(`${API_BASE_URL}/expiring_medicines`);
+        // Only ask for what expires within the next 30 days
+        const before = new Date(Date.now() + 30 * 24 * 60 * 60 * 1000).toISOString().slice(0, 10);
+        const response = await axios.get(`${API_BASE_URL}/expiring_medicines`, { params: { before } });
         setMedicines(response.data.results);
       } else if (activeTab === 'lowStock') {
         const response = await axios.get(`${API_BASE_URL}/low_stock_medicines?threshold=${lowStockThreshold}`);
         setMedicines(response.data.results);
       } else {
-        // Default fetch all medicines
-        const response = await axios.get(`${API_BASE_URL}/search_medicine?name=`);
+        // Default: the first page of all medicines; more are fetched on demand
+        const response = await axios.get(`${API_BASE_URL}/medicines`, { params: { limit: MEDICINES_PAGE_SIZE } });
         setMedicines(response.data.results || []);
+        setNextCursor(response.data.next_cursor ?? null);
       }
       setError(null);
     } catch (err) {
@@ -106,13 +119,30 @@ const AdminPage = () => {
     }
   };
 
-  // Check if expiry tracking is available
-  const checkExpiryTracking = async () => {
+  // Append the next page of the full listing
+  const loadMoreMedicines = async () => {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/medicines`, {
+        params: { limit: MEDICINES_PAGE_SIZE, after: nextCursor }
+      });
+      setMedicines(current => [...current, ...(response.data.results || [])]);
+      setNextCursor(response.data.next_cursor ?? null);
+    } catch (err) {
+      console.error('Error fetching more medicines:', err);
+      setError('Failed to load more medicines. Please try again later.');
+    }
+  };
+
+  // Fetch the tab counts and whether expiry tracking is available in one call;
+  // the server keeps these totals up to date, so this is cheap after every edit
+  const fetchDashboard = async () => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/health`);
+      const response = await axios.get(`${API_BASE_URL}/dashboard`, { params: { threshold: lowStockThreshold } });
+      setDashboard(response.data);
       setExpiryTrackingAvailable(response.data.expiry_tracking_available || false);
     } catch (err) {
-      console.error('Health check failed:', err);
+      console.error('Dashboard fetch failed:', err);
+      setDashboard(null);
       setExpiryTrackingAvailable(false);
     }
   };
@@ -156,7 +186,8 @@ const AdminPage = () => {
         }
       })
       .then(response => {
-        setUploadStatus(`Success! Uploaded ${response.data.medicines.length} medicines.`);
+        const { inserted, failed } = response.data;
+        setUploadStatus(`Success! Uploaded ${inserted} medicines${failed ? ` (${failed} rows skipped)` : ''}.`);
         // Refresh medicines list
         fetchMedicines();
       })
@@ -203,22 +234,17 @@ const AdminPage = () => {
         
         // Refresh medicines list
         fetchMedicines();
+        fetchDashboard();
       } else {
-        // Update existing medicine logic
-        // Note: Update API would need to be implemented
-        setMedicines(
-          medicines.map(medicine =>
-            medicine.id === editingId
-              ? {
-                  ...medicine,
-                  name: formData.name,
-                  brand: formData.brand,
-                  quantity: parseInt(formData.quantity, 10),
-                  expiryDate: formData.expiryDate
-                }
-              : medicine
-          )
-        );
+        // Update quantity and expiry date of the existing medicine
+        await axios.put(`${API_BASE_URL}/update_medicine_item/${editingId}`, {
+          quantity: parseInt(formData.quantity, 10),
+          expiryDate: formData.expiryDate
+        });
+        
+        // Refresh medicines list
+        fetchMedicines();
+        fetchDashboard();
         setEditingId(null);
       }
       
@@ -249,9 +275,14 @@ const AdminPage = () => {
   // Delete a medicine
   const handleDelete = async (id) => {
     if (window.confirm('Are you sure you want to delete this medicine?')) {
-      // Note: Delete API would need to be implemented
-      // For now, we'll just filter the medicines locally
-      setMedicines(medicines.filter(medicine => medicine.id !== id));
+      try {
+        await axios.delete(`${API_BASE_URL}/delete_medicine_item/${id}`);
+        setMedicines(medicines.filter(medicine => medicine.id !== id));
+        fetchDashboard();
+      } catch (err) {
+        console.error('Error deleting medicine:', err);
+        alert(`Error: ${err.response?.data?.error || 'Failed to delete medicine'}`);
+      }
     }
   };
 
@@ -483,7 +514,7 @@ const AdminPage = () => {
                             : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'
                         } whitespace-nowrap py-4 px-1 border-b-2 font-medium text-sm`}
                       >
-                        All Medicines ({medicines.length})
+                        All Medicines ({dashboard ? dashboard.totals.items : medicines.length})
                       </button>
                       <button
                         onClick={() => setActiveTab('lowStock')}
@@ -493,7 +524,7 @@ const AdminPage = () => {
                             : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'
                         } whitespace-nowrap py-4 px-1 border-b-2 font-medium text-sm`}
                       >
-                        Low Stock ({getLowStockMedicines(medicines).length})
+                        Low Stock ({dashboard ? dashboard.low_stock.count : getLowStockMedicines(medicines).length})
                       </button>
                       <button
                         onClick={() => setActiveTab('expiringSoon')}
@@ -503,7 +534,7 @@ const AdminPage = () => {
                             : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'
                         } whitespace-nowrap py-4 px-1 border-b-2 font-medium text-sm`}
                       >
-                        Expiring Soon ({getExpiringSoonMedicines(medicines).length})
+                        Expiring Soon ({dashboard ? dashboard.expiring['30'] : getExpiringSoonMedicines(medicines).length})
                       </button>
                       <button
                         onClick={() => setActiveTab('expired')}
@@ -513,7 +544,7 @@ const AdminPage = () => {
                             : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'
                         } whitespace-nowrap py-4 px-1 border-b-2 font-medium text-sm`}
                       >
-                        Expired ({getExpiredMedicines(medicines).length})
+                        Expired ({dashboard ? dashboard.expired : getExpiredMedicines(medicines).length})
                       </button>
                     </nav>
                   </div>
@@ -624,6 +655,17 @@ const AdminPage = () => {
                               </tbody>
                             </table>
                           </div>
+                          {nextCursor !== null && (
+                            <div className="text-center py-4">
+                              <button
+                                type="button"
+                                onClick={loadMoreMedicines}
+                                className="inline-flex items-center px-4 py-2 border border-gray-300 text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50"
+                              >
+                                Load more
+                              </button>
+                            </div>
+                          )}
                         </div>
                       </div>
                     </div>
@@ -24,6 +24,13 @@ const SearchPage = () => {
     setError('');
     setSearchFeedback('Searching...');
 
+    // Comma-separated names (e.g. a prescription) are looked up in one batch request
+    const terms = query.split(',').map((term) => term.trim()).filter((term) => term !== '');
+    if (terms.length > 1) {
+      await performBatchSearch(terms);
+      return;
+    }
+
     try {
       const response = await axios.get(`${API_URL}/search`, {
         params: { query: query.trim() }
@@ -49,6 +56,34 @@ const SearchPage = () => {
     }
   };
 
+  const performBatchSearch = async (terms) => {
+    try {
+      const response = await axios.post(`${API_URL}/search/batch`, { queries: terms });
+
+      // One list of distinct names, in the order the terms were entered
+      const names = [];
+      response.data.results.forEach((result) => {
+        result.results.forEach((name) => {
+          if (!names.includes(name)) {
+            names.push(name);
+          }
+        });
+      });
+
+      setResults(names);
+      setResultCount(names.length);
+      setSearchType('batch');
+      setSearchFeedback(`${names.length} result(s) found for ${terms.length} medicines`);
+      setShowResults(true);
+    } catch (err) {
+      setError('Error searching for medicines. Please try again.');
+      setSearchFeedback('Error searching for the listed medicines');
+      setShowResults(false);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   // Search when user types (with debounce)
   useEffect(() => {
     const timer = setTimeout(() => {
@@ -94,7 +129,7 @@ const SearchPage = () => {
                     type="text"
                     id="search-input"
                     className="form-control form-control-lg"
-                    placeholder="Start typing a medicine name..."
+                    placeholder="Start typing a medicine name, or several separated by commas..."
                     value={query}
                     onChange={(e) => setQuery(e.target.value)}
                     onKeyDown={handleKeyDown}
@@ -24,6 +24,20 @@ void test_trie() {
     for (const auto& word : results) {
         std::cout << "  - " << word << std::endl;
     }
+    
+    // Test ranked top-k search
+    trie.insert("apple", 10);
+    trie.insert("appetizer", 5);
+    std::cout << "Top 2 words starting with 'app':" << std::endl;
+    for (const auto& word : trie.topK("app", 2)) {
+        std::cout << "  - " << word << std::endl;
+    }
+    
+    // Test typo-tolerant search
+    std::cout << "Words within 1 edit of 'aple':" << std::endl;
+    for (const auto& word : trie.fuzzySearch("aple", 1)) {
+        std::cout << "  - " << word << std::endl;
+    }
 }
 
 void test_minheap() {
@@ -4,6 +4,11 @@
 
 namespace py = pybind11;
 
+// Drops the GIL while the C++ code runs. The heap has its own reader-writer
+// lock, so threads can query it concurrently; a thread waiting on that lock
+// must not hold the GIL, or the writer it waits for could never finish.
+using release_gil = py::call_guard<py::gil_scoped_release>;
+
 // Create a module for MinHeap functionality
 PYBIND11_MODULE(expiry_heap, m) {
     m.doc() = "Medicine expiry tracking with MinHeap"; // Module docstring
@@ -16,16 +21,35 @@ PYBIND11_MODULE(expiry_heap, m) {
         .def_readwrite("brand", &MedicineItem::brand)
         .def_readwrite("quantity", &MedicineItem::quantity)
         .def_readwrite("expiryDate", &MedicineItem::expiryDate)
-        .def("getExpiryTime", &MedicineItem::getExpiryTime);
+        .def_readonly("expiryDay", &MedicineItem::expiryDay)
+        .def_static("parseExpiryDay", &MedicineItem::parseExpiryDay);
+    
+    // A page pre-encoded as JSON; `json` is bytes so it can go straight into a response body
+    py::class_<JsonPage>(m, "JsonPage")
+        .def_property_readonly("json", [](const JsonPage& page) { return py::bytes(page.json); })
+        .def_readonly("count", &JsonPage::count)
+        .def_readonly("more", &JsonPage::more)
+        .def("__len__", [](const JsonPage& page) { return page.count; });
     
     // Expose MinHeap class
     py::class_<MinHeap>(m, "MinHeap")
         .def(py::init<>())
-        .def("insert", &MinHeap::insert)
-        .def("extractMin", &MinHeap::extractMin)
-        .def("peek", &MinHeap::peek)
-        .def("getSortedItems", &MinHeap::getSortedItems)
-        .def("isEmpty", &MinHeap::isEmpty)
-        .def("size", &MinHeap::size)
-        .def("clear", &MinHeap::clear);
-} 
\ No newline at end of file
+        .def("insert", &MinHeap::insert, release_gil())
+        .def("insertMany", &MinHeap::insertMany, py::arg("items"), release_gil())
+        .def("extractMin", &MinHeap::extractMin, release_gil())
+        .def("peek", &MinHeap::peek, release_gil())
+        .def("update", &MinHeap::update, py::arg("id"), py::arg("quantity"), py::arg("expiryDate"), release_gil())
+        .def("decreaseKey", &MinHeap::decreaseKey, py::arg("id"), py::arg("expiryDate"), release_gil())
+        .def("remove", &MinHeap::remove, py::arg("id"), release_gil())
+        .def("contains", &MinHeap::contains, py::arg("id"), release_gil())
+        .def("peekN", &MinHeap::peekN, py::arg("n"), py::arg("offset") = 0, release_gil())
+        .def("expiringBefore", &MinHeap::expiringBefore,
+             py::arg("date"), py::arg("limit"), py::arg("offset") = 0, release_gil())
+        .def("peekNJson", &MinHeap::peekNJson, py::arg("n"), py::arg("offset") = 0, release_gil())
+        .def("expiringBeforeJson", &MinHeap::expiringBeforeJson,
+             py::arg("date"), py::arg("limit"), py::arg("offset") = 0, release_gil())
+        .def("getSortedItems", &MinHeap::getSortedItems, release_gil())
+        .def("isEmpty", &MinHeap::isEmpty, release_gil())
+        .def("size", &MinHeap::size, release_gil())
+        .def("clear", &MinHeap::clear, release_gil());
+}
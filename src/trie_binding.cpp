@@ -4,12 +4,71 @@
 
 namespace py = pybind11;
 
+// Drops the GIL while the C++ code runs. The Trie has its own reader-writer
+// lock, so searches from several threads run in parallel; a thread waiting on
+// that lock must not hold the GIL, or the writer it waits for could never finish.
+using release_gil = py::call_guard<py::gil_scoped_release>;
+
 PYBIND11_MODULE(medilocate, m) {
     m.doc() = "Medicine name search with Trie";
     
+    py::enum_<SearchMode>(m, "SearchMode")
+        .value("Auto", SearchMode::Auto)
+        .value("Exact", SearchMode::Exact)
+        .value("Prefix", SearchMode::Prefix)
+        .value("Popular", SearchMode::Popular)
+        .value("Fuzzy", SearchMode::Fuzzy);
+    
+    py::class_<TrieQuery>(m, "TrieQuery")
+        .def(py::init([](std::string text, SearchMode mode, size_t limit, size_t offset, size_t maxDistance) {
+                 return TrieQuery{std::move(text), mode, limit, offset, maxDistance};
+             }),
+             py::arg("text"), py::arg("mode") = SearchMode::Auto, py::arg("limit") = 0,
+             py::arg("offset") = 0, py::arg("max_distance") = 1)
+        .def_readwrite("text", &TrieQuery::text)
+        .def_readwrite("mode", &TrieQuery::mode)
+        .def_readwrite("limit", &TrieQuery::limit)
+        .def_readwrite("offset", &TrieQuery::offset)
+        .def_readwrite("maxDistance", &TrieQuery::maxDistance);
+    
+    py::class_<TrieQueryResult>(m, "TrieQueryResult")
+        .def_readonly("words", &TrieQueryResult::words)
+        .def_readonly("type", &TrieQueryResult::type)
+        .def_readonly("more", &TrieQueryResult::more);
+    
     py::class_<Trie>(m, "Trie")
         .def(py::init<>())
-        .def("insert", &Trie::insert)
-        .def("search", &Trie::search)
-        .def("startsWith", &Trie::startsWith);
-} 
\ No newline at end of file
+        .def("insert", &Trie::insert, py::arg("word"), py::arg("weight") = 0, release_gil())
+        // Accepts any iterable of names or (name, weight) pairs, e.g. a generator
+        .def("insertMany", [](Trie& trie, py::iterable items) {
+            std::vector<std::string> words;
+            std::vector<int> weights;
+            bool weighted = false;
+            for (py::handle item : items) {
+                if (py::isinstance<py::str>(item)) {
+                    words.push_back(item.cast<std::string>());
+                    weights.push_back(0);
+                } else {
+                    auto pair = item.cast<std::pair<std::string, int>>();
+                    words.push_back(std::move(pair.first));
+                    weights.push_back(pair.second);
+                    weighted = true;
+                }
+            }
+            // Python objects are all converted above; the insert itself runs without the GIL
+            py::gil_scoped_release release;
+            trie.insertMany(words, weighted ? weights : std::vector<int>());
+        }, py::arg("items"))
+        .def("remove", &Trie::remove, py::arg("word"), release_gil())
+        .def("search", &Trie::search, release_gil())
+        .def("startsWith", &Trie::startsWith,
+             py::arg("prefix"), py::arg("limit") = 0, py::arg("offset") = 0, release_gil())
+        .def("topK", &Trie::topK, py::arg("prefix"), py::arg("k"), release_gil())
+        .def("fuzzySearch", &Trie::fuzzySearch,
+             py::arg("query"), py::arg("max_distance"), py::arg("limit") = 0, release_gil())
+        .def("searchMany", &Trie::searchMany, py::arg("queries"), release_gil())
+        .def("size", &Trie::size, release_gil())
+        .def("memoryUsage", &Trie::memoryUsage, release_gil())
+        .def("save", &Trie::save, py::arg("path"), release_gil())
+        .def("load", &Trie::load, py::arg("path"), release_gil());
+}
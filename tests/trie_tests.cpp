@@ -0,0 +1,193 @@
+// Assertion tests for the native Trie and MinHeap (CMake target trie_test).
+// Exits non-zero if any check fails; CHECK stays active in Release builds,
+// unlike assert(), which NDEBUG compiles out.
+
+#include <cstdio>
+#include <iostream>
+#include <string>
+#include <vector>
+#include "../include/Trie.h"
+#include "../include/MinHeap.h"
+
+static int failures = 0;
+
+#define CHECK(condition)                                                          \
+    do {                                                                          \
+        if (!(condition)) {                                                       \
+            std::cerr << __FILE__ << ":" << __LINE__ << ": CHECK failed: "        \
+                      << #condition << std::endl;                                 \
+            ++failures;                                                           \
+        }                                                                         \
+    } while (0)
+
+using Words = std::vector<std::string>;
+
+static void fillTrie(Trie& trie) {
+    trie.insertMany({"amoxicillin", "amlodipine", "aspirin", "atenolol", "ibuprofen", "metformin", "metoprolol"},
+                    {5, 50, 20, 0, 1, 2, 9});
+}
+
+static void testStartsWith() {
+    Trie trie;
+    fillTrie(trie);
+    CHECK(trie.startsWith("a") == Words({"amlodipine", "amoxicillin", "aspirin", "atenolol"}));
+    CHECK(trie.startsWith("A", 2) == Words({"amlodipine", "amoxicillin"}));
+    CHECK(trie.startsWith("a", 2, 2) == Words({"aspirin", "atenolol"}));
+    CHECK(trie.startsWith("a", 2, 4).empty());
+    CHECK(trie.startsWith("z").empty());
+    CHECK(trie.search("aspirin"));
+    CHECK(!trie.search("asp"));
+    CHECK(trie.size() == 7);
+}
+
+static void testTopK() {
+    Trie trie;
+    fillTrie(trie);
+    CHECK(trie.topK("a", 2) == Words({"amlodipine", "aspirin"}));
+    CHECK(trie.topK("met", 5) == Words({"metoprolol", "metformin"}));
+    CHECK(trie.topK("x", 3).empty());
+
+    // Reinserting a word replaces its weight
+    trie.insert("atenolol", 100);
+    CHECK(trie.topK("a", 1) == Words({"atenolol"}));
+    CHECK(trie.size() == 7);
+}
+
+static void testRemove() {
+    Trie trie;
+    fillTrie(trie);
+    CHECK(trie.remove("Amlodipine"));
+    CHECK(!trie.remove("amlodipine"));
+    CHECK(!trie.remove("am"));
+    CHECK(!trie.search("amlodipine"));
+    CHECK(trie.size() == 6);
+    CHECK(trie.startsWith("am") == Words({"amoxicillin"}));
+    CHECK(trie.topK("a", 1) == Words({"aspirin"}));
+
+    // A removed word can be inserted again
+    trie.insert("amlodipine", 1);
+    CHECK(trie.startsWith("am") == Words({"amlodipine", "amoxicillin"}));
+    CHECK(trie.size() == 7);
+}
+
+static void testFuzzySearch() {
+    Trie trie;
+    fillTrie(trie);
+    CHECK(trie.fuzzySearch("metformn", 1) == Words({"metformin"}));
+    CHECK(trie.fuzzySearch("metfromin", 1) == Words({"metformin"}));  // A transposition is one edit
+    CHECK(trie.fuzzySearch("mtformn", 1).empty());
+    CHECK(trie.fuzzySearch("mtformn", 2) == Words({"metformin"}));
+    CHECK(trie.fuzzySearch("aspirin", 0) == Words({"aspirin"}));
+}
+
+static void testSearchMany() {
+    Trie trie;
+    fillTrie(trie);
+    std::vector<TrieQuery> queries(5);
+    queries[0].text = "aspirin";
+    queries[1].text = "a";
+    queries[1].mode = SearchMode::Prefix;
+    queries[1].limit = 2;
+    queries[2].text = "a";
+    queries[2].mode = SearchMode::Popular;
+    queries[2].limit = 1;
+    queries[3].text = "ibuprofn";
+    queries[3].mode = SearchMode::Fuzzy;
+    queries[4].text = "asp";
+    queries[4].mode = SearchMode::Exact;
+
+    auto results = trie.searchMany(queries);
+    CHECK(results.size() == 5);
+    CHECK(results[0].words == Words({"aspirin"}) && results[0].type == SearchMode::Exact);
+    CHECK(results[1].words == Words({"amlodipine", "amoxicillin"}) && results[1].type == SearchMode::Prefix);
+    CHECK(results[1].more);
+    CHECK(results[2].words == Words({"amlodipine"}) && results[2].type == SearchMode::Popular);
+    CHECK(results[3].words == Words({"ibuprofen"}) && results[3].type == SearchMode::Fuzzy);
+    CHECK(results[4].words.empty() && results[4].type == SearchMode::Exact);
+}
+
+static void testSaveAndLoad() {
+    Trie trie;
+    fillTrie(trie);
+    std::string path = "trie_test_snapshot.bin";
+    trie.save(path);
+
+    Trie loaded;
+    loaded.load(path);
+    CHECK(loaded.size() == trie.size());
+    CHECK(loaded.startsWith("a") == trie.startsWith("a"));
+    CHECK(loaded.topK("a", 2) == trie.topK("a", 2));
+    std::remove(path.c_str());
+}
+
+static MedicineItem makeItem(int id, const std::string& expiryDate, int quantity = 1) {
+    MedicineItem item;
+    item.id = id;
+    item.name = "item" + std::to_string(id);
+    item.brand = "brand";
+    item.quantity = quantity;
+    item.expiryDate = expiryDate;
+    return item;
+}
+
+static std::vector<int> ids(const std::vector<MedicineItem>& items) {
+    std::vector<int> result;
+    for (const auto& item : items) {
+        result.push_back(item.id);
+    }
+    return result;
+}
+
+static void fillHeap(MinHeap& heap) {
+    heap.insertMany({makeItem(1, "2025-03-01"), makeItem(2, "2025-01-01"),
+                     makeItem(3, "2025-02-01"), makeItem(4, "2025-04-01")});
+}
+
+static void testHeapUpdate() {
+    MinHeap heap;
+    fillHeap(heap);
+    CHECK(ids(heap.getSortedItems()) == std::vector<int>({2, 3, 1, 4}));
+
+    CHECK(heap.update(4, 7, "2024-12-01"));
+    CHECK(heap.peek().id == 4 && heap.peek().quantity == 7);
+    CHECK(heap.update(2, 1, "2026-01-01"));
+    CHECK(ids(heap.getSortedItems()) == std::vector<int>({4, 3, 1, 2}));
+    CHECK(!heap.update(99, 1, "2025-01-01"));
+
+    // Inserting an existing id replaces the item
+    heap.insert(makeItem(1, "2020-01-01"));
+    CHECK(heap.size() == 4);
+    CHECK(heap.peek().id == 1);
+}
+
+static void testHeapRemove() {
+    MinHeap heap;
+    fillHeap(heap);
+    CHECK(heap.remove(3));
+    CHECK(!heap.contains(3));
+    CHECK(!heap.remove(99));
+    CHECK(ids(heap.getSortedItems()) == std::vector<int>({2, 1, 4}));
+    CHECK(heap.remove(2));
+    CHECK(heap.peek().id == 1);
+    CHECK(ids(heap.expiringBefore("2025-03-31", 10)) == std::vector<int>({1}));
+    CHECK(heap.extractMin().id == 1);
+    CHECK(heap.size() == 1);
+}
+
+int main() {
+    testStartsWith();
+    testTopK();
+    testRemove();
+    testFuzzySearch();
+    testSearchMany();
+    testSaveAndLoad();
+    testHeapUpdate();
+    testHeapRemove();
+
+    if (failures) {
+        std::cerr << failures << " check(s) failed" << std::endl;
+        return 1;
+    }
+    std::cout << "All tests passed" << std::endl;
+    return 0;
+}